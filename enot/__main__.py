@@ -2,14 +2,16 @@
 
 Usage:
   enot create <name> [-l LEVEL]
-  enot build [-l LEVEL][--define VARLINE]
+  enot build [-l LEVEL][--define VARLINE][-j JOBS]
+  enot watch [-l LEVEL][--define VARLINE][-j JOBS][--node NODE][--cookie COOKIE]
   enot package [-l LEVEL][--define VARLINE]
   enot release [-l LEVEL][--define VARLINE]
   enot fetch <package> [<version>] [-l LEVEL]
   enot install <package> [<version>] [-l LEVEL]
   enot uninstall <package> [-l LEVEL]
   enot installed
-  enot deps [-l LEVEL]
+  enot cache gc [--max-size SIZE] [--max-age DAYS] [--keep-versions N] [--dry-run] [-l LEVEL]
+  enot deps [-l LEVEL][-j JOBS]
   enot version
   enot upgrade [-d DEP] [-l LEVEL]
   enot eunit [-l LEVEL][--define VARLINE]
@@ -23,6 +25,13 @@ Options:
   -l LEVEL --log-level LEVEL         set log level. Options: debug, info, warning, error, critical [default: info]
   --log-dir DIR                      common tests log dir [default: test/logs]
   -d DEP --dep DEP                   ignore lock only for certain dep.
+  -j JOBS --jobs JOBS                number of deps to be fetched and built in parallel [default: 1]
+  --max-size SIZE                    max size of local cache builds, f.e. 10G
+  --max-age DAYS                     remove builds, which were not used for DAYS
+  --keep-versions N                  keep only N last used versions of every package
+  --dry-run                          print builds to be removed, but don't remove them
+  --node NODE                        load recompiled modules to running erlang node, f.e. app@localhost
+  --cookie COOKIE                    cookie of the node
   --define VARLINE                   define vars for file compilation. Used in erlang preprocessor. different vars
                                      should be separated with spaces, KV vars should use, f.e. --define 'TEST VAR=123'.
                                      [default: '']
@@ -32,17 +41,15 @@ import sys
 from os.path import join
 
 from docopt import docopt, DocoptExit
-from jinja2 import Template
-from pkg_resources import Requirement, resource_filename
 
-import enot
 from enot import APPVSN
-from enot.packages.package_builder import Builder
-from enot.packages.package_controller import Controller
 from enot.utils import logger
-from enot.utils.file_utils import ensure_dir
+from enot.utils.file_utils import ensure_dir, resource_path
 from enot.utils.logger import warning
 
+# Builder, Controller and their dependencies (git, requests, jinja2) are slow to import, so every command
+# imports only modules it needs. Keep top-level imports cheap: they are paid by every enot call.
+
 
 def main(args=None):
     try:
@@ -57,10 +64,12 @@ def main(args=None):
         result = create(path, arguments)
     if arguments['build']:
         result = build(path, arguments)
+    if arguments['watch']:
+        result = watch(path, arguments)
     if arguments['version']:
         result = version(path)
     if arguments['deps']:
-        result = deps(path)
+        result = deps(path, arguments)
     if arguments['release']:
         result = release(path, arguments)
     if arguments['package']:
@@ -79,6 +88,8 @@ def main(args=None):
         result = uninstall(arguments)
     if arguments['installed']:
         result = installed()
+    if arguments['cache'] and arguments['gc']:
+        result = gc(arguments)
     if result:
         sys.exit(0)
     else:
@@ -100,25 +111,43 @@ def create(path: str, arguments: dict):
 
 # Build project with all deps (fetch deps if needed)
 def build(path, arguments: dict):
+    from enot.packages.package_builder import Builder
     define = arguments['--define']
     builder = Builder.init_from_path(path)
-    return do_build(builder, define)
+    return do_build(builder, define, jobs=__get_jobs(arguments))
+
 
+def do_build(builder: 'Builder', define: str, test=False, jobs=1):
+    builder.populate(test, jobs)
+    if builder.build(define, jobs):
+        __auto_gc(builder)
+        return True
+    return False
 
-def do_build(builder: Builder, define: str, test=False):
-    builder.populate(test)
-    return builder.build(define)
+
+# Build project, then rebuild it on every change till interrupted. Only changed modules are recompiled.
+def watch(path, arguments: dict):
+    from enot.compiler.hot_loader import HotLoader
+    from enot.packages.build_watcher import BuildWatcher
+    from enot.packages.package_builder import Builder
+    node = arguments['--node']
+    loader = HotLoader(node, arguments['--cookie']) if node else None
+    watcher = BuildWatcher(Builder.init_from_path(path), arguments['--define'], __get_jobs(arguments), loader)
+    return watcher.run()
 
 
 # Print project's application version. Prefer enot_config.json vsn, but if none - use app.src version.
 def version(path):
-    builder = Builder.init_from_path(path)
-    print(builder.project.vsn)  # TODO return vsn?
+    from enot.global_properties import GlobalProperties
+    from enot.packages.package import Package
+    GlobalProperties().configure()  # package's config is parsed with it's caches
+    print(Package.from_path(path).vsn)  # TODO return vsn?
     return True
 
 
 # Build a release. Will use current rel dir with config or create new, if none is found
 def release(path, arguments: dict):
+    from enot.packages.package_builder import Builder
     define = arguments['--define']
     builder = Builder.init_from_path(path)
     if not do_build(builder, define):  # TODO check if project was already built
@@ -128,15 +157,19 @@ def release(path, arguments: dict):
 
 
 # Fetch and build deps
-def deps(path):
+def deps(path, arguments: dict):
+    from enot.packages.package_builder import Builder
+    jobs = __get_jobs(arguments)
     builder = Builder.init_from_path(path)
-    builder.populate()
-    builder.deps()
+    builder.populate(jobs=jobs)
+    builder.deps(jobs)
+    __auto_gc(builder)
     return True
 
 
 # Create enot package
 def package(path, arguments: dict):
+    from enot.packages.package_builder import Builder
     define = arguments.get('--define', '')
     builder = Builder.init_from_path(path)
     if not do_build(builder, define):
@@ -147,6 +180,7 @@ def package(path, arguments: dict):
 
 # Run upgrade
 def upgrade(path, arguments):
+    from enot.packages.package_builder import Builder
     dep = arguments.get('--dep', None)
     builder = Builder.init_from_path(path)
     builder.drop_locs(dep)
@@ -156,6 +190,7 @@ def upgrade(path, arguments):
 
 # Fetch package to local cache
 def fetch(arguments):
+    from enot.packages.package_controller import Controller
     fullname = __get_full_name(arguments)
     maybe_vsn = arguments['<version>']
     controller = Controller()
@@ -164,6 +199,7 @@ def fetch(arguments):
 
 # Run package installation steps. If not in local cache - fetch it.
 def install(arguments):
+    from enot.packages.package_controller import Controller
     fullname = __get_full_name(arguments)
     maybe_vsn = arguments['<version>']
     controller = Controller()
@@ -172,6 +208,7 @@ def install(arguments):
 
 # Uninstall previously installed package. It still remains in local cache.
 def uninstall(arguments):
+    from enot.packages.package_controller import Controller
     fullname = __get_full_name(arguments)
     controller = Controller()
     return controller.uninstall(fullname)
@@ -179,12 +216,30 @@ def uninstall(arguments):
 
 # Print installed packages
 def installed():
+    from enot.packages.package_controller import Controller
     print(Controller().installed())
     return True
 
 
+# Remove old builds from local cache
+def gc(arguments: dict):
+    from enot.pac_cache.cache_gc import GcPolicy, DAY, parse_size
+    from enot.packages.package_controller import Controller
+    max_age = arguments['--max-age']
+    keep_versions = arguments['--keep-versions']
+    policy = GcPolicy(max_size=parse_size(arguments['--max-size']),
+                      max_age=int(max_age) * DAY if max_age is not None else None,
+                      keep_versions=int(keep_versions) if keep_versions is not None else None)
+    removed = Controller().gc(policy, arguments['--dry-run'])
+    mirrors = [entry for entry in removed if 'mirror' in entry]
+    print(str(len(removed) - len(mirrors)) + ' builds, ' + str(len(mirrors)) + ' git mirrors, ' +
+          str(sum(entry['size'] for entry in removed)) + ' bytes')
+    return True
+
+
 # Run tests
 def eunit(path, arguments: dict):
+    from enot.packages.package_builder import Builder
     define = arguments['--define']
     builder = Builder.init_from_path(path)
     if not do_build(builder, define, test=True):
@@ -193,6 +248,7 @@ def eunit(path, arguments: dict):
 
 
 def ct(path, arguments):
+    from enot.packages.package_builder import Builder
     log_dir = arguments['--log-dir']
     define = arguments['--define']
     builder = Builder.init_from_path(path)
@@ -202,7 +258,8 @@ def ct(path, arguments):
 
 
 def __ensure_template(src_dir, name, suffix, overwrite_name=False):
-    template = resource_filename(Requirement.parse(enot.APPNAME), 'enot/resources/template' + suffix)
+    from jinja2 import Template
+    template = resource_path('template' + suffix)
     if overwrite_name:
         filename = suffix
     else:
@@ -218,6 +275,23 @@ def __ensure_template(src_dir, name, suffix, overwrite_name=False):
                                              modules_tmp="{{ modules }}"))
 
 
+# Run local cache gc, if it is enabled in global config. Never fails the build.
+def __auto_gc(builder: 'Builder'):
+    from enot.pac_cache.cache_gc import auto_collect
+    try:
+        auto_collect(builder.system_config.cache.local_cache, builder.system_config.cache_gc)
+    except Exception as e:
+        warning('Local cache gc failed: ' + str(e))
+
+
+def __get_jobs(args: dict) -> int:
+    jobs = args.get('--jobs') or '1'
+    if not jobs.isdigit() or int(jobs) < 1:
+        warning('Incorrect jobs parameter. Should be a positive number.')
+        raise ValueError('Incorrect jobs parameter\'s value')
+    return int(jobs)
+
+
 def __get_full_name(args: dict) -> str:
     fullname = args['<package>']
     if fullname is None or '/' not in fullname:
@@ -1,5 +1,4 @@
 import fileinput
-import shutil
 import subprocess
 import sys
 from os import remove, listdir
@@ -9,6 +8,7 @@ from enot.action.action import Action
 from enot.compiler.relx import RelxCompiler
 from enot.utils.file_utils import untar, remove_dir, ensure_executable
 from enot.utils.logger import error
+from enot.utils.materialize import materialize_tree
 
 
 class Release(Action):
@@ -32,7 +32,7 @@ class Release(Action):
                 return False
             local = join(rel_dir, '_rel')
             remove_dir(local)
-            shutil.copytree(join(package.path, '_rel'), local)
+            materialize_tree(join(package.path, '_rel'), local)
             return True
         except subprocess.CalledProcessError as e:
             error(str(e))
@@ -0,0 +1,155 @@
+"""
+Build manifest of a package, used for incremental compilation.
+Stores compilation options hash, state of every compiled module's source and headers,
+and module dependency graph, found by SourceScanner.
+"""
+import hashlib
+import json
+import os
+import time
+from os.path import join
+
+from enot.compiler.source_scanner import SourceScanner, with_dependants
+from enot.utils.file_utils import file_hash
+from enot.utils.logger import debug
+
+MANIFEST_VERSION = 2
+RACY_INTERVAL = 2  # seconds. Files modified so close to manifest write are always rehashed.
+
+
+def options_hash(options: list) -> str:
+    return hashlib.sha1(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path: str, options: str, modules: dict, headers: dict = None, saved_at: float = 0):
+        self._path = path
+        self._options = options
+        self._modules = modules
+        self._headers = headers or {}
+        self._saved_at = saved_at
+        self._hashes = {}  # source hashes, calculated during this build
+        self._scanned = {}  # module name -> scan result for modules changed during this build
+        self._changed_headers = {}  # header path -> changed flag, checked during this build
+
+    @classmethod
+    # Load manifest from file. If it is missing, broken or was written with other options - it is empty.
+    def load(cls, path: str, options: str) -> 'BuildManifest':
+        try:
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, options, {})
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('options') != options:
+            debug('build options changed, full rebuild')
+            return cls(path, options, {})
+        return cls(path, options,
+                   manifest.get('modules', {}),
+                   manifest.get('headers', {}),
+                   manifest.get('saved_at', 0))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def modules(self) -> dict:  # module name -> source state and found deps
+        return self._modules
+
+    @property
+    def headers(self) -> dict:  # header path -> header state
+        return self._headers
+
+    # Return files (module name -> source dir) which should be compiled, as their source or any of
+    # included headers was changed, or their beam is missing in output dir.
+    # Modules, depending on changed modules in compile time (parse transforms, behaviours) are also returned.
+    # Changed modules are rescanned, as their includes could be changed.
+    def outdated(self, files: dict, output_path: str, scanner: SourceScanner) -> dict:
+        changed = set()
+        for name, path in files.items():
+            if not self.__is_actual(name, path, output_path) \
+                    or any(self.__is_header_changed(header) for header in self.modules[name]['headers']):
+                changed.add(name)
+                self._scanned[name] = scanner.scan(join(path, name) + '.erl')
+        outdated = with_dependants(self.compile_deps(files), changed)
+        return {name: path for name, path in files.items() if name in outdated}
+
+    # Return compile time deps for every module from files
+    def compile_deps(self, files: dict) -> dict:
+        return {name: self.__module_deps(name)['compile_deps'] for name in files}
+
+    # Remove beams of modules, which sources were removed. Return removed modules.
+    def drop_removed(self, files: dict, output_path: str) -> list:
+        removed = [name for name in self.modules if name not in files]
+        for name in removed:
+            beam = join(output_path, name + '.beam')
+            debug('remove ' + beam)
+            if os.path.isfile(beam):
+                os.remove(beam)
+            del self.modules[name]
+        return removed
+
+    # Remember compiled modules sources state, their headers state and deps
+    def update(self, files: dict):
+        for name, path in files.items():
+            source = join(path, name) + '.erl'
+            entry = self.__get_state(source)
+            entry['source'] = source
+            entry.update(self.__module_deps(name))
+            self.modules[name] = entry
+            for header in entry['headers']:
+                if header not in self.headers or self._changed_headers.get(header, False):
+                    self.headers[header] = self.__get_state(header)
+
+    def save(self):
+        self._saved_at = time.time()
+        used = {header for module in self.modules.values() for header in module['headers']}
+        with open(self.path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION,
+                       'options': self._options,
+                       'saved_at': self._saved_at,
+                       'headers': {k: v for k, v in self.headers.items() if k in used},
+                       'modules': self.modules}, f, sort_keys=True)
+
+    def __module_deps(self, name: str) -> dict:
+        if name in self._scanned:
+            return self._scanned[name]
+        entry = self.modules[name]
+        return {'headers': entry['headers'], 'compile_deps': entry['compile_deps'], 'imports': entry['imports']}
+
+    def __is_actual(self, name: str, path: str, output_path: str) -> bool:
+        entry = self.modules.get(name)
+        source = join(path, name) + '.erl'
+        if entry is None or entry['source'] != source or not os.path.isfile(join(output_path, name + '.beam')):
+            return False
+        return self.__is_same(source, entry)
+
+    def __is_header_changed(self, header: str) -> bool:
+        if header not in self._changed_headers:
+            entry = self.headers.get(header)
+            self._changed_headers[header] = entry is None or not os.path.isfile(header) \
+                or not self.__is_same(header, entry)
+            if self._changed_headers[header]:
+                debug('header changed: ' + header)
+        return self._changed_headers[header]
+
+    # Compare file with it's saved state
+    def __is_same(self, path: str, entry: dict) -> bool:
+        st = os.stat(path)
+        if st.st_mtime == entry['mtime'] and st.st_size == entry['size'] \
+                and self._saved_at - st.st_mtime > RACY_INTERVAL:
+            return True  # not touched since it was compiled
+        if self.__get_hash(path) == entry['hash']:
+            entry['mtime'] = st.st_mtime  # touched, but not changed
+            entry['size'] = st.st_size
+            return True
+        return False
+
+    def __get_state(self, path: str) -> dict:
+        st = os.stat(path)
+        return {'mtime': st.st_mtime, 'size': st.st_size, 'hash': self.__get_hash(path)}
+
+    def __get_hash(self, source: str) -> str:
+        if source not in self._hashes:
+            self._hashes[source] = file_hash(source)
+        return self._hashes[source]
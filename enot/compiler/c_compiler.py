@@ -2,13 +2,13 @@ from os.path import join
 
 from enot.packages.config.config import ConfigFile
 
-import enot
 import os
-from pkg_resources import Requirement, resource_filename
 
 from enot.compiler.abstract import AbstractCompiler, run_cmd
-from enot.utils.file_utils import copy_file, ensure_dir
-from enot.utils.logger import debug
+from enot.compiler.nif_cache import get_nif_cache, build_key, snapshot
+from enot.utils.file_utils import copy_file, ensure_dir, resource_path
+from enot.utils.job_budget import get_budget
+from enot.utils.logger import debug, info
 
 
 class CCompiler(AbstractCompiler):
@@ -23,33 +23,60 @@ class CCompiler(AbstractCompiler):
     def src_path(self) -> str:
         return join(self.package.path, 'c_src')
 
+    @property
+    def jobs(self) -> int:  # wanted number of make jobs. Real number depends on global job budget
+        if self.package.config.c_build_jobs is not None:
+            return max(1, self.package.config.c_build_jobs)
+        return get_budget().total
+
     # TODO override unit to run cunit?
 
+    # Build c_src. If the same sources were already built with the same vars and toolchain -
+    # build results are restored from NIF cache.
     def compile(self, override_config: ConfigFile or None = None) -> bool:
         ensure_dir(self.output_path)
         ensure_makefile(self.src_path)
-        env_vars = self.__get_env_vars(override_config)
-        return run_cmd([self.executable, '-C', 'c_src'],
-                       self.project_name,
-                       self.root_path,
-                       env_vars)
-
-    def __get_env_vars(self, override_config: ConfigFile or None) -> dict:
+        build_vars = self.__get_build_vars(override_config)
         env_vars = dict(os.environ)
-        if override_config is not None and override_config.override_conf:
-            vars_to_add = override_config.c_build_vars
-        else:
-            vars_to_add = self.package.config.c_build_vars
-        for var in vars_to_add:
+        for var in build_vars:
             for k, v in var.items():
                 env_vars[k] = v
-        return env_vars
+        cache = get_nif_cache()
+        key = None
+        if cache is not None:
+            key = build_key(self.src_path, build_vars, env_vars, self.__output_layout(env_vars))
+            if cache.restore(key, self.output_path):
+                info('restore ' + self.project_name + ' nifs from cache')
+                return True
+        before = snapshot(self.output_path)
+        with get_budget().jobs(self.jobs) as jobs:
+            res = run_cmd([self.executable, '-j' + str(jobs), '-C', 'c_src'],
+                          self.project_name,
+                          self.root_path,
+                          env_vars)
+        if res and key is not None:
+            after = snapshot(self.output_path)
+            cache.store(key, self.output_path, sorted(f for f, state in after.items() if before.get(f) != state))
+        return res
+
+    # Project name and output, resolved the same way default makefile does
+    def __output_layout(self, env_vars: dict) -> dict:
+        project = env_vars.get('PROJECT', os.path.basename(os.path.normpath(self.package.path))).strip()
+        output = env_vars.get('C_SRC_OUTPUT', join(self.output_path, project + '.so'))
+        return {'name': self.project_name,
+                'PROJECT': project,
+                'C_SRC_OUTPUT': os.path.relpath(join(self.src_path, output), self.package.path)}
+
+    def __get_build_vars(self, override_config: ConfigFile or None) -> list:
+        if override_config is not None and override_config.override_conf:
+            return override_config.c_build_vars
+        return self.package.config.c_build_vars
 
 
 # copy makefile to c_src from templates, if no makefile presents
 def ensure_makefile(src_path):
     mkfile = join(src_path, 'Makefile')
     if not os.path.isfile(mkfile):
-        resource = resource_filename(Requirement.parse(enot.APPNAME), 'enot/resources/CMakefile')
+        resource = resource_path('CMakefile')
         debug('copy ' + resource + ' to ' + mkfile)
         copy_file(resource, mkfile)
@@ -0,0 +1,211 @@
+"""
+Long-living Erlang node, compiling files with compile:file/2, so there is no need to start
+a new VM for every erlc call. Nodes are started on demand and kept till enot exits.
+"""
+import atexit
+import os
+import subprocess
+import threading
+from os import listdir
+from os.path import join, isdir
+from subprocess import PIPE, STDOUT
+
+from enot.compiler.compile_server_exception import CompileServerException
+from enot.utils.logger import critical, debug, error
+
+MARKER = '__enot_compile_server__'
+
+# Every request is one line with {compile, Cwd, CodePaths, Files, Options} term.
+# Modules loaded during compilation (parse transforms, behaviours) and added code paths are removed after it,
+# so different packages can't affect each other. Result is printed after all compiler's output.
+SERVER_LOOP = '''
+MakeTerm = fun(Str) ->
+    case erl_scan:string(Str ++ ".") of
+        {ok, Ts, _} ->
+            case erl_parse:parse_term(Ts) of
+                {ok, T} -> T;
+                _ -> list_to_atom(Str)
+            end;
+        _ -> list_to_atom(Str)
+    end
+end,
+Run = fun(Cwd, Paths, Files, RawOpts) ->
+    ok = file:set_cwd(Cwd),
+    Opts = [case O of {d, N, {raw, V}} -> {d, N, MakeTerm(V)}; _ -> O end || O <- RawOpts],
+    Before = [M || {M, _} <- code:all_loaded()],
+    code:add_pathsa(Paths),
+    Res = [compile:file(F, Opts) || F <- Files],
+    [code:del_path(P) || P <- Paths],
+    LibDir = code:lib_dir(),
+    [begin code:purge(M), code:delete(M), code:purge(M) end
+     || {M, F} <- code:all_loaded(), not lists:member(M, Before), is_list(F), not lists:prefix(LibDir, F)],
+    lists:all(fun({ok, _}) -> true; ({ok, _, _}) -> true; (_) -> false end, Res)
+end,
+Loop = fun L() ->
+    case io:get_line('') of
+        eof -> halt(0);
+        Line ->
+            Result =
+                try
+                    {ok, Tokens, _} = erl_scan:string(Line),
+                    {ok, {compile, Cwd, Paths, Files, Opts}} = erl_parse:parse_term(Tokens),
+                    Run(Cwd, Paths, Files, Opts)
+                catch
+                    _:E ->
+                        io:format("~p~n", [E]),
+                        false
+                end,
+            io:format("~n~s ~p~n", [''' + '"' + MARKER + '"' + ''', Result]),
+            L()
+    end
+end,
+Loop().
+'''
+
+
+def erl_string(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def erl_atom(value: str) -> str:
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def erl_list(values: list) -> str:
+    return '[' + ', '.join(values) + ']'
+
+
+# Convert erlc arguments (as composed by EnotCompiler) to compile server request
+def erlc_to_request(args: list, cwd: str, env_vars: dict) -> str:
+    paths = []
+    files = []
+    opts = ['report_errors', 'report_warnings']
+    it = iter(args)
+    for arg in it:
+        if arg == '-I':
+            opts.append('{i, ' + erl_string(next(it)) + '}')
+        elif arg == '-o':
+            opts.append('{outdir, ' + erl_string(next(it)) + '}')
+        elif arg == '-pa':
+            paths.append(erl_string(next(it)))
+        elif arg == '-D':
+            opts.append(erl_define(next(it)))
+        elif arg.startswith('-D'):
+            opts.append(erl_define(arg[2:]))
+        else:
+            files.append(erl_string(arg))
+    for lib_dir in env_vars.get('ERL_LIBS', '').split(':'):  # code paths, erlc gets from ERL_LIBS
+        if lib_dir and isdir(lib_dir):
+            for lib in sorted(listdir(lib_dir)):
+                if isdir(join(lib_dir, lib, 'ebin')):
+                    paths.append(erl_string(join(lib_dir, lib, 'ebin')))
+    return '{compile, ' + erl_string(os.path.abspath(cwd)) + ', ' + \
+           erl_list(paths) + ', ' + erl_list(files) + ', ' + erl_list(opts) + '}.'
+
+
+def erl_define(define: str) -> str:
+    if '=' in define:
+        [name, value] = define.split('=', 1)
+        return '{d, ' + erl_atom(name) + ', {raw, ' + erl_string(value) + '}}'
+    return '{d, ' + erl_atom(define) + '}'
+
+
+class CompileServer:
+    def __init__(self, executable='erl'):
+        self._executable = executable
+        self._process = None
+
+    @property
+    def executable(self) -> str:
+        return self._executable
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        debug('start compile server')
+        try:
+            self._process = subprocess.Popen([self.executable, '-noshell', '-eval', SERVER_LOOP],
+                                             stdin=PIPE, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
+        except OSError as e:
+            raise CompileServerException('Can\'t start compile server: ' + str(e))
+
+    def stop(self):
+        if self.alive:
+            debug('stop compile server')
+            self._process.stdin.close()
+            try:
+                self._process.wait(5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+    # Compile files with the same arguments, erlc would be called.
+    # Return compilation result and compiler output.
+    def compile(self, cmd: list, path: str, env_vars: dict) -> (bool, str):
+        if not self.alive:
+            raise CompileServerException('Compile server is not running')
+        request = erlc_to_request(cmd[1:], path, env_vars)
+        debug(request)
+        try:
+            self._process.stdin.write(request + '\n')
+            self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise CompileServerException('Compile server is not available: ' + str(e))
+        output = []
+        while True:
+            line = self._process.stdout.readline()
+            if line == '':
+                raise CompileServerException('Compile server died: ' + ''.join(output))
+            if line.startswith(MARKER):
+                return line.split()[1] == 'true', ''.join(output)
+            output.append(line)
+
+
+_idle = []
+_lock = threading.Lock()
+
+
+# Take idle server or start a new one. Every thread compiles with it's own server.
+def acquire(executable='erl') -> CompileServer:
+    with _lock:
+        for server in _idle:
+            if server.executable == executable:
+                _idle.remove(server)
+                if server.alive:
+                    return server
+    server = CompileServer(executable)
+    server.start()
+    return server
+
+
+def release(server: CompileServer):
+    with _lock:
+        _idle.append(server)
+
+
+@atexit.register
+def stop_all():
+    with _lock:
+        for server in _idle:
+            server.stop()
+        del _idle[:]
+
+
+# Compile erlc command on compile server. Output is logged same way as run_cmd does.
+# Raises CompileServerException if server is not available.
+def compile_cmd(cmd: list, project: str, path: str, env_vars: dict) -> bool:
+    debug(cmd)
+    server = acquire()
+    try:
+        res, output = server.compile(cmd, path, env_vars)
+    except CompileServerException:
+        server.stop()
+        raise
+    release(server)
+    if not res:
+        critical(project + ' failed.')
+        error(output)
+    elif output.strip():
+        debug(output)
+    return res
@@ -0,0 +1,2 @@
+class CompileServerException(Exception):
+    pass
@@ -11,14 +11,16 @@ from enot.packages.package import Package
 
 def get_compiler(global_config: GlobalProperties, define: str, package: Package) -> AbstractCompiler:
     if global_config.compiler == Compiler.NATIVE:
-        return select_compiler(package.config.get_compiler(), define, package)
+        compiler = package.config.get_compiler()
     else:
-        return select_compiler(global_config.compiler, define, package)
+        compiler = global_config.compiler
+    return select_compiler(compiler, define, package, global_config.compile_jobs, global_config.compile_server)
 
 
-def select_compiler(compiler: Compiler, define: str, package: Package):
+def select_compiler(compiler: Compiler, define: str, package: Package, compile_jobs: int = 1,
+                    compile_server: bool = False):
     if compiler == Compiler.ENOT:
-        return EnotCompiler(package, define)
+        return EnotCompiler(package, define, compile_jobs=compile_jobs, compile_server=compile_server)
     if compiler == Compiler.REBAR:
         return RebarCompiler(package)  # TODO how to determine rebar3?
     if compiler == Compiler.ERLANG_MK:
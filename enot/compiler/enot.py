@@ -1,39 +1,52 @@
 import os
+import shutil
 import socket
+from concurrent.futures import ThreadPoolExecutor
 from os import listdir
 from os.path import isfile, join, isdir
 
 from jinja2 import Template
 
 from enot.compiler.abstract import AbstractCompiler, run_cmd
+from enot.compiler.build_manifest import BuildManifest, options_hash
+from enot.compiler import compile_server
 from enot.compiler.c_compiler import CCompiler
+from enot.compiler.compile_server_exception import CompileServerException
+from enot.compiler.source_scanner import SourceScanner, compilation_layers
 from enot.pac_cache import Static
 from enot.packages.config.config import ConfigFile
 from enot.utils.file_utils import ensure_dir, read_file
-from enot.utils.logger import debug, info
+from enot.utils.logger import debug, info, warning
+
+MAX_SHARD_FILES = 1000  # keep erlc command line far from ARG_MAX
 
 
 def check_extension(file: str, extension: str) -> bool:
     return isfile(file) and file.split('.')[-1] == extension
 
 
-# If parse-transform is found in file and this transform is in modules to be compiled
-# - should compile it before them.
-def parse_transform_first(first: dict, files: dict, file):
-    for line in file:
-        stripped = line.replace(' ', '')
-        if stripped.startswith('-compile([{parse_transform,'):
-            cropped = stripped[len('-compile([{parse_transform,'):]
-            [transfrom_module, _] = cropped.split('}')
-            if transfrom_module in files.keys():
-                first[transfrom_module] = files[transfrom_module]
-                break
+# Split files (module name -> dir) to shards of similar total source size.
+# Number of shards is enough to keep every shard not bigger than max_files.
+def split_to_shards(files: dict, shards: int, max_files: int = MAX_SHARD_FILES) -> list:
+    shards = min(max(shards, -(-len(files) // max_files), 1), max(len(files), 1))
+    sizes = {name: os.path.getsize(join(path, name) + '.erl') for name, path in files.items()}
+    result = [{} for _ in range(shards)]
+    loads = [0] * shards
+    for name in sorted(files, key=lambda n: (-sizes[n], n)):  # biggest first to the least loaded shard
+        candidates = [i for i in range(shards) if len(result[i]) < max_files]
+        i = min(candidates, key=lambda c: loads[c])
+        result[i][name] = files[name]
+        loads[i] += sizes[name]
+    return [shard for shard in result if shard]
 
 
 class EnotCompiler(AbstractCompiler):
-    def __init__(self, package, define: str = '', executable='erlc'):
+    def __init__(self, package, define: str = '', executable='erlc', compile_jobs: int = 1,
+                 compile_server: bool = False):
         super().__init__(package, executable)
         self._define = define
+        self._compile_jobs = compile_jobs
+        self._compile_server = compile_server
 
     @property
     def define(self) -> list:
@@ -47,23 +60,43 @@ class EnotCompiler(AbstractCompiler):
     def deps_path(self) -> str:
         return join(self.package.path, 'deps')
 
+    @property
+    def compile_jobs(self) -> int:  # package's setting is preferred over global one
+        if self.package.config.compile_jobs is not None:
+            return max(1, self.package.config.compile_jobs)
+        return max(1, self._compile_jobs)
+
+    @property
+    def compile_server(self) -> bool:  # compile with long-living erlang node instead of erlc
+        return self._compile_server
+
+    @property
+    def manifest_path(self) -> str:
+        return join(self.package.path, '.enot_manifest.json')
+
+    @property
+    def scanner(self) -> SourceScanner:
+        return SourceScanner(self.root_path, [self.include_path], self.deps_path)
+
     def compile(self, override_config: ConfigFile or None = None) -> bool:
         info('Enot build ' + self.project_name)
         self.__run_prebuild(override_config)
         all_files = self.__get_all_files(self.src_path, 'erl')
-        first_compiled = self.form_compilation_order(all_files)
         debug('ensure ' + self.output_path)
         ensure_dir(self.output_path)
         res = True
         if self.package.has_nifs:
             res = CCompiler(self.package).compile(override_config=override_config)
-        if res and first_compiled is not {}:
-            res = self.__do_compile(first_compiled, override=override_config)
-            [all_files.pop(key) for key in first_compiled if first_compiled[key] == all_files[key]]
-        if res:
-            res = self.__do_compile(all_files, override=override_config)
+        manifest = self.__load_manifest(override_config)
+        to_compile, compile_deps = self.__get_outdated(manifest, all_files)
+        for layer in self.form_compilation_order(to_compile, compile_deps):
+            if res:
+                res = self.__do_compile(layer, override=override_config)
         if res:
             self.__write_app_file(list(all_files.keys()))
+        if res and manifest is not None:
+            manifest.update(to_compile)
+            manifest.save()
         return res
 
     def common(self, log_dir: str) -> bool:  # TODO should I add override config compilation for tests?
@@ -91,19 +124,82 @@ class EnotCompiler(AbstractCompiler):
             for action in self.package.config.prebuild:
                 action.run(self.root_path)
 
-    def form_compilation_order(self, files: dict) -> dict:
+    # Split files to be compiled to layers. Parse transforms and behaviours from this package
+    # are compiled in the layer before modules, using them.
+    def form_compilation_order(self, files: dict, compile_deps: dict) -> list:
+        if not files:
+            return []
         if not self.package.config.auto_build_order:  # source analysis disabled
-            return {}
-        first = {}
-        for name, path in files.items():
-            with open(join(path, name) + '.erl', 'r', encoding='utf-8') as f:
-                parse_transform_first(first, files, f)
-        return first
+            return [files]
+        layers = compilation_layers({name: compile_deps.get(name, []) for name in files})
+        return [{name: files[name] for name in layer} for layer in layers]
+
+    # Return files to be compiled (all files without manifest) and compile time deps of all modules.
+    def __get_outdated(self, manifest: BuildManifest or None, files: dict) -> (dict, dict):
+        if manifest is None:
+            if not self.package.config.auto_build_order:
+                return files, {}
+            scanner = self.scanner
+            return files, {name: scanner.scan(join(path, name) + '.erl')['compile_deps']
+                           for name, path in files.items()}
+        manifest.drop_removed(files, self.output_path)
+        outdated = manifest.outdated(files, self.output_path, self.scanner)
+        debug(str(len(outdated)) + ' of ' + str(len(files)) + ' modules changed')
+        return outdated, manifest.compile_deps(files)
 
+    # Load build manifest if incremental build is not disabled in package's config
+    def __load_manifest(self, override: ConfigFile or None) -> BuildManifest or None:
+        if not self.package.config.incremental_build:
+            return None
+        return BuildManifest.load(self.manifest_path, options_hash(self.__build_options(override)))
+
+    # Everything, except module's own source and headers, which affects compilation result.
+    # If any of them changes - the whole package will be recompiled.
+    def __build_options(self, override: ConfigFile or None) -> list:
+        erlc = shutil.which(self.executable)
+        erlc_mtime = os.stat(erlc).st_mtime if erlc else None
+        return [self.executable, erlc, erlc_mtime,
+                self.define,
+                self.__get_macro(override),
+                os.path.exists(self.include_path),
+                self.__get_deps_state()]
+
+    # Deps are linked from local cache. Changed link means dep was changed.
+    def __get_deps_state(self) -> list:
+        if not os.path.isdir(self.deps_path):
+            return []
+        linked = []
+        for dep in listdir(self.deps_path):
+            dep_path = join(self.deps_path, dep)
+            if isdir(dep_path):
+                linked += [[dep, file, os.path.realpath(join(dep_path, file))] for file in listdir(dep_path)]
+        return sorted(linked)
+
+    # Compile files with erlc. Big sets of files are split into shards, compiled in parallel.
     def __do_compile(self, files: dict, override: ConfigFile or None = None, output=None) -> bool:
-        cmd = self.__compose_compiler_call(files, output, override)
         env_vars = self.__set_env_vars()
-        return run_cmd(cmd, self.project_name, self.root_path, env_vars)
+        shards = split_to_shards(files, self.compile_jobs)
+        if len(shards) <= 1:
+            cmd = self.__compose_compiler_call(files, output, override)
+            return self.__run_compiler(cmd, self.project_name, env_vars)
+        debug('compile ' + str(len(files)) + ' modules in ' + str(len(shards)) + ' shards')
+
+        def compile_shard(num: int) -> bool:
+            cmd = self.__compose_compiler_call(shards[num], output, override)
+            name = self.project_name + ' (shard ' + str(num + 1) + '/' + str(len(shards)) + ')'
+            return self.__run_compiler(cmd, name, env_vars)
+
+        with ThreadPoolExecutor(max_workers=self.compile_jobs) as executor:
+            return all(list(executor.map(compile_shard, range(len(shards)))))
+
+    # Run erlc command on compile server if enabled. Fall back to erlc if server is not available.
+    def __run_compiler(self, cmd: list, name: str, env_vars: dict) -> bool:
+        if self.compile_server:
+            try:
+                return compile_server.compile_cmd(cmd, name, self.root_path, env_vars)
+            except CompileServerException as e:
+                warning(str(e) + '. Fallback to ' + self.executable)
+        return run_cmd(cmd, name, self.root_path, env_vars)
 
     def __do_unit_test(self, modules: list, test_dirs: list) -> bool:  # TODO make nice output and tests result sum
         cmd = self.__compose_unit_call(modules, test_dirs)
@@ -157,12 +253,13 @@ class EnotCompiler(AbstractCompiler):
         cmd += ['-logdir', logs]
         return cmd
 
-    def __append_macro(self, cmd, override: ConfigFile or None):
+    def __get_macro(self, override: ConfigFile or None) -> list:
         if override is not None and override.override_conf:
-            build_vars = override.build_vars
-        else:
-            build_vars = self.build_vars
-        for var in build_vars:
+            return override.build_vars
+        return self.build_vars
+
+    def __append_macro(self, cmd, override: ConfigFile or None):
+        for var in self.__get_macro(override):
             if isinstance(var, dict):
                 for k, v in var.items():
                     cmd += ['-D' + k + '=' + v]  # variable with value
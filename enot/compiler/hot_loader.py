@@ -0,0 +1,105 @@
+"""
+Loads changed modules into a running Erlang node. Hidden node is started once and loads beams remotely
+with code:load_binary/3, so there is no need to start a new VM for every change.
+"""
+import os
+import subprocess
+from subprocess import PIPE, STDOUT
+
+from enot.compiler.compile_server import erl_string, erl_atom, erl_list
+from enot.utils.logger import debug, info, warning
+
+MARKER = '__enot_hot_loader__'
+
+# Every request is one line with {load, Node, Beams} term. Old code of the module is purged (as c:l/1 does).
+LOADER_LOOP = '''
+Load = fun(Node, Beam) ->
+    Module = list_to_atom(filename:basename(Beam, ".beam")),
+    {ok, Bin} = file:read_file(Beam),
+    rpc:call(Node, code, purge, [Module]),
+    {module, Module} = rpc:call(Node, code, load_binary, [Module, Beam, Bin])
+end,
+Loop = fun L() ->
+    case io:get_line('') of
+        eof -> halt(0);
+        Line ->
+            Result =
+                try
+                    {ok, Tokens, _} = erl_scan:string(Line),
+                    {ok, {load, Node, Beams}} = erl_parse:parse_term(Tokens),
+                    [Load(Node, Beam) || Beam <- Beams],
+                    true
+                catch
+                    _:E ->
+                        io:format("~p~n", [E]),
+                        false
+                end,
+            io:format("~n~s ~p~n", [''' + '"' + MARKER + '"' + ''', Result]),
+            L()
+    end
+end,
+Loop().
+'''
+
+
+class HotLoader:
+    def __init__(self, node: str, cookie: str or None = None, executable='erl'):
+        self._node = node
+        self._cookie = cookie
+        self._executable = executable
+        self._process = None
+
+    @property
+    def node(self) -> str:  # node to load modules to
+        return self._node
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        debug('start hot loader for ' + self.node)
+        host = self.node.split('@')[-1]
+        cmd = [self._executable, '-noshell', '-hidden',
+               '-name' if '.' in host else '-sname', 'enot_loader_' + str(os.getpid())]
+        if self._cookie:
+            cmd += ['-setcookie', self._cookie]
+        self._process = subprocess.Popen(cmd + ['-eval', LOADER_LOOP],
+                                         stdin=PIPE, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
+
+    def stop(self):
+        if self.alive:
+            debug('stop hot loader')
+            self._process.stdin.close()
+            try:
+                self._process.wait(5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+    # Load beams to the node. Loader is started on first use and restarted if it died.
+    def load(self, beams: list) -> bool:
+        if not beams:
+            return True
+        try:
+            if not self.alive:
+                self.start()
+            self._process.stdin.write('{load, ' + erl_atom(self.node) + ', ' +
+                                      erl_list([erl_string(os.path.abspath(beam)) for beam in beams]) + '}.\n')
+            self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            warning('Hot loader is not available: ' + str(e))
+            return False
+        output = []
+        while True:
+            line = self._process.stdout.readline()
+            if line == '':
+                warning('Hot loader died: ' + ''.join(output))
+                return False
+            if line.startswith(MARKER):
+                break
+            output.append(line)
+        if line.split()[1] != 'true':
+            warning('Can\'t load modules to ' + self.node + ': ' + ''.join(output).strip())
+            return False
+        info('loaded ' + ', '.join(sorted(os.path.basename(beam)[:-5] for beam in beams)) + ' to ' + self.node)
+        return True
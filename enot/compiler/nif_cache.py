@@ -0,0 +1,111 @@
+"""
+Cache of NIF build results. Files, produced in priv by building c_src, are stored in local cache's object store
+under a key, which depends on c_src content, c build vars, output layout, C compiler and Erlang installation.
+If key was already built - files are restored instead of running make.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from os.path import join
+
+from enot.pac_cache import Static
+from enot.pac_cache.object_store import ObjectStore
+from enot.utils.file_utils import file_hash, ensure_dir
+from enot.utils.logger import debug, warning
+from enot.utils.materialize import materialize_file, REFLINK, COPY
+
+SKIP_EXTENSIONS = ('.o', '.d', '.so', '.a', '.dll', '.dylib')  # build results, which can be in c_src
+COMPILER_ENV = ['CC', 'CXX', 'CFLAGS', 'CXXFLAGS', 'LDFLAGS', 'LDLIBS']
+
+
+# Return hash of all c_src sources, build vars, output layout and toolchain.
+# Layout is project name and output names, as default makefile names nif after package dir.
+def build_key(src_path: str, build_vars: list, env_vars: dict, layout: dict or None = None) -> str:
+    sha = hashlib.sha1()
+    for root, _, files in os.walk(src_path):
+        for file in files:
+            if not file.endswith(SKIP_EXTENSIONS):
+                path = join(root, file)
+                sha.update((os.path.relpath(path, src_path) + ':' + file_hash(path) + '\n').encode('utf-8'))
+    compiler_env = {name: env_vars[name] for name in COMPILER_ENV if name in env_vars}
+    toolchain = [binary_state(env_vars.get('CC', 'cc')),
+                 binary_state('erl'),
+                 Static.get_erlang_version()]
+    sha.update(json.dumps([sorted(json.dumps(v, sort_keys=True) for v in build_vars), compiler_env, toolchain,
+                           layout or {}],
+                          sort_keys=True).encode('utf-8'))
+    return sha.hexdigest()
+
+
+# Resolved path and mtime of executable. Changes if executable is changed or reinstalled.
+def binary_state(name: str) -> str or None:
+    executable = shutil.which(name.split(' ')[0])
+    if executable is None:
+        return None
+    executable = os.path.realpath(executable)
+    return executable + ':' + str(os.stat(executable).st_mtime)
+
+
+# Return files of dir (relative path -> (mtime, size))
+def snapshot(path: str) -> dict:
+    files = {}
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            st = os.stat(join(root, filename))
+            files[os.path.relpath(join(root, filename), path)] = (st.st_mtime, st.st_size)
+    return files
+
+
+class NifCache:
+    def __init__(self, path: str, objects: ObjectStore):
+        self._path = path
+        self._objects = objects
+
+    @property
+    def path(self) -> str:  # dir with build results manifests
+        return self._path
+
+    # Restore files of build key to output path. Return False if it was not built before.
+    def restore(self, key: str, output_path: str) -> bool:
+        try:
+            with open(join(self.path, key + '.json'), 'r') as f:
+                files = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not all(os.path.isfile(self._objects.blob_path(blob)) for blob in files.values()):
+            return False  # blobs were removed from local cache
+        for name, blob in files.items():
+            dst = join(output_path, name)
+            debug('restore ' + dst)
+            # not a hardlink, as make can rewrite it in place
+            materialize_file(self._objects.blob_path(blob), dst, (REFLINK, COPY))
+        return True
+
+    # Remember files (relative to output path), produced by build
+    def store(self, key: str, output_path: str, files: list):
+        if not files:
+            return
+        manifest = {name: self._objects.put(join(output_path, name)) for name in files}
+        try:
+            ensure_dir(self.path)
+            fd, tmp = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, sort_keys=True)
+            os.replace(tmp, join(self.path, key + '.json'))
+        except OSError as e:
+            warning('Can\'t save nif build result: ' + str(e))
+
+
+_cache = None
+
+
+def get_nif_cache() -> NifCache or None:
+    return _cache
+
+
+# Set cache of NIF build results. None disables it. Is called when global config is configured.
+def set_nif_cache(cache: NifCache or None):
+    global _cache
+    _cache = cache
@@ -1,9 +1,10 @@
+import os
 from os.path import join
 
 from enot.compiler.rebar import RebarCompiler
 from enot.packages.config.config import ConfigFile
 from enot.tool.rebar3 import Rebar3Tool
-from enot.utils.file_utils import copy_to
+from enot.utils.materialize import materialize_tree
 
 
 class Rebar3Compiler(RebarCompiler):
@@ -13,8 +14,9 @@ class Rebar3Compiler(RebarCompiler):
 
     def compile(self, override_config: ConfigFile or None = None):
         if super().compile(override_config=override_config):
-            copy_to(join(self.root_path, '_build', 'default', 'lib', self.project_name, 'ebin'),
-                    join(self.root_path, 'ebin'))
+            ebin = join(self.root_path, '_build', 'default', 'lib', self.project_name, 'ebin')
+            if os.path.exists(ebin):
+                materialize_tree(ebin, join(self.root_path, 'ebin'))
             return True
         return False
 
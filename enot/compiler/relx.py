@@ -2,15 +2,11 @@ import os
 import socket
 from os.path import join
 
-from jinja2 import Template
-from pkg_resources import Requirement, resource_filename
-
-import enot
 from enot.compiler.abstract import AbstractCompiler, run_cmd
 from enot.pac_cache import Static
 from enot.packages.config.config import ConfigFile
 from enot.tool.relxtool import RelxTool
-from enot.utils.file_utils import ensure_dir, write_file, read_file, copy_file, ensure_empty
+from enot.utils.file_utils import ensure_dir, write_file, read_file, copy_file, ensure_empty, resource_path
 from enot.utils.logger import debug
 
 
@@ -49,6 +45,7 @@ class RelxCompiler(AbstractCompiler):
         resource_path = self.__ensure_resource(resource, path)
         resource = read_file(resource_path)
         if '{{ ' in resource:
+            from jinja2 import Template  # slow to import, only needed for release templates
             params = {x: os.environ[x] for x in os.environ}
             params['app'] = self.package
             params['hostname'] = socket.gethostname()
@@ -59,12 +56,12 @@ class RelxCompiler(AbstractCompiler):
         return False, resource_path, resource
 
     def __ensure_resource(self, resource, path):
-        resource_path = join(self.package.path, path, resource)
-        if not os.path.isfile(resource_path):
-            resource = resource_filename(Requirement.parse(enot.APPNAME), join('enot/resources', resource))
-            debug('copy ' + resource + ' to ' + resource_path)
-            copy_file(resource, resource_path)
-        return resource_path
+        dst = join(self.package.path, path, resource)
+        if not os.path.isfile(dst):
+            resource = resource_path(resource)
+            debug('copy ' + resource + ' to ' + dst)
+            copy_file(resource, dst)
+        return dst
 
     # params = ['-i', '<PATH>']
     @staticmethod
@@ -0,0 +1,128 @@
+"""
+Erlang sources scanner. Finds compile time dependencies of modules: included headers,
+behaviours and parse transforms. Also finds imports.
+"""
+import os
+import re
+from os.path import join, dirname
+
+ATOM = r"'?([a-zA-Z0-9_@]+)'?"
+COMMENT = re.compile(r'%.*$', re.MULTILINE)
+INCLUDE = re.compile(r'^\s*-\s*include\s*\(\s*"([^"]+)"\s*\)', re.MULTILINE)
+INCLUDE_LIB = re.compile(r'^\s*-\s*include_lib\s*\(\s*"([^"]+)"\s*\)', re.MULTILINE)
+BEHAVIOUR = re.compile(r'^\s*-\s*behaviou?r\s*\(\s*' + ATOM + r'\s*\)', re.MULTILINE)
+COMPILE = re.compile(r'^\s*-\s*compile\s*\((.*?)\)\s*\.', re.MULTILINE | re.DOTALL)
+PARSE_TRANSFORM = re.compile(r'\{\s*parse_transform\s*,\s*' + ATOM + r'\s*\}')
+IMPORT = re.compile(r'^\s*-\s*import\s*\(\s*' + ATOM + r'\s*,', re.MULTILINE)
+
+
+# Return attributes of erlang source or header content:
+# include, include_lib (as written in source), behaviour, parse_transform and import (module names).
+def scan_content(content: str) -> dict:
+    content = COMMENT.sub('', content)
+    transforms = []
+    for options in COMPILE.findall(content):
+        transforms += PARSE_TRANSFORM.findall(options)
+    return {'include': INCLUDE.findall(content),
+            'include_lib': INCLUDE_LIB.findall(content),
+            'behaviour': BEHAVIOUR.findall(content),
+            'parse_transform': transforms,
+            'import': IMPORT.findall(content)}
+
+
+def read_source(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+# Split modules to layers, so every module is compiled after modules from it's compile_deps.
+# Modules is a dict, where keys are module names and values are lists of their compile time deps.
+# Deps, which are not in modules, are not taken into account. Modules with circular deps are compiled together.
+def compilation_layers(modules: dict) -> list:
+    left = {name: {dep for dep in deps if dep in modules and dep != name} for name, deps in modules.items()}
+    layers = []
+    while left:
+        layer = sorted(name for name, deps in left.items() if not deps)
+        if not layer:  # circular deps
+            layer = sorted(left.keys())
+        for name in layer:
+            del left[name]
+        for deps in left.values():
+            deps.difference_update(layer)
+        layers.append(layer)
+    return layers
+
+
+# Add to changed modules all modules, which depend on them in compile time (transitively).
+def with_dependants(modules: dict, changed: set) -> set:
+    dependants = {}
+    for name, deps in modules.items():
+        for dep in deps:
+            dependants.setdefault(dep, []).append(name)
+    result = set()
+    to_check = list(changed)
+    while to_check:
+        name = to_check.pop()
+        if name in result:
+            continue
+        result.add(name)
+        to_check += dependants.get(name, [])
+    return result
+
+
+class SourceScanner:
+    def __init__(self, root_path: str, include_paths: list, deps_path: str):
+        self._root_path = root_path
+        self._include_paths = include_paths
+        self._deps_path = deps_path
+        self._headers = {}  # header path -> list of headers it includes (resolved)
+
+    # Scan module's source. Return all headers it includes (transitively, resolved to paths),
+    # compile time deps (behaviours and parse transforms) and imported modules.
+    def scan(self, source: str) -> dict:
+        attrs = scan_content(read_source(source))
+        headers = []
+        for header in self.__resolve_includes(source, attrs):
+            self.__collect_headers(header, headers)
+        return {'headers': headers,
+                'compile_deps': sorted(set(attrs['behaviour'] + attrs['parse_transform'])),
+                'imports': sorted(set(attrs['import']))}
+
+    def __collect_headers(self, header: str, collected: list):
+        if header in collected:
+            return
+        collected.append(header)
+        if header not in self._headers:
+            self._headers[header] = self.__resolve_includes(header, scan_content(read_source(header)))
+        for included in self._headers[header]:
+            self.__collect_headers(included, collected)
+
+    def __resolve_includes(self, path: str, attrs: dict) -> list:
+        resolved = []
+        for include in attrs['include']:
+            found = self.__find_include(path, include)
+            if found is not None:
+                resolved.append(found)
+        for include in attrs['include_lib']:
+            found = self.__find_include(path, include) or self.__find_include_lib(include)
+            if found is not None:  # not found headers belong to erlang libraries
+                resolved.append(found)
+        return resolved
+
+    # Search for include in the same order as erlc does: including file's dir, current dir, include paths
+    def __find_include(self, path: str, include: str) -> str or None:
+        for include_dir in [dirname(path), self._root_path] + self._include_paths:
+            candidate = join(include_dir, include)
+            if os.path.isfile(candidate):
+                return os.path.normpath(candidate)
+        return None
+
+    # include_lib's first path component is an application name, which is searched in deps
+    def __find_include_lib(self, include: str) -> str or None:
+        [app, *rest] = include.split('/')
+        if not rest:
+            return None
+        candidate = join(self._deps_path, app, *rest)
+        if os.path.isfile(candidate):
+            return os.path.normpath(candidate)
+        return None
@@ -1,15 +1,23 @@
 import json
+import threading
 from os.path import join
 
 import enot
 from appdirs import *
 from jinja2 import Template
-from pkg_resources import Requirement, resource_filename
 
 from enot.compiler.compiler_type import Compiler
+from enot.compiler.nif_cache import NifCache, set_nif_cache
+from enot.pac_cache import Static
+from enot.pac_cache.cache_gc import GcPolicy
 from enot.pac_cache.cache_man import CacheMan
-from enot.utils.file_utils import read_file, ensure_dir
+from enot.packages.config.config_cache import ConfigCache, set_config_cache
+from enot.packages.config.hex_metadata import HexMetadata, HEX_TTL, set_hex_metadata
+from enot.packages.ep_format import set_compression
+from enot.utils.file_utils import read_file, ensure_dir, resource_path
+from enot.utils.job_budget import set_budget
 from enot.utils.logger import info
+from enot.utils.materialize import set_verify
 
 
 def temp_dir() -> str:  # TODO get system temp dir (os independent)
@@ -31,11 +39,15 @@ def ensure_conf_file(path: str) -> str:
         os.makedirs(path)
     config_path = join(path, 'global_config.json')
     if not os.path.exists(config_path):
-        template = resource_filename(Requirement.parse(enot.APPNAME), 'enot/resources/global_config.json')
+        template = resource_path('global_config.json')
         init_config(template, path, 'global_config.json')
     return config_path
 
 
+_configured = None  # global config, process-wide state was configured with
+_configure_lock = threading.Lock()
+
+
 class GlobalProperties:
     def __init__(self, path=user_config_dir(enot.APPNAME)):
         config_path = ensure_conf_file(path)
@@ -60,11 +72,73 @@ class GlobalProperties:
     def cache(self) -> CacheMan:
         return self._cache
 
+    @property
+    def compile_jobs(self) -> int:  # number of parallel erlc processes per package, if not set in package's config
+        return self._compile_jobs
+
+    @property
+    def compile_server(self) -> bool:  # compile with long-living erlang node instead of starting erlc every time
+        return self._compile_server
+
+    @property
+    def cache_gc(self) -> GcPolicy:  # local cache garbage collection policy
+        return self._cache_gc
+
+    @property
+    def max_jobs(self) -> int:  # total number of make jobs of all packages, built at the same time
+        return self._conf.get('max_jobs') or os.cpu_count() or 1
+
+    # Install process-wide state, set by global config (job budget, caches). Is called by every command,
+    # which parses packages, before they are parsed. State, configured with the same config, is not replaced,
+    # so builds, running in other threads, keep their budget and caches.
+    def configure(self) -> 'GlobalProperties':
+        global _configured
+        settings = json.dumps(self._conf, sort_keys=True)
+        with _configure_lock:
+            if _configured == settings:
+                return self
+            Static.pin_erlang_version(self._conf.get('erlang_version'))
+            set_budget(self.max_jobs)
+            set_verify(self._conf.get('verify_files', False))
+            set_compression(self._conf.get('package_compression'))
+            self.__set_nif_cache(self._conf)
+            self.__set_config_cache(self._conf)
+            self.__set_hex_metadata(self._conf)
+            _configured = settings
+        return self
+
     def __init_from_dict(self, conf: dict):
+        self._conf = conf
         self._temp_dir = conf['temp_dir']
+        self._compile_jobs = conf.get('compile_jobs', 1)
+        self._compile_server = conf.get('compile_server', False)
+        self._cache_gc = GcPolicy.from_dict(conf.get('cache_gc', {}))
         self.__set_compiler(conf)
         self._cache = CacheMan(conf)
 
+    # NIF build results are kept in local cache
+    def __set_nif_cache(self, conf: dict):
+        local_cache = self._cache.local_cache
+        if local_cache is None or not conf.get('nif_cache', True):
+            set_nif_cache(None)
+        else:
+            set_nif_cache(NifCache(join(local_cache.path, '.nif'), local_cache.objects))
+
+    # Parsed project configs are kept in local cache
+    def __set_config_cache(self, conf: dict):
+        local_cache = self._cache.local_cache
+        if local_cache is None or not conf.get('config_cache', True):
+            set_config_cache(None)
+        else:
+            set_config_cache(ConfigCache(join(local_cache.path, '.configs')))
+
+    # Hex packages metadata is remembered in local cache, so Hex deps are resolved without network
+    def __set_hex_metadata(self, conf: dict):
+        hex_conf = conf.get('hex', {})
+        local_cache = self._cache.local_cache
+        path = join(local_cache.path, '.remote', 'hex.json') if local_cache is not None else None
+        set_hex_metadata(HexMetadata(path, hex_conf.get('ttl', HEX_TTL), hex_conf.get('offline', False)))
+
     def __set_compiler(self, conf):
         try:
             self._compiler = Compiler(conf.get('compiler', 'enot'))
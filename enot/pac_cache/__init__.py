@@ -1,12 +1,62 @@
+import json
+import os
 import shlex
+import shutil
 import subprocess
+import tempfile
+import threading
+from os.path import join
 
-from enot.utils.logger import warning
+from appdirs import user_cache_dir
+
+import enot
+from enot.utils.logger import warning, debug
+
+ERLANG_VERSION_ENV = 'ENOT_ERLANG_VERSION'
 
 
 class Static:
+    _pinned_erlang = None  # erlang version, set in global config
+    _erlang_versions = {}  # erl binary key -> it's version, detected during this run
+    _lock = threading.Lock()
+
+    # Use this erlang version instead of detecting it. None to detect again.
+    @staticmethod
+    def pin_erlang_version(vsn: str or None):
+        Static._pinned_erlang = vsn
+
+    # Return erlang version from ENOT_ERLANG_VERSION env, global config or detect it.
+    # Detected version is remembered by erl binary path and mtime (in memory and on disk),
+    # so erl is started only once after erlang was installed or changed.
     @staticmethod
     def get_erlang_version(default_erlang=None):
+        pinned = os.environ.get(ERLANG_VERSION_ENV) or Static._pinned_erlang
+        if pinned:
+            return str(pinned)
+        erl = shutil.which('erl')
+        if erl is None:
+            warning('No erlang installed!')
+            return default_erlang
+        erl = os.path.realpath(erl)
+        key = erl + ':' + str(os.stat(erl).st_mtime)
+        with Static._lock:
+            if key not in Static._erlang_versions:
+                vsn = Static.__read_versions().get(key)
+                if vsn is None:
+                    vsn = Static.__detect_erlang_version(default_erlang)
+                    if vsn is None or vsn == default_erlang:
+                        return vsn  # not detected, try again next time
+                    Static.__save_version(key, vsn)
+                Static._erlang_versions[key] = vsn
+            return Static._erlang_versions[key]
+
+    @staticmethod
+    def versions_file() -> str:
+        return join(user_cache_dir(enot.APPNAME, enot.APPAUTHOR), 'erlang_versions.json')
+
+    @staticmethod
+    def __detect_erlang_version(default_erlang=None):
+        debug('detect erlang version')
         try:
             vsn = subprocess.check_output(
                 shlex.split("erl -eval 'erlang:display(erlang:system_info(otp_release)), halt().' -noshell"))
@@ -19,3 +69,26 @@ class Static:
             warning('No erlang installed!')
             return default_erlang
         return vsn.decode('utf-8').strip("\n\r\"")
+
+    @staticmethod
+    def __read_versions() -> dict:
+        try:
+            with open(Static.versions_file(), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Remember detected version on disk. Write is atomic, as several enot instances can run at the same time.
+    @staticmethod
+    def __save_version(key: str, vsn: str):
+        versions = Static.__read_versions()
+        versions[key] = vsn
+        path = Static.versions_file()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'w') as f:
+                json.dump(versions, f, sort_keys=True, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            warning('Can\'t save erlang version: ' + str(e))
@@ -1,9 +1,9 @@
-import tarfile
 from abc import ABCMeta, abstractmethod
 from enum import Enum
 from os.path import join
 
 from enot.pac_cache import Static
+from enot.packages import ep_format
 from enot.packages.package import Package
 from enot.utils.file_utils import ensure_empty, copy_file
 from enot.utils.logger import info
@@ -69,8 +69,7 @@ class Cache(metaclass=ABCMeta):
         enotpack = join(package.path, package.name + '.ep')
         ensure_empty(unpack_dir)
         info('Extract ' + enotpack)
-        with tarfile.open(enotpack) as pack:
-            pack.extractall(unpack_dir)
+        ep_format.extract(enotpack, unpack_dir)
         package.path = unpack_dir  # update path pointer
         copy_file(enotpack, join(unpack_dir, package.name + '.ep'))
 
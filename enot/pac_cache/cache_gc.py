@@ -0,0 +1,289 @@
+"""
+Garbage collection of local cache. Builds are removed by age of last use, by number of versions of each package
+and by total size (least recently used first). Builds, linked to known projects (with their deps) and locked in
+projects' enot_locks.json are never removed. Git mirrors are removed by age of last fetch and are counted to total size.
+Objects, not used by any build, stale temp checkouts and remote caches' metadata are removed too.
+"""
+import json
+import os
+import time
+from os.path import join
+
+from enot.pac_cache import object_store
+from enot.pac_cache.cache_index import dir_size
+from enot.pac_cache.local_cache import LocalCache
+from enot.packages.config.config_cache import ConfigCache
+from enot.utils import git_utils
+from enot.utils.file_utils import remove_dir
+from enot.utils.logger import debug, info, warning
+
+DAY = 86400
+AUTO_INTERVAL = DAY  # automatic gc is run not more often
+OBJECT_GRACE = 3600  # objects newer than this can be put by running build, their packages are not indexed yet
+STAMP_NAME = '.last_gc'
+KEEP_REMOTE = ['hex.json']  # Hex metadata is used in offline mode regardless of its age
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+class GcPolicy:
+    def __init__(self, max_size: int or None = None, max_age: int or None = None, keep_versions: int or None = None,
+                 auto=False):
+        self._max_size = max_size
+        self._max_age = max_age
+        self._keep_versions = keep_versions
+        self._auto = auto
+
+    @classmethod
+    def from_dict(cls, conf: dict) -> 'GcPolicy':
+        max_age = conf.get('max_age')
+        return cls(max_size=parse_size(conf.get('max_size')),
+                   max_age=int(max_age) * DAY if max_age is not None else None,
+                   keep_versions=conf.get('keep_versions'),
+                   auto=conf.get('auto', False))
+
+    @property
+    def max_size(self) -> int or None:  # bytes, which all builds can take
+        return self._max_size
+
+    @property
+    def max_age(self) -> int or None:  # seconds since last use, after which build is removed
+        return self._max_age
+
+    @property
+    def keep_versions(self) -> int or None:  # number of last used versions of every package to keep
+        return self._keep_versions
+
+    @property
+    def auto(self) -> bool:  # run gc after builds
+        return self._auto
+
+    # Return policy with values of other, which are set
+    def override(self, other: 'GcPolicy') -> 'GcPolicy':
+        return GcPolicy(max_size=other.max_size if other.max_size is not None else self.max_size,
+                        max_age=other.max_age if other.max_age is not None else self.max_age,
+                        keep_versions=other.keep_versions if other.keep_versions is not None else self.keep_versions,
+                        auto=self.auto)
+
+
+# Parse size in bytes or with K, M, G, T suffix
+def parse_size(size: int or str or None) -> int or None:
+    if size is None or isinstance(size, int):
+        return size
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in SIZE_SUFFIXES:
+        return int(float(size[:-1]) * SIZE_SUFFIXES[size[-1]])
+    return int(size)
+
+
+# Remove builds and git mirrors, which are out of policy. Return removed builds (index entries) and
+# mirrors ({mirror, url, size, last_used}).
+def collect(cache: LocalCache, policy: GcPolicy, dry_run=False) -> list:
+    entries = cache.index.packages()  # least recently used first
+    mirrors = list_mirrors(cache)
+    protected = referenced(cache)
+    removed = []
+    removed_builds = set()
+    removed_mirrors = []
+    now = time.time()
+
+    def remove(entry: dict) -> bool:
+        build = (entry['fullname'], entry['vsn'], entry['erlang'])
+        if build in protected or build in removed_builds:
+            return False
+        removed_builds.add(build)
+        removed.append(entry)
+        return True
+
+    if policy.max_age is not None:
+        for entry in entries:
+            if now - entry['last_used'] > policy.max_age:
+                remove(entry)
+        removed_mirrors = [mirror for mirror in mirrors if now - mirror['last_used'] > policy.max_age]
+    if policy.keep_versions is not None:
+        for versions in __group_versions(entries).values():
+            for vsn_entries in versions[policy.keep_versions:]:
+                for entry in vsn_entries:
+                    remove(entry)
+    if policy.max_size is not None:
+        total = sum(entry['size'] for entry in entries + mirrors) - \
+                sum(entry['size'] for entry in removed + removed_mirrors)
+        for entry in sorted(entries + mirrors, key=lambda e: e['last_used']):
+            if total <= policy.max_size:
+                break
+            if 'mirror' in entry:
+                if entry not in removed_mirrors:
+                    removed_mirrors.append(entry)
+                    total -= entry['size']
+            elif remove(entry):
+                total -= entry['size']
+    for entry in removed:
+        info(('would remove ' if dry_run else 'remove ') + entry['fullname'] + ':' + entry['vsn'] +
+             ' (erlang ' + entry['erlang'] + ')')
+        if not dry_run:
+            __remove_build(cache, entry)
+    for mirror in removed_mirrors:
+        info(('would remove ' if dry_run else 'remove ') + 'mirror of ' + str(mirror['url']))
+        if not dry_run:
+            remove_dir(mirror['mirror'])
+    if not dry_run:
+        __remove_objects(cache)
+        __remove_configs(cache)
+        if policy.max_age is not None:
+            __remove_stale(cache.temp_dir, policy.max_age)
+            __remove_stale(join(cache.path, '.remote'), policy.max_age, KEEP_REMOTE)
+        __touch_stamp(cache)
+    return removed + removed_mirrors
+
+
+# Run gc if it is enabled in policy and was not run recently
+def auto_collect(cache: LocalCache, policy: GcPolicy) -> list:
+    if not policy.auto:
+        return []
+    try:
+        if time.time() - os.stat(join(cache.path, STAMP_NAME)).st_mtime < AUTO_INTERVAL:
+            return []
+    except OSError:  # was never run
+        pass
+    return collect(cache, policy)
+
+
+# Return git mirrors of local cache ({mirror, url, size, last_used}), least recently fetched first.
+# Mirror's last fetch is FETCH_HEAD's mtime. Mirror, which was never updated, has only its clone time.
+def list_mirrors(cache: LocalCache) -> list:
+    if not os.path.isdir(cache.mirrors_dir):
+        return []
+    mirrors = []
+    for name in os.listdir(cache.mirrors_dir):
+        path = join(cache.mirrors_dir, name)
+        if not os.path.isdir(path):
+            continue
+        try:
+            url = git_utils.origin_url(path)
+        except ValueError:  # interrupted clone
+            url = None
+        fetch_head = join(path, 'FETCH_HEAD')
+        last_used = os.stat(fetch_head if os.path.isfile(fetch_head) else path).st_mtime
+        mirrors.append({'mirror': path, 'url': url or name, 'size': dir_size(path), 'last_used': last_used})
+    return sorted(mirrors, key=lambda mirror: mirror['last_used'])
+
+
+# Return builds (fullname, vsn, erlang), which are used by known projects or their deps, or locked by them
+def referenced(cache: LocalCache) -> set:
+    cache_path = os.path.abspath(cache.path)
+    used = set()
+    to_scan = []
+    for project in cache.index.projects():
+        if not os.path.isdir(project):
+            debug('forget removed project ' + project)
+            cache.index.remove_project(project)
+            continue
+        to_scan.append(project)
+        for fullname, lock in __read_locks(project).items():
+            for erlang in cache.index.get_erl_versions(fullname, lock):
+                used.add((fullname, lock, erlang))
+    while to_scan:
+        deps_dir = join(to_scan.pop(), 'deps')
+        if not os.path.isdir(deps_dir):
+            continue
+        for dep in os.listdir(deps_dir):
+            if not os.path.isdir(join(deps_dir, dep)):
+                continue
+            for file in os.listdir(join(deps_dir, dep)):
+                target = os.path.realpath(join(deps_dir, dep, file))
+                if not target.startswith(cache_path + os.sep):
+                    continue
+                parts = os.path.relpath(target, cache_path).split(os.sep)
+                if len(parts) < 4:
+                    continue
+                build = (join(parts[0], parts[1]), parts[2], parts[3])
+                if build not in used:
+                    used.add(build)
+                    to_scan.append(join(cache_path, *parts[:4]))  # deps of dep are also used
+    return used
+
+
+# Return versions of every package, grouped by fullname, most recently used first
+def __group_versions(entries: list) -> dict:
+    packages = {}
+    for entry in entries:
+        packages.setdefault(entry['fullname'], {}).setdefault(entry['vsn'], []).append(entry)
+    return {fullname: sorted(versions.values(), key=lambda builds: -max(b['last_used'] for b in builds))
+            for fullname, versions in packages.items()}
+
+
+def __read_locks(project: str) -> dict:
+    try:
+        with open(join(project, 'enot_locks.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def __remove_build(cache: LocalCache, entry: dict):
+    cache_path = os.path.abspath(cache.path)
+    path = join(cache_path, entry['fullname'], entry['vsn'], entry['erlang'])
+    remove_dir(path)
+    cache.index.remove(entry['fullname'], entry['vsn'], entry['erlang'])
+    parent = os.path.dirname(path)
+    while parent != cache_path and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+# Remove objects, which are not listed in manifests of cached builds and NIF build results
+def __remove_objects(cache: LocalCache):
+    used = set()
+    for entry in cache.index.packages():
+        used.update(object_store.read_manifest(join(cache.path, entry['fullname'], entry['vsn'],
+                                                    entry['erlang'])).values())
+    nif_dir = join(cache.path, '.nif')
+    if os.path.isdir(nif_dir):
+        for file in os.listdir(nif_dir):
+            try:
+                with open(join(nif_dir, file), 'r') as f:
+                    used.update(json.load(f).values())
+            except (OSError, ValueError):
+                continue
+    freed = 0
+    now = time.time()
+    for root, _, files in os.walk(cache.objects.path):
+        for file in files:
+            path = join(root, file)
+            key = os.path.basename(root) + file
+            st = os.stat(path)
+            if key not in used and now - st.st_mtime > OBJECT_GRACE:
+                os.remove(path)
+                freed += st.st_size
+    info('freed ' + str(freed) + ' bytes of unused objects')
+
+
+# Remove parsed configs of removed builds and checkouts
+def __remove_configs(cache: LocalCache):
+    removed = ConfigCache(join(cache.path, '.configs')).clean()
+    if removed:
+        debug('removed ' + str(removed) + ' parsed configs')
+
+
+# Remove files and dirs (temp checkouts, remote metadata), which were not changed for max age
+def __remove_stale(stale_dir: str, max_age: int, keep: list or None = None):
+    if not os.path.isdir(stale_dir):
+        return
+    now = time.time()
+    for name in os.listdir(stale_dir):
+        if keep and name in keep:
+            continue
+        path = join(stale_dir, name)
+        try:
+            if now - os.stat(path).st_mtime > max_age:
+                debug('remove stale ' + path)
+                if os.path.isdir(path):
+                    remove_dir(path)
+                else:
+                    os.remove(path)
+        except OSError as e:
+            warning('Can\'t remove ' + path + ': ' + str(e))
+
+
+def __touch_stamp(cache: LocalCache):
+    with open(join(cache.path, STAMP_NAME), 'w'):
+        pass
@@ -0,0 +1,177 @@
+"""
+Index of packages in local cache. Every build (fullname, version, erlang version) added to cache is recorded
+with its lock, size, last use time and package header, so lookups don't walk cache dirs.
+Projects, which builds were linked to, are recorded too, so builds used by them are known.
+Index is created from cache dirs if it is missing (cache was filled by previous Enot version).
+"""
+import json
+import os
+import sqlite3
+import tarfile
+import threading
+import time
+from os.path import join
+
+from enot.packages import ep_format
+from enot.utils.file_utils import ensure_dir
+from enot.utils.logger import info
+
+INDEX_NAME = '.index.sqlite'
+SCHEMA = '''CREATE TABLE IF NOT EXISTS packages (
+    fullname TEXT NOT NULL,
+    vsn TEXT NOT NULL,
+    erlang TEXT NOT NULL,
+    lock TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    added REAL NOT NULL,
+    last_used REAL NOT NULL,
+    metadata TEXT,
+    PRIMARY KEY (fullname, vsn, erlang));
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    last_used REAL NOT NULL)'''
+COLUMNS = ['fullname', 'vsn', 'erlang', 'lock', 'size', 'added', 'last_used', 'metadata']
+SKIP_DIRS = ['tool']  # not packages dirs in cache root. Dirs, starting with '.' are skipped too
+
+
+class CacheIndex:
+    def __init__(self, cache_path: str):
+        self._cache_path = cache_path
+        self._local = threading.local()  # sqlite connection can't be shared between threads
+        ensure_dir(cache_path)
+        created = not os.path.isfile(self.path)
+        with self.__connection() as conn:
+            conn.executescript(SCHEMA)
+        if created:
+            self.rebuild()
+
+    @property
+    def path(self) -> str:
+        return join(self._cache_path, INDEX_NAME)
+
+    def add(self, fullname: str, vsn: str, erlang: str, lock: str or None = None, size: int = 0,
+            metadata: dict or None = None):
+        now = time.time()
+        with self.__connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (fullname, vsn, erlang, lock, size, now, now, json.dumps(metadata, sort_keys=True)))
+
+    def remove(self, fullname: str, vsn: str, erlang: str):
+        with self.__connection() as conn:
+            conn.execute('DELETE FROM packages WHERE fullname = ? AND vsn = ? AND erlang = ?', (fullname, vsn, erlang))
+
+    # Check build exists. If erlang is None - check any erlang build of version.
+    def exists(self, fullname: str, vsn: str, erlang: str or None = None) -> bool:
+        if erlang is None:
+            row = self.__query_one('SELECT 1 FROM packages WHERE fullname = ? AND vsn = ?', (fullname, vsn))
+        else:
+            row = self.__query_one('SELECT 1 FROM packages WHERE fullname = ? AND vsn = ? AND erlang = ?',
+                                   (fullname, vsn, erlang))
+        return row is not None
+
+    def get(self, fullname: str, vsn: str, erlang: str) -> dict or None:
+        row = self.__query_one('SELECT * FROM packages WHERE fullname = ? AND vsn = ? AND erlang = ?',
+                               (fullname, vsn, erlang))
+        return None if row is None else CacheIndex.__to_dict(row)
+
+    def get_versions(self, fullname: str) -> list:
+        return [row[0] for row in self.__query('SELECT DISTINCT vsn FROM packages WHERE fullname = ? ORDER BY vsn',
+                                               (fullname,))]
+
+    def get_erl_versions(self, fullname: str, vsn: str) -> list:
+        return [row[0] for row in self.__query('SELECT erlang FROM packages WHERE fullname = ? AND vsn = ? '
+                                               'ORDER BY erlang', (fullname, vsn))]
+
+    # All builds, least recently used first
+    def packages(self) -> list:
+        return [CacheIndex.__to_dict(row) for row in self.__query('SELECT * FROM packages ORDER BY last_used', ())]
+
+    # Remember build was used (linked to project)
+    def touch(self, fullname: str, vsn: str, erlang: str):
+        with self.__connection() as conn:
+            conn.execute('UPDATE packages SET last_used = ? WHERE fullname = ? AND vsn = ? AND erlang = ?',
+                         (time.time(), fullname, vsn, erlang))
+
+    # Remember project, which uses cached builds
+    def add_project(self, path: str):
+        with self.__connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO projects VALUES (?, ?)', (path, time.time()))
+
+    def remove_project(self, path: str):
+        with self.__connection() as conn:
+            conn.execute('DELETE FROM projects WHERE path = ?', (path,))
+
+    def projects(self) -> list:
+        return [row[0] for row in self.__query('SELECT path FROM projects ORDER BY path', ())]
+
+    # Recreate index from cache dirs: <namespace>/<name>/<vsn>/<erlang>
+    def rebuild(self):
+        found = []
+        for fullname in CacheIndex.__list_dirs(self._cache_path, 2):
+            if fullname.split(os.sep)[0] in SKIP_DIRS:
+                continue
+            for vsn in CacheIndex.__list_dirs(join(self._cache_path, fullname), 1):
+                for erlang in CacheIndex.__list_dirs(join(self._cache_path, fullname, vsn), 1):
+                    found.append((fullname, vsn, erlang))
+        with self.__connection() as conn:
+            conn.execute('DELETE FROM packages')
+            for fullname, vsn, erlang in found:
+                package_dir = join(self._cache_path, fullname, vsn, erlang)
+                last_used = os.stat(package_dir).st_mtime
+                conn.execute('INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             (fullname, vsn, erlang, None, dir_size(package_dir), last_used, last_used,
+                              json.dumps(read_header(package_dir), sort_keys=True)))
+        if found:
+            info('indexed ' + str(len(found)) + ' packages in ' + self._cache_path)
+
+    def __query(self, sql: str, params: tuple) -> list:
+        return self.__connection().execute(sql, params).fetchall()
+
+    def __query_one(self, sql: str, params: tuple):
+        return self.__connection().execute(sql, params).fetchone()
+
+    def __connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)  # parallel builds can write at the same time
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def __to_dict(row) -> dict:
+        entry = dict(zip(COLUMNS, row))
+        entry['metadata'] = json.loads(entry['metadata']) if entry['metadata'] else None
+        return entry
+
+    # Return relative paths of dirs, which are depth levels below path
+    @staticmethod
+    def __list_dirs(path: str, depth: int) -> list:
+        dirs = ['']
+        for _ in range(depth):
+            dirs = [join(d, name) for d in dirs for name in sorted(os.listdir(join(path, d)))
+                    if not name.startswith('.') and os.path.isdir(join(path, d, name))]
+        return dirs
+
+
+# Size of files of package dir. Hardlinked files are counted once.
+def dir_size(path: str) -> int:
+    seen = set()
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            st = os.stat(join(root, file))
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                size += st.st_size
+    return size
+
+
+# Header of package, stored in cache dir. None if there is no package or it has no header.
+def read_header(path: str) -> dict or None:
+    for file in os.listdir(path):
+        if file.endswith('.ep'):
+            try:
+                return ep_format.read_header(join(path, file))
+            except (OSError, ValueError, tarfile.TarError, EOFError):
+                return None
+    return None
@@ -1,3 +1,5 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from os.path import join
 
 from enot.compiler.c_compiler import CCompiler
@@ -5,24 +7,30 @@ from enot.pac_cache import cache_factory
 from enot.pac_cache.cache import CacheType, Cache
 from enot.pac_cache.local_cache import LocalCache
 from enot.pac_cache.remote_cache import RemoteCache
-from enot.pac_cache.remote_cache_exception import RemoteCacheException
+from enot.pac_cache.remote_cache_exception import RemoteCacheException, BuildNotFound
+from enot.pac_cache.remote_metadata import RemoteMetadata, METADATA_TTL
 from enot.packages.package import Package
-from enot.utils.logger import warning
+from enot.utils.logger import warning, debug
+
+DOWNLOAD_JOBS = 4  # deps of one package, downloaded from remote cache at the same time
 
 
 class CacheMan:
     def __init__(self, conf: dict):
         self._local_cache = None
         self._caches = {}
-        for cache in conf.get('cache', []):
-            cache_type = CacheType(cache['type'])
-            cache = cache_factory.get_cache(cache_type, cache, conf['temp_dir'], conf.get('default_erlang', '20'))
+        self._fetch_locks = {}
+        self._fetch_locks_guard = threading.Lock()
+        for cache_conf in conf.get('cache', []):
+            cache_type = CacheType(cache_conf['type'])
+            cache = cache_factory.get_cache(cache_type, cache_conf, conf['temp_dir'], conf.get('default_erlang', '20'))
             if cache_type == CacheType.LOCAL and isinstance(cache, LocalCache):
                 if self._local_cache is not None:
                     raise RuntimeError('More that one local cache found in config!')
                 self._local_cache = cache
             else:
                 self.remote_caches[cache.name] = cache
+        self.__set_remote_metadata(conf)
 
     # TODO may be move temp dir property here and send to caches on all operations needed?
 
@@ -43,6 +51,7 @@ class CacheMan:
 
     # Populate dep to become a package.
     # Try to find it in local cache, then in remote, finally fetch from git.
+    # Can be called for different deps from parallel threads.
     def populate(self, dep: Package):
         if dep.url is not None and self.local_cache.exists(dep):  # local cache has this package
             path = join(self.local_cache.path, self.local_cache.get_package_path(dep))
@@ -51,7 +60,17 @@ class CacheMan:
         for cache in self.remote_caches.values():
             if self.exists_remote(cache, dep):
                 return
-        self.local_cache.fetch_package(dep)
+        with self.__fetch_lock(dep):
+            self.local_cache.fetch_package(dep)
+
+    # Ask every remote cache about deps, which are not in local cache, with one request.
+    # So missing deps are not requested one by one.
+    def check_remote(self, deps: list):
+        deps = [dep for dep in deps if dep.url is None or not self.local_cache.exists(dep)]
+        for cache in self.remote_caches.values():
+            unknown = [dep for dep in deps if cache.exists(dep)]
+            if unknown:
+                cache.check_builds(unknown)
 
     # check if local cache contains this dep
     def exists_local(self, package: Package) -> bool:
@@ -63,10 +82,20 @@ class CacheMan:
     def check_exists_local(self, fullname: str, vsn: str) -> bool:
         return self.local_cache.check_exists(join(fullname, vsn))
 
+    # Fetch dep from remote cache. Builds, which were not found, are not requested again till metadata ttl expires.
+    # Failed downloads are not remembered, as they can be transient.
     def exists_remote(self, cache: Cache, dep: Package) -> bool:
+        if not cache.exists(dep):
+            debug(dep.fullname + ':' + str(dep.git_vsn) + ' is missing in ' + cache.name)
+            return False
         try:
-            cache.fetch_package(dep)
-            self.add_fetched(cache, dep)
+            with self.__fetch_lock(dep):
+                try:
+                    cache.fetch_package(dep)
+                except BuildNotFound:
+                    cache.metadata.set_missing(dep.fullname, dep.git_vsn, cache.erlang_version)
+                    raise
+                self.add_fetched(cache, dep)
             self.__fetch_all_deps(cache, dep)
             return True
         except RemoteCacheException as e:
@@ -114,18 +143,48 @@ class CacheMan:
                 raise RuntimeError(package.name + ' native compilation error.')
         self.local_cache.add_package(package)
 
-    # Fetch all deps (if they are not already fetched to local cache)
+    # Fetch all deps (if they are not already fetched to local cache).
+    # Deps of one package are checked with one request and downloaded in parallel.
     def __fetch_all_deps(self, cache: Cache, package: Package):
-        for dep in package.deps:
-            if not self.local_cache.exists(dep):
-                if cache.exists(dep):
-                    cache.fetch_package(dep)
-                    self.add_fetched(cache, dep)
-                    self.__fetch_all_deps(cache, dep)
-                else:
-                    warning('Dep ' + dep.name + ' not found in ' + cache.name)
-                    self.__obtain_missing_dep(cache, dep)
-                    self.__fetch_all_deps(cache, dep)
+        missing = [dep for dep in package.deps if not self.local_cache.exists(dep)]
+        if not missing:
+            return
+        cache.check_builds(missing)
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_JOBS) as executor:
+            fetched = list(executor.map(lambda dep: self.__fetch_dep(cache, dep), missing))  # reraise fetch errors
+        for dep in [dep for dep, was_fetched in zip(missing, fetched) if was_fetched]:
+            self.__fetch_all_deps(cache, dep)
+
+    # Return False, if dep was fetched by other package's thread
+    def __fetch_dep(self, cache: Cache, dep: Package) -> bool:
+        with self.__fetch_lock(dep):  # same dep can be fetched by other package's thread
+            if self.local_cache.exists(dep):
+                return False
+            if cache.exists(dep):
+                cache.fetch_package(dep)
+                self.add_fetched(cache, dep)
+            else:
+                warning('Dep ' + dep.name + ' not found in ' + cache.name)
+                self.__obtain_missing_dep(cache, dep)
+        return True
+
+    # Remote caches' metadata is stored in local cache. It's ttl is set in cache's config.
+    def __set_remote_metadata(self, conf: dict):
+        if self.local_cache is None:
+            return
+        for cache_conf in conf.get('cache', []):
+            cache = self.remote_caches.get(cache_conf['name'])
+            if cache is not None:
+                path = join(self.local_cache.path, '.remote', cache.name + '.json')
+                cache.metadata = RemoteMetadata(path, cache_conf.get('metadata_ttl', METADATA_TTL))
+
+    # Fetches of the same dep share temp paths, so only one thread can fetch it at a time.
+    # Lock is never held while fetching other deps, to be safe on circular deps.
+    def __fetch_lock(self, dep: Package) -> threading.Lock:
+        with self._fetch_locks_guard:
+            if dep.name not in self._fetch_locks:
+                self._fetch_locks[dep.name] = threading.Lock()
+            return self._fetch_locks[dep.name]
 
     # search for missing dep in other remote caches. If nothing found - fetch, build and add it manually
     def __obtain_missing_dep(self, not_found_cache: Cache, dep: Package):
@@ -1,10 +1,14 @@
+import hashlib
+import json
 from os.path import join
 
+from requests import RequestException
+
 from enot.pac_cache.cache import CacheType
 from enot.pac_cache.remote_cache import RemoteCache
 from enot.packages.package import Package
 from enot.utils.http_utils import download_file, post_redirect, get_redirect
-from enot.utils.logger import warning, info
+from enot.utils.logger import warning, info, debug
 
 
 class EnotCache(RemoteCache):
@@ -37,31 +41,63 @@ class EnotCache(RemoteCache):
         info('fetch erts for ' + erlang_vsn)
         return self.__download_release(erlang_vsn)
 
+    def check_builds(self, packages: list) -> dict or None:
+        url = join(self.path, 'builds')
+        body = {'builds': [{'full_name': package.fullname, 'ref': package.git_vsn, 'erl_version': self.erlang_version}
+                           for package in packages]}
+        try:
+            r = post_redirect(url, body, {'Content-type': 'application/json'})
+            json = r.json() if r.status_code == 200 else {}
+        except (RequestException, ValueError) as e:
+            debug('batch query is not available in ' + self.name + ': ' + str(e))
+            return None
+        if json.get('result') is not True:
+            debug('batch query is not supported by ' + self.name)
+            return None
+        found = {(build['full_name'], build['ref']): build['exists'] for build in json['response']}
+        self.metadata.set_missing_many([(package.fullname, package.git_vsn, self.erlang_version)
+                                        for package in packages
+                                        if not found.get((package.fullname, package.git_vsn), False)])
+        return found
+
+    # Return package's builds. They are requested from remote only if they are not known locally.
+    # Packages, which are not found, are also remembered. Error responses are not.
     def _get_versions(self, fullname, ref=None) -> [dict]:
-        url = join(self.path, 'versions')
-        data = {'full_name': fullname}
+        builds = self.metadata.get_builds(fullname)
+        if builds is None:
+            builds = self.__request_versions(fullname)
+            if builds is None:
+                return []
+            self.metadata.set_builds(fullname, builds)
         if ref is not None:
-            data['versions'] = {'ref': ref}
-        r = post_redirect(url, data, {'Content-type': 'application/json'})
+            return [build for build in builds if build['ref'] == ref]
+        return builds
+
+    # Return package's builds or None if remote answered with error
+    def __request_versions(self, fullname) -> [dict] or None:
+        url = join(self.path, 'versions')
+        r = post_redirect(url, {'full_name': fullname}, {'Content-type': 'application/json'})
         json = r.json()
         if json['result'] is not True:
             warning('Error accessing ' + url + ': ' + json['response'])
-            return []
+            return None
         return json['response']
 
+    # Partial download is kept per build, so it is not resumed with content of other version or erlang build
     def __download_package(self, name: str, fullname: str, version: str) -> str:
         url = join(self.path, 'get')
         write_path = join(self.temp_dir, name + '.ep')
-        r = post_redirect(url,
-                          {'full_name': fullname,
-                           'versions': [{'ref': version, 'erl_version': self.erlang_version}]},
-                          {'Content-type': 'application/json'})
-        download_file(r, write_path, b'No such build', 'Package ' + fullname + ':' + version + ' not found')
+        body = {'full_name': fullname, 'versions': [{'ref': version, 'erl_version': self.erlang_version}]}
+        build_key = hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+        download_file(lambda headers: post_redirect(url, body, dict(headers, **{'Content-type': 'application/json'}),
+                                                    stream=True),
+                      write_path, b'No such build', 'Package ' + fullname + ':' + version + ' not found',
+                      partial_key=build_key)
         return write_path
 
     def __download_release(self, version: str) -> str:
         url = join(self.path, 'download_erts/' + version)
         write_path = join(self.temp_dir, version + '.tar')
-        r = get_redirect(url)
-        download_file(r, write_path, b'No such erlang', 'No such erlang version: ' + version)
+        download_file(lambda headers: get_redirect(url, stream=True, headers=headers),
+                      write_path, b'No such erlang', 'No such erlang version: ' + version)
         return write_path
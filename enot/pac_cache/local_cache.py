@@ -1,19 +1,21 @@
+import hashlib
 import json
 import os
-import shutil
 import stat
+import threading
 from os import listdir
 from os.path import join
 
-from git import Repo
-from pkg_resources import Requirement, resource_filename
+from git import Repo, GitCommandError
 
-import enot
+from enot.pac_cache import object_store
 from enot.pac_cache.cache import Cache, CacheType
+from enot.pac_cache.cache_index import CacheIndex, dir_size
+from enot.pac_cache.object_store import ObjectStore
 from enot.packages.package import Package
-from enot.utils.file_utils import if_dir_exists, ensure_dir, link_if_needed, copy_file
+from enot.utils.file_utils import if_dir_exists, ensure_dir, link_if_needed, copy_file, resource_path
 from enot.utils.file_utils import remove_dir
-from enot.utils.logger import debug, info
+from enot.utils.logger import debug, info, warning
 
 
 class LocalCache(Cache):
@@ -25,13 +27,29 @@ class LocalCache(Cache):
             os.makedirs(path)
         ensure_dir(temp_dir)
         ensure_dir(self.tool_dir)
+        self._objects = ObjectStore(join(path, '.objects'))
+        self._index = CacheIndex(path)
         self._locks = {}
+        self._mirror_locks = {}
+        self._mirror_locks_guard = threading.Lock()
         self.__fill_locks()
 
     @property
     def tool_dir(self):
         return join(self.path, 'tool')
 
+    @property
+    def mirrors_dir(self):  # bare mirrors of fetched git repos
+        return join(self.path, '.git_mirrors')
+
+    @property
+    def objects(self) -> ObjectStore:  # content addressed storage of all cached packages' files
+        return self._objects
+
+    @property
+    def index(self) -> CacheIndex:  # all cached packages builds
+        return self._index
+
     @property
     def locks(self) -> dict:
         return self._locks
@@ -59,8 +77,19 @@ class LocalCache(Cache):
     def exists(self, package: Package) -> bool:
         return self.check_exists(self.get_package_path(package))
 
-    def check_exists(self, path: str) -> bool:
+    # Check namespace/name/version[/erlang_version] is in cache
+    def check_exists(self, path: str or None) -> bool:
         debug('check ' + self.path + ' ' + str(path))
+        if path is None:
+            return False
+        parts = path.split(os.sep)
+        if len(parts) == 3:  # any erlang version
+            fullname, vsn = join(parts[0], parts[1]), parts[2]
+            return any(self.__check_indexed(fullname, vsn, erlang)
+                       for erlang in self.index.get_erl_versions(fullname, vsn))
+        if len(parts) == 4:
+            fullname, vsn, erlang = LocalCache.__split_path(path)
+            return self.index.exists(fullname, vsn, erlang) and self.__check_indexed(fullname, vsn, erlang)
         return if_dir_exists(self.path, path) is not None
 
     def tool_exists(self, toolname: str) -> bool:
@@ -72,48 +101,47 @@ class LocalCache(Cache):
         info('fetch ' + temp_path)
         remove_dir(temp_path)
         vsn, need_lock = self.__get_vsn(dep)
-        hash_str = LocalCache.fetch(dep.url, vsn, temp_path)
+        hash_str = self.fetch_mirrored(dep.url, vsn, temp_path)
         dep.update_from_cache(temp_path)
         if need_lock:
             self.set_lock(dep, hash_str)
 
-    # add built package to local cache, update its path
+    # add built package to local cache, update its path.
+    # Package files are stored in object store and linked to package's cache dir.
     def add_package(self, package: Package, rewrite=False) -> bool:
         full_dir = join(self.path, self.get_package_path(package, True))
         ensure_dir(full_dir)
         info('add ' + package.fullname)
         path = package.path
-        LocalCache.__copy_data(rewrite, full_dir, path, 'ebin')
-        LocalCache.__copy_include(rewrite, full_dir, path)
+        manifest = object_store.read_manifest(full_dir)
+        self.__store_dir(manifest, rewrite, full_dir, path, 'ebin')
+        if os.path.exists(join(path, 'include')):
+            self.__store_dir(manifest, rewrite, full_dir, path, 'include')
         if package.config.with_source:
-            LocalCache.__copy_data(rewrite, full_dir, path, 'src')
+            self.__store_dir(manifest, rewrite, full_dir, path, 'src')
         if package.config.with_source and package.has_nifs:
-            LocalCache.__copy_data(rewrite, full_dir, path, 'c_src')
+            self.__store_dir(manifest, rewrite, full_dir, path, 'c_src')
         if os.path.exists(join(path, 'priv')):
-            LocalCache.__copy_data(rewrite, full_dir, path, 'priv')
+            self.__store_dir(manifest, rewrite, full_dir, path, 'priv')
         enot_package = join(path, package.name + '.ep')
         if not os.path.isfile(enot_package):
             debug('generate missing package')
             package.generate_package()
-        copy_file(join(path, 'enot_config.json'), join(full_dir, 'enot_config.json'))
-        copy_file(enot_package, join(full_dir, package.name + '.ep'))
-        resource = resource_filename(Requirement.parse(enot.APPNAME), 'enot/resources/EmptyMakefile')
-        debug('copy ' + resource + ' to ' + join(full_dir, 'Makefile'))
-        copy_file(resource, join(full_dir, 'Makefile'))
+        resource = resource_path('EmptyMakefile')
+        for src, name in [(join(path, 'enot_config.json'), 'enot_config.json'),
+                          (enot_package, package.name + '.ep'),
+                          (resource, 'Makefile')]:
+            manifest[name] = self.objects.add_file(src, join(full_dir, name))
+        object_store.write_manifest(full_dir, manifest)
+        self.__index_package(package, full_dir)
         package.path = full_dir  # update package's dir to point to cache
         return True
 
     def get_erl_versions(self, fullname: str, version: str) -> list:
-        vsn_path = join(self.path, fullname, version)
-        if not os.path.exists(vsn_path):
-            return []
-        return listdir(vsn_path)
+        return self.index.get_erl_versions(fullname, version)
 
     def get_versions(self, fullname: str) -> list:
-        name_path = join(self.path, fullname)
-        if not os.path.exists(name_path):
-            return []
-        return listdir(name_path)
+        return self.index.get_versions(fullname)
 
     def add_tool(self, toolname: str, toolpath: str):
         info('add ' + toolname)
@@ -127,14 +155,18 @@ class LocalCache(Cache):
     def link_package(self, package: Package, dest_path: str) -> bool:
         if not dest_path:
             dest_path = os.getcwd()
-        cache_path = join(self.path, self.get_package_path(package))
+        package_path = self.get_package_path(package)
+        cache_path = join(self.path, package_path)
         dep_dir = join(dest_path, 'deps', package.name)
         ensure_dir(dep_dir)
         debug('link ' + package.name)
         changed = []
         for file in listdir(cache_path):
-            if file != package.name + '.ep':
+            if file != package.name + '.ep' and file != object_store.MANIFEST_NAME:
                 changed.append(LocalCache.link(cache_path, dest_path, package.name, file))
+        self.index.touch(*LocalCache.__split_path(package_path))
+        if not os.path.abspath(dest_path).startswith(os.path.abspath(self.path) + os.sep):  # not a cached dep
+            self.index.add_project(os.path.abspath(dest_path))
         return all(changed)  # if all links were changed - it is a new version
 
     def link_tool(self, package: Package, toolname: str):
@@ -165,9 +197,33 @@ class LocalCache(Cache):
         include_dst = join(package_path, 'deps', name, dir_to_link)
         return link_if_needed(include_src, include_dst)
 
+    # Clone git repo to path via it's local bare mirror. Mirror is created on the first fetch and then
+    # updated incrementally, so only new objects are downloaded. Tags and commits, which are already
+    # in mirror, are checked out without network access. If mirror can't be used - repo is cloned directly.
+    def fetch_mirrored(self, url, rev, path) -> str:
+        mirror = join(self.mirrors_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.git')
+        try:
+            with self.__mirror_lock(url):
+                LocalCache.__update_mirror(url, rev, mirror)
+            repo = Repo.clone_from(mirror, path, shared=True)
+        except GitCommandError as e:
+            warning('Can\'t use git mirror for ' + url + ': ' + str(e))
+            remove_dir(path)
+            return LocalCache.fetch(url, rev, path)
+        repo.git.remote('set-url', 'origin', url)  # package's url is taken from origin
+        return LocalCache.checkout(repo, url, rev)
+
+    def __mirror_lock(self, url: str) -> threading.Lock:
+        with self._mirror_locks_guard:
+            return self._mirror_locks.setdefault(url, threading.Lock())
+
     @staticmethod
     def fetch(url, rev, path):
         repo = Repo.clone_from(url, path)
+        return LocalCache.checkout(repo, url, rev)
+
+    @staticmethod
+    def checkout(repo: Repo, url, rev):
         if repo.bare:
             raise RuntimeError('Empty repo ' + url)
         git = repo.git
@@ -176,18 +232,62 @@ class LocalCache(Cache):
         return repo.head.object.hexsha
 
     @staticmethod
-    def __copy_include(rewrite, full_dir, path):
-        cache_include = join(full_dir, 'include')
-        if rewrite or not os.path.exists(cache_include):
-            package_include = join(path, 'include')
-            if os.path.exists(package_include):
-                debug('copy ' + package_include + ' to' + cache_include)
-                shutil.copytree(package_include, cache_include)
+    def __update_mirror(url, rev, mirror):
+        if not os.path.isdir(mirror):
+            info('mirror ' + url)
+            temp_mirror = mirror + '.tmp'
+            remove_dir(temp_mirror)
+            Repo.clone_from(url, temp_mirror, mirror=True)
+            os.rename(temp_mirror, mirror)  # interrupted clone won't leave broken mirror
+            return
+        repo = Repo(mirror)
+        if LocalCache.__has_fixed_revision(repo, rev):
+            debug(rev + ' is already in mirror of ' + url)
+            return
+        info('update mirror ' + url)
+        repo.git.fetch('--prune', 'origin')
 
+    # Tags and commit hashes are not changed, so there is no need to update mirror if it has them.
+    # Branches are always updated.
     @staticmethod
-    def __copy_data(rewrite, full_dir, path, source_dir):
+    def __has_fixed_revision(repo: Repo, rev) -> bool:
+        for ref in ['refs/tags/' + rev, rev + '^{commit}']:
+            try:
+                found = repo.git.rev_parse('--verify', '--quiet', ref)
+            except GitCommandError:
+                continue
+            if ref.startswith('refs/tags/') or found.startswith(rev):
+                return True
+        return False
+
+    # Record package build in index
+    def __index_package(self, package: Package, full_dir: str):
+        fullname, vsn, erlang = LocalCache.__split_path(os.path.relpath(full_dir, self.path))
+        self.index.add(fullname, vsn, erlang,
+                       lock=None if package.git_tag else self.get_lock(package.fullname),
+                       size=dir_size(full_dir),
+                       metadata=package.header())
+
+    # Indexed build dir can be removed by hand or by interrupted add_package. Such build is dropped from index.
+    def __check_indexed(self, fullname: str, vsn: str, erlang: str) -> bool:
+        if os.path.isdir(join(self.path, fullname, vsn, erlang)):
+            return True
+        warning(join(fullname, vsn, erlang) + ' is indexed, but missing in ' + self.path)
+        self.index.remove(fullname, vsn, erlang)
+        return False
+
+    # Split namespace/name/version/erlang_version cache path
+    @staticmethod
+    def __split_path(path: str) -> (str, str, str):
+        namespace, name, vsn, erlang = path.split(os.sep)
+        return join(namespace, name), vsn, erlang
+
+    # Store package's dir in object store and link it's files to cache dir, if it should be (re)written.
+    def __store_dir(self, manifest: dict, rewrite: bool, full_dir: str, path: str, source_dir: str):
         cache_src = join(full_dir, source_dir)
         if rewrite or not os.path.exists(cache_src):
-            package_src = join(path, source_dir)
-            debug('copy ' + package_src + ' to ' + cache_src)
-            shutil.copytree(package_src, cache_src)
+            files = self.objects.add_dir(join(path, source_dir), cache_src)
+            for name in [name for name in manifest if name.startswith(source_dir + '/')]:
+                del manifest[name]
+            for name, key in files.items():
+                manifest[join(source_dir, name)] = key
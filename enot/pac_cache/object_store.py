@@ -0,0 +1,86 @@
+"""
+Content addressed storage of package files in local cache.
+Every file is stored once as a blob, named by it's content hash. Package dirs in cache
+consist of hardlinks to these blobs, so same files of different versions or erlang releases
+take disk space only once. Files of every package are listed in it's objects manifest.
+"""
+import json
+import os
+import stat
+import tempfile
+from os.path import join
+
+from enot.utils.file_utils import file_hash, ensure_dir, remove_dir
+from enot.utils.logger import debug
+from enot.utils.materialize import materialize_file, REFLINK, HARDLINK, COPY
+
+MANIFEST_NAME = '.enot_objects.json'
+
+
+class ObjectStore:
+    def __init__(self, path: str):
+        self._path = path
+        ensure_dir(path)
+
+    @property
+    def path(self) -> str:  # objects root dir
+        return self._path
+
+    # Return blob path by it's key
+    def blob_path(self, key: str) -> str:
+        return join(self.path, key[:2], key[2:])
+
+    # Put file to store (if it is not there already). Return blob key.
+    # Executable flag is a part of the key, as blobs are shared via hardlinks.
+    def put(self, path: str) -> str:
+        executable = os.stat(path).st_mode & stat.S_IXUSR
+        key = file_hash(path) + ('x' if executable else '')
+        blob = self.blob_path(key)
+        if not os.path.isfile(blob):
+            ensure_dir(os.path.dirname(blob))
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob))
+            os.close(fd)
+            materialize_file(path, tmp, (REFLINK, COPY))  # not a hardlink, as blob's mode is changed
+            mode = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH  # blobs are never changed
+            os.chmod(tmp, mode | (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH if executable else 0))
+            os.replace(tmp, blob)  # atomic, parallel builds may put the same file
+        return key
+
+    # Place blob to dst. Hardlink is used if possible, as blobs are never changed.
+    def materialize(self, key: str, dst: str):
+        materialize_file(self.blob_path(key), dst, (HARDLINK, REFLINK, COPY))
+
+    # Store all files from src dir and recreate it in dst dir of links to blobs.
+    # Return dir's manifest: relative file path -> blob key.
+    def add_dir(self, src: str, dst: str) -> dict:
+        debug('store ' + src + ' to ' + dst)
+        remove_dir(dst)
+        ensure_dir(dst)
+        files = {}
+        for root, _, filenames in os.walk(src, followlinks=True):
+            for filename in filenames:
+                rel = os.path.relpath(join(root, filename), src)
+                files[rel] = self.put(join(root, filename))
+                self.materialize(files[rel], join(dst, rel))
+        return files
+
+    # Store file and replace dst with link to it. Return blob key.
+    def add_file(self, src: str, dst: str) -> str:
+        debug('store ' + src + ' to ' + dst)
+        key = self.put(src)
+        self.materialize(key, dst)
+        return key
+
+
+# Read package's objects manifest. Return empty one, if it is missing or broken.
+def read_manifest(package_dir: str) -> dict:
+    try:
+        with open(join(package_dir, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(package_dir: str, manifest: dict):
+    with open(join(package_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, sort_keys=True, indent=2)
@@ -1,16 +1,34 @@
 from abc import abstractmethod
 
-from enot.pac_cache.cache import Cache
+from enot.pac_cache.cache import Cache, CacheType
+from enot.pac_cache.remote_metadata import RemoteMetadata
 from enot.packages.package import Package
 
 
 class RemoteCache(Cache):
+    def __init__(self, name, temp_dir, path, default_erlang: str, cache_type: CacheType):
+        super().__init__(name, temp_dir, path, default_erlang, cache_type)
+        self._metadata = RemoteMetadata()
+
+    @property
+    def metadata(self) -> RemoteMetadata:  # locally remembered versions and missing builds
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, metadata: RemoteMetadata):
+        self._metadata = metadata
+
     @abstractmethod
     def fetch_package(self, package: Package):
         pass
 
     def exists(self, package: Package) -> bool:
-        return True
+        return not self.metadata.is_missing(package.fullname, package.git_vsn, self.erlang_version)
+
+    # Check which builds of packages exist in this cache with one request. Missing builds are remembered
+    # in metadata. Return dict (fullname, ref) -> exists or None, if batch queries are not supported.
+    def check_builds(self, packages: list) -> dict or None:
+        return None
 
     @abstractmethod
     def add_package(self, package: Package, rewrite=True) -> bool:
@@ -1,2 +1,7 @@
 class RemoteCacheException(Exception):
     pass
+
+
+# Remote cache answered, that it has no such build. Other exceptions can be transient.
+class BuildNotFound(RemoteCacheException):
+    pass
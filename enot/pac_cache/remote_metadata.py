@@ -0,0 +1,103 @@
+"""
+Remote cache's metadata, remembered locally: package versions with their erlang builds and
+builds, which were not found. Entries older than ttl are ignored, so remote is asked again.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from enot.utils.logger import debug, warning
+
+METADATA_TTL = 3600  # seconds
+
+
+class RemoteMetadata:
+    def __init__(self, path: str or None = None, ttl: int = 0):
+        self._path = path
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._data = self.__load()
+
+    @property
+    def path(self) -> str or None:  # file, where metadata is persisted. None - keep in memory only
+        return self._path
+
+    @property
+    def ttl(self) -> int:  # seconds while metadata is actual. 0 - don't remember anything
+        return self._ttl
+
+    # Return list of package builds ({ref, erl_version}) or None if they are unknown or outdated
+    def get_builds(self, fullname: str) -> list or None:
+        with self._lock:
+            entry = self._data['versions'].get(fullname)
+            if entry is None or not self.__is_actual(entry['checked_at']):
+                return None
+            return entry['builds']
+
+    def set_builds(self, fullname: str, builds: list):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data['versions'][fullname] = {'checked_at': time.time(), 'builds': builds}
+            for build in builds:
+                self._data['missing'].pop(self.__key(fullname, build['ref'], build['erl_version']), None)
+            self.__save()
+
+    # Build is missing if it wasn't found recently, or it is not in recently fetched package's builds
+    def is_missing(self, fullname: str, ref: str, erl_version: str) -> bool:
+        with self._lock:
+            checked_at = self._data['missing'].get(self.__key(fullname, ref, erl_version))
+            if checked_at is not None and self.__is_actual(checked_at):
+                return True
+            entry = self._data['versions'].get(fullname)
+        if entry is not None and self.__is_actual(entry['checked_at']):
+            return not any(b['ref'] == ref and b['erl_version'] == erl_version for b in entry['builds'])
+        return False
+
+    def set_missing(self, fullname: str, ref: str, erl_version: str):
+        self.set_missing_many([(fullname, ref, erl_version)])
+
+    # Remember missing builds (fullname, ref, erl_version) with one save
+    def set_missing_many(self, builds: list):
+        if self.ttl <= 0 or not builds:
+            return
+        now = time.time()
+        with self._lock:
+            for fullname, ref, erl_version in builds:
+                debug(fullname + ':' + str(ref) + ' for erlang ' + str(erl_version) + ' is missing')
+                self._data['missing'][self.__key(fullname, ref, erl_version)] = now
+            self.__save()
+
+    def __is_actual(self, checked_at: float) -> bool:
+        return time.time() - checked_at < self.ttl
+
+    def __load(self) -> dict:
+        data = {}
+        if self.path is not None and self.ttl > 0:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {'versions': data.get('versions', {}), 'missing': data.get('missing', {})}
+
+    # Drop outdated entries and write atomically, as several enot instances can use the same cache
+    def __save(self):
+        if self.path is None:
+            return
+        self._data['versions'] = {k: v for k, v in self._data['versions'].items() if self.__is_actual(v['checked_at'])}
+        self._data['missing'] = {k: v for k, v in self._data['missing'].items() if self.__is_actual(v)}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._data, f, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            warning('Can\'t save remote cache metadata: ' + str(e))
+
+    @staticmethod
+    def __key(fullname: str, ref: str, erl_version: str) -> str:
+        return fullname + ':' + str(ref) + ':' + str(erl_version)
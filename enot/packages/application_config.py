@@ -3,7 +3,6 @@ Application config .app.src or .app
 """
 from logging import warning
 from os.path import join
-from tarfile import TarFile
 
 from enot.utils.erl_file_utils import parse_app_config, contains_app_file, parse_app_config_content
 
@@ -31,12 +30,22 @@ class AppConfig:
         return None
 
     @classmethod
-    def from_package(cls, file: str, package: TarFile, compose=False):
-        f = package.extractfile(file)
-        (name, vsn, apps, is_template) = parse_app_config_content(f.read())
+    def from_package(cls, content: bytes, compose=False):  # app file content, read from package
+        (name, vsn, apps, is_template) = parse_app_config_content(content.decode('utf-8'))
         # when calling from content - project was already built. No need to compose app file.
         return cls(name, vsn, apps, is_template, compose=compose)
 
+    @classmethod
+    # App config from package header. Package was already built, so app file is not composed.
+    def from_header(cls, header: dict) -> 'AppConfig' or None:
+        app = header.get('app')
+        if app is None:
+            return None
+        return cls(app['name'], app['vsn'], app['applications'], False, compose=False)
+
+    def export(self) -> dict:
+        return {'name': self.name, 'vsn': self.vsn, 'applications': self.applications}
+
     @property
     def name(self) -> str:
         return self._name
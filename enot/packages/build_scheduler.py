@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from enot.utils.logger import debug
+
+
+# Sort dependency graph topologically. Graph is a dict, where keys are package names
+# and values are the names of packages they depend on. Deps, which are not graph keys, are skipped.
+# Raises RuntimeError on dependency cycle.
+def topological_order(graph: dict) -> list:
+    order = []
+    state = {}  # name -> False (visiting) / True (visited)
+
+    def visit(name, path):
+        if state.get(name) is True:
+            return
+        if state.get(name) is False:
+            raise RuntimeError('Dependency cycle: ' + ' -> '.join(path + [name]))
+        state[name] = False
+        for dep in graph[name]:
+            if dep in graph:
+                visit(dep, path + [name])
+        state[name] = True
+        order.append(name)
+
+    for name in sorted(graph):
+        visit(name, [])
+    return order
+
+
+class BuildScheduler:
+    """
+    Runs build function for every package of dependency graph on a bounded pool of workers.
+    Package is submitted only after all it's deps were built successfully.
+    """
+
+    def __init__(self, jobs: int = 1):
+        self._jobs = max(1, jobs)
+
+    @property
+    def jobs(self) -> int:  # maximum number of packages built at the same time
+        return self._jobs
+
+    # Graph is a dict, where keys are package names and values are lists of deps names.
+    # Deps, which are not graph keys, are treated as already built.
+    # build_fun gets package name and returns True on success.
+    # Raises RuntimeError on the first failed build (already running builds are waited for).
+    def run(self, graph: dict, build_fun) -> bool:
+        order = topological_order(graph)  # check for cycles before building anything
+        waiting = {name: {dep for dep in graph[name] if dep in graph} for name in order}
+        dependants = {name: [] for name in order}
+        for name, deps in waiting.items():
+            for dep in deps:
+                dependants[dep].append(name)
+        ready = [name for name in order if not waiting[name]]
+        failed = None
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            running = {}
+            while ready or running:
+                while ready and failed is None:
+                    name = ready.pop(0)
+                    debug('schedule build of ' + name)
+                    running[executor.submit(build_fun, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if not future.result():
+                        failed = failed or name
+                        continue
+                    for dependant in dependants[name]:
+                        waiting[dependant].discard(name)
+                        if not waiting[dependant]:
+                            ready.append(dependant)
+        if failed is not None:
+            raise RuntimeError('Can\'t built dep ' + failed)
+        return True
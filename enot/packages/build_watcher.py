@@ -0,0 +1,114 @@
+"""
+Watch mode. Project is populated and built once, then it's sources, headers, configuration and deps are watched.
+Changed modules are recompiled incrementally with the same Builder, so global configuration, caches and
+resolved deps tree are not loaded again. Only configuration or deps changes reload the project.
+Recompiled modules can be hot loaded to a running node.
+"""
+import os
+import time
+from os.path import join
+
+from enot.compiler.hot_loader import HotLoader
+from enot.packages.package import Package
+from enot.packages.package_builder import Builder
+from enot.utils.file_watcher import create_watcher
+from enot.utils.logger import info, error
+
+SOURCE_DIRS = ['src', 'include', 'c_src']
+CONFIG_FILES = ['enot_config.json', 'rebar.config']  # changes require project reload
+
+
+class BuildWatcher:
+    def __init__(self, builder: Builder, define: str = '', jobs: int = 1, loader: HotLoader or None = None):
+        self._builder = builder
+        self._define = define
+        self._jobs = jobs
+        self._loader = loader
+        self._watcher = None
+
+    @property
+    def builder(self) -> Builder:  # builder of current project state
+        return self._builder
+
+    @property
+    def path(self) -> str:
+        return self.builder.project.path
+
+    @property
+    def watched_paths(self) -> list:
+        return [join(self.path, d) for d in SOURCE_DIRS] + \
+               [join(self.path, f) for f in CONFIG_FILES] + \
+               [join(self.path, 'deps')]
+
+    # Build project and rebuild it on every change till interrupted
+    def run(self) -> bool:
+        self.start()
+        info('watching ' + self.path + ' for changes, press Ctrl+C to stop')
+        try:
+            while True:
+                changed = self._watcher.wait()
+                try:
+                    self.rebuild(changed)
+                except Exception as e:  # broken config or dep - keep watching, till it is fixed
+                    error('Rebuild failed: ' + str(e))
+        except KeyboardInterrupt:
+            info('stop watching')
+        finally:
+            self.stop()
+        return True
+
+    # Populate and build whole project, start watching it
+    def start(self) -> bool:
+        res = self.__build()
+        self._watcher = create_watcher(self.watched_paths)
+        return res
+
+    def stop(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        if self._loader is not None:
+            self._loader.stop()
+
+    # Rebuild project after changes. Project is reloaded if it's configuration or deps were changed.
+    def rebuild(self, changed: set) -> bool:
+        if not changed:
+            return True
+        started = time.time()
+        beams = self.__beams()
+        if self.needs_reload(changed):
+            info('configuration or deps changed, reload ' + self.path)
+            self._builder = Builder(self.path, Package.from_path(self.path), self.builder.system_config)
+            res = self.__build()
+        else:
+            res = self.builder.compile()  # only changed modules are compiled
+        if res and self._loader is not None:
+            self._loader.load(sorted(beam for beam, state in self.__beams().items() if beams.get(beam) != state))
+        if self._watcher is not None:
+            self._watcher.drain()  # forget changes, made by build itself
+        info(('rebuilt' if res else 'build failed') + ' in ' + '{0:.2f}'.format(time.time() - started) + 's')
+        return res
+
+    def needs_reload(self, changed: set) -> bool:
+        deps_dir = join(self.path, 'deps')
+        for path in changed:
+            if path in [join(self.path, f) for f in CONFIG_FILES] or path.endswith('.app.src') \
+                    or path == deps_dir or path.startswith(deps_dir + os.sep):
+                return True
+        return False
+
+    def __build(self) -> bool:
+        self.builder.populate(jobs=self._jobs)
+        return self.builder.build(self._define, self._jobs)
+
+    # State of project's beams: path -> (mtime, size)
+    def __beams(self) -> dict:
+        ebin = join(self.path, 'ebin')
+        if not os.path.isdir(ebin):
+            return {}
+        beams = {}
+        for file in os.listdir(ebin):
+            if file.endswith('.beam'):
+                st = os.stat(join(ebin, file))
+                beams[join(ebin, file)] = (st.st_mtime, st.st_size)
+        return beams
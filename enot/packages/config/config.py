@@ -1,35 +1,43 @@
-import json
 from abc import ABCMeta, abstractmethod
 from os.path import join
-from urllib import request
 
 from enot.compiler.compiler_type import Compiler
+from enot.packages.config.hex_metadata import get_hex_metadata
 from enot.packages.dep import Dep
 from enot.utils.file_utils import write_file
+from enot.utils.logger import debug
 
 """
 Project config file. Can be rebar.config (Rebar1-3), config in Makefile (erlang.mk) or enot_config.json (enot)
 """
 
+HEX_API = 'https://hex.pm/api/packages/'
+
 
 def write_package_config(path, package_config):
     write_file(join(path, 'enot_config.json'), package_config)
 
 
 def request_hex_info(name: str) -> dict:
-    package = request.urlopen('https://hex.pm/api/packages/' + name)
-    return json.loads(package.read().decode())
+    from enot.utils.http_utils import get_session, TIMEOUT  # requests is slow to import
+    debug('request Hex package ' + name)
+    resp = get_session().get(HEX_API + name, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
 
 
+# Hex package is resolved to it's GitHub repository. Package metadata is remembered locally.
 def get_dep_info_from_hex(name: str, tag: str) -> Dep:
-    parsed = request_hex_info(name)
-    meta = parsed['meta']
-    links = meta['links']
-    links_lower = {k.lower(): v for k, v in links.items()}  # sometimes Hex have GitHub and sometimes Github it response
-    url = links_lower['github']
+    url = get_hex_metadata().get(name, request_hex_info)['url']
     return Dep(url, None, tag=tag)
 
 
+# Request all Hex packages of config in parallel, before resolving them one by one
+def prefetch_hex(names: list):
+    if names:
+        get_hex_metadata().prefetch(names, request_hex_info)
+
+
 class ConfigFile(metaclass=ABCMeta):
     def __init__(self):
         self._prebuild = []
@@ -47,6 +55,9 @@ class ConfigFile(metaclass=ABCMeta):
         self._rescan_deps = True
         self._fullname = None
         self._auto_build_order = True
+        self._incremental_build = True
+        self._compile_jobs = None
+        self._c_build_jobs = None
         self._override_conf = False
         self._disable_prebuild = False
         self._erlang_versions = []
@@ -94,6 +105,18 @@ class ConfigFile(metaclass=ABCMeta):
     def auto_build_order(self) -> bool:  # should analyse sources during compilation
         return self._auto_build_order
 
+    @property
+    def incremental_build(self) -> bool:  # should compile only changed modules
+        return self._incremental_build
+
+    @property
+    def compile_jobs(self) -> int or None:  # number of parallel erlc processes. None - use global setting
+        return self._compile_jobs
+
+    @property
+    def c_build_jobs(self) -> int or None:  # number of make jobs for c_src. None - as much as global budget allows
+        return self._c_build_jobs
+
     @property
     def override_conf(self) -> bool:  # should override deps configuration
         return self._override_conf
@@ -177,12 +200,17 @@ class ConfigFile(metaclass=ABCMeta):
     def export(self) -> dict:
         export = {'with_source': self.with_source,
                   'auto_build_order': self.auto_build_order,
+                  'incremental_build': self.incremental_build,
                   'override': self.override_conf,
                   'disable_prebuild': self.disable_prebuild}
         if self.build_vars:
             export['build_vars'] = self.build_vars
         if self.c_build_vars:
             export['c_build_vars'] = self.c_build_vars
+        if self.compile_jobs is not None:
+            export['compile_jobs'] = self.compile_jobs
+        if self.c_build_jobs is not None:
+            export['c_build_jobs'] = self.c_build_jobs
         if self.prebuild:
             prebuild = [pb.export() for pb in self.prebuild]
             export['prebuild'] = prebuild
@@ -0,0 +1,108 @@
+"""
+Cache of parsed project configs. rebar.config, erlang.mk Makefile and enot_config.json are parsed on every build
+for the project and for every dep. Parse results are kept in local cache and are reused while config file's
+size and mtime are the same. If only mtime was changed - file's content hash is compared.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from os.path import join
+
+from enot.utils.file_utils import ensure_dir, file_hash
+from enot.utils.logger import debug
+
+CACHE_VERSION = 1  # change it with parsers, so results of old parsers are not used
+RACY_INTERVAL = 2  # seconds. Files modified so close to result write are always rehashed.
+
+
+class ConfigCache:
+    def __init__(self, path: str):
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    # Return parse result of file. Parser is called only if file was changed since it was parsed last time.
+    # Kind separates results of different parsers of the same file.
+    def read(self, file: str, kind: str, parser):
+        file = os.path.abspath(file)
+        entry_path = join(self.path, hashlib.sha1((kind + ':' + file).encode('utf-8')).hexdigest())
+        st = os.stat(file)
+        entry = self.__load(entry_path, file)
+        if entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime \
+                and entry['saved_at'] - st.st_mtime > RACY_INTERVAL:
+            return entry['value']
+        content_hash = file_hash(file)
+        if entry is not None and entry['hash'] == content_hash:  # touched, but not changed
+            self.__save(entry_path, file, st, content_hash, entry['value'])
+            return entry['value']
+        debug('parse ' + file)
+        value = parser(file)
+        self.__save(entry_path, file, st, content_hash, value)
+        return value
+
+    # Remove parse results of files, which don't exist anymore. Return number of removed results.
+    def clean(self) -> int:
+        if not os.path.isdir(self.path):
+            return 0
+        removed = 0
+        for name in os.listdir(self.path):
+            entry_path = join(self.path, name)
+            entry = self.__load(entry_path, None)
+            if entry is None or not os.path.isfile(entry['file']):
+                os.remove(entry_path)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def __load(entry_path: str, file: str or None) -> dict or None:  # file None - any file
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError, AttributeError, ImportError, pickle.UnpicklingError):
+            return None
+        if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION \
+                or file is not None and entry.get('file') != file:
+            return None
+        return entry
+
+    # Parse result is written to temp file and renamed, so parallel builds never read half-written results
+    def __save(self, entry_path: str, file: str, st: os.stat_result, content_hash: str, value):
+        entry = {'version': CACHE_VERSION,
+                 'file': file,
+                 'size': st.st_size,
+                 'mtime': st.st_mtime,
+                 'hash': content_hash,
+                 'saved_at': time.time(),
+                 'value': value}
+        tmp_path = entry_path + '.' + str(os.getpid()) + '.' + str(threading.get_ident())
+        try:
+            ensure_dir(self.path)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except (OSError, pickle.PicklingError) as e:
+            debug('Can\'t cache parsed ' + file + ': ' + str(e))
+
+
+_cache = None
+
+
+def get_config_cache() -> ConfigCache or None:
+    return _cache
+
+
+# Set cache of parsed configs. None disables it. Is called when global config is configured.
+def set_config_cache(cache: ConfigCache or None):
+    global _cache
+    _cache = cache
+
+
+# Parse config file with parser. Cached result is used if cache is set and file was not changed.
+def read_config(file: str, kind: str, parser):
+    if _cache is None:
+        return parser(file)
+    return _cache.read(file, kind, parser)
@@ -1,16 +1,21 @@
 import json
 from os.path import join
-from tarfile import TarFile
 
 from enot.action import action_factory
 from enot.action.release import Release
 from enot.compiler.compiler_type import Compiler
-from enot.packages.config.config import ConfigFile, get_dep_info_from_hex
+from enot.packages.config.config import ConfigFile, get_dep_info_from_hex, prefetch_hex
+from enot.packages.config.config_cache import read_config
 from enot.packages.dep import Dep
 from enot.utils.file_utils import read_file
 
 
+def read_json(file: str) -> dict:
+    return json.loads(read_file(file))
+
+
 def parse_deps(deps: list) -> dict:
+    prefetch_hex([dep['name'] for dep in deps if 'url' not in dep])
     found = {}
     for dep in deps:
         name = dep['name']
@@ -38,6 +43,9 @@ class EnotConfig(ConfigFile):
         self._url = config.get('url', url)
         self._erlang_versions = config.get('erlang', [])
         self._auto_build_order = config.get('auto_build_order', True)
+        self._incremental_build = config.get('incremental_build', True)
+        self._compile_jobs = config.get('compile_jobs', None)
+        self._c_build_jobs = config.get('c_build_jobs', None)
         self._override_conf = config.get('override', False)
         self._disable_prebuild = config.get('disable_prebuild', False)
         self._fullname = config.get('fullname', None)
@@ -56,14 +64,12 @@ class EnotConfig(ConfigFile):
 
     @classmethod
     def from_path(cls, path: str, url=None) -> 'EnotConfig':
-        content = read_file(join(path, 'enot_config.json'))
+        config = read_config(join(path, 'enot_config.json'), 'enot', read_json)
         name = path.split('/')[-1:]  # use project dir name as a name if not set in config
-        return cls(json.loads(content), url=url, name=name)
+        return cls(config, url=url, name=name)
 
     @classmethod
-    def from_package(cls, package: TarFile, url: str, config: ConfigFile) -> 'EnotConfig':
-        f = package.extractfile('enot_config.json')
-        content = f.read()
+    def from_package(cls, content: bytes, url: str, config: ConfigFile) -> 'EnotConfig':  # enot_config.json content
         conf = cls(json.loads(content.decode('utf-8')), url=url)
         if config is not None:
             if config.fullname:  # overwrite fullname by package's fullname (from dep.config).
@@ -1,9 +1,9 @@
 import re
-from distutils.sysconfig import parse_makefile
 from os.path import join
 
 from enot.compiler.compiler_type import Compiler
 from enot.packages.config.config import ConfigFile
+from enot.packages.config.config_cache import read_config
 from enot.packages.dep import Dep
 from enot.utils.file_utils import read_file_lines
 from enot.utils.logger import warning
@@ -52,15 +52,26 @@ def parse_deps(deps: list, content: dict) -> dict:
     return found
 
 
+# Parse Makefile variables. If there is no ERLC_OPTS (+= can be used instead of =) - find them manually.
+def read_makefile(makefile: str) -> dict:
+    from distutils.sysconfig import parse_makefile  # slow to import, erlang.mk projects are rare
+    content = parse_makefile(makefile)
+    if 'ERLC_OPTS' not in content:
+        for line in read_file_lines(makefile):
+            if line.startswith('ERLC_OPTS'):
+                content['ERLC_OPTS'] = ' '.join(line.strip('\n').split(' ')[2:])
+                break
+    return content
+
+
 class ErlangMkConfig(ConfigFile):
     def __init__(self, path: str, url=None):
         super().__init__()
         self._path = path
-        makefile = join(path, 'Makefile')
-        content = parse_makefile(makefile)
+        content = read_config(join(path, 'Makefile'), 'erlang.mk', read_makefile)
         self._url = url
         self.__conf_init(content)
-        self.__parse_erl_opts(makefile, content)
+        self.__parse_erl_opts(content)
         self.__parse_deps(content)
 
     def get_compiler(self):
@@ -77,16 +88,7 @@ class ErlangMkConfig(ConfigFile):
     def __conf_init(self, content: dict):
         self.__conf_vsn = content.get('PROJECT_VERSION', None)
 
-    def __parse_erl_opts(self, mkfile_path: str, content: dict):
-
+    def __parse_erl_opts(self, content: dict):
         if 'ERLC_OPTS' in content:
             opt_str = content['ERLC_OPTS']
             self._build_vars = get_erl_opts(opt_str.split(' '), content)
-        else:  # no ERLC_OPTS in Makefile. Should scan it manually (+= can be used instead of = )
-            data = read_file_lines(mkfile_path)
-            lines = [x.strip('\n') for x in data]
-            for line in lines:
-                if line.startswith('ERLC_OPTS'):
-                    opt_str = line.split(' ')[2:]
-                    self._build_vars = get_erl_opts(opt_str, content)
-                    return
@@ -0,0 +1,125 @@
+"""
+Hex packages metadata (git repository url and released versions), remembered locally. Hex deps of rebar.config
+and enot_config.json are resolved to git repositories with it. Hex is asked again only when metadata is older
+than ttl. If Hex is not available (or in offline mode) remembered metadata is used regardless of it's age.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from enot.utils.logger import debug, warning
+
+HEX_TTL = 86400  # seconds
+PREFETCH_JOBS = 8
+
+
+class HexMetadata:
+    def __init__(self, path: str or None = None, ttl: int = HEX_TTL, offline=False):
+        self._path = path
+        self._ttl = ttl
+        self._offline = offline
+        self._lock = threading.Lock()
+        self._packages = self.__load()
+
+    @property
+    def path(self) -> str or None:  # file, where metadata is persisted. None - keep in memory only
+        return self._path
+
+    @property
+    def ttl(self) -> int:  # seconds while metadata is actual
+        return self._ttl
+
+    @property
+    def offline(self) -> bool:  # never ask Hex, use remembered metadata only
+        return self._offline
+
+    # Return package's {url, releases}. Raises RuntimeError if package is unknown and can't be requested.
+    # Request is a function, returning package info from Hex API.
+    def get(self, name: str, request) -> dict:
+        with self._lock:
+            entry = self._packages.get(name)
+        if entry is not None and (self.offline or self.__is_actual(entry)):
+            return entry
+        if self.offline:
+            raise RuntimeError('Hex package ' + name + ' is unknown and can\'t be requested in offline mode')
+        try:
+            fetched = to_entry(name, request(name))
+        except Exception as e:
+            if entry is None:
+                raise RuntimeError('Can\'t get Hex package ' + name + ': ' + str(e))
+            warning('Can\'t update Hex package ' + name + ' (' + str(e) + '), use remembered one')
+            return entry
+        with self._lock:
+            self._packages[name] = fetched
+            self.__save()
+        return fetched
+
+    # Request metadata of all packages, which are unknown or outdated, in parallel
+    def prefetch(self, names: list, request):
+        if self.offline:
+            return
+        with self._lock:
+            outdated = sorted({name for name in names
+                               if name not in self._packages or not self.__is_actual(self._packages[name])})
+        if len(outdated) > 1:
+            debug('prefetch Hex packages ' + str(outdated))
+            with ThreadPoolExecutor(max_workers=min(PREFETCH_JOBS, len(outdated))) as executor:
+                list(executor.map(lambda name: self.__try_get(name, request), outdated))
+
+    # Errors are reported later, when package is needed
+    def __try_get(self, name: str, request):
+        try:
+            self.get(name, request)
+        except RuntimeError:
+            pass
+
+    def __is_actual(self, entry: dict) -> bool:
+        return time.time() - entry['checked_at'] < self.ttl
+
+    def __load(self) -> dict:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Write atomically, as several enot instances can use the same cache. Outdated entries are kept for offline use.
+    def __save(self):
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._packages, f, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            warning('Can\'t save Hex metadata: ' + str(e))
+
+
+# Remembered part of Hex API package info
+def to_entry(name: str, info: dict) -> dict:
+    links = {k.lower(): v for k, v in info['meta']['links'].items()}  # Hex have GitHub and Github links
+    if 'github' not in links:
+        raise RuntimeError('Hex package ' + name + ' has no GitHub link')
+    return {'url': links['github'],
+            'releases': [release['version'] for release in info.get('releases', [])],
+            'checked_at': time.time()}
+
+
+_metadata = HexMetadata()
+
+
+def get_hex_metadata() -> HexMetadata:
+    return _metadata
+
+
+# Set Hex metadata storage. Is called when global config is configured.
+def set_hex_metadata(metadata: HexMetadata):
+    global _metadata
+    _metadata = metadata
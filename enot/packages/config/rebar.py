@@ -3,12 +3,17 @@ from os.path import join
 from erl_terms.erl_terms_core import decode
 
 from enot.compiler.compiler_type import Compiler
-from enot.packages.config.config import ConfigFile, get_dep_info_from_hex
+from enot.packages.config.config import ConfigFile, get_dep_info_from_hex, prefetch_hex
+from enot.packages.config.config_cache import read_config
 from enot.packages.dep import Dep
 from enot.utils.erl_file_utils import parse_platform_define
 from enot.utils.file_utils import read_file
 
 
+def read_rebar_config(file: str) -> list:
+    return decode(read_file(file))
+
+
 # TODO raw is not supported for now
 def parse_dep_body(body: tuple) -> Dep:
     if body[0] != 'git':
@@ -34,7 +39,7 @@ class RebarConfig(ConfigFile):
         super().__init__()
         self._path = path
         self._platform_defines = []
-        rebarconfig = decode(read_file(join(path, 'rebar.config')))
+        rebarconfig = read_config(join(path, 'rebar.config'), 'rebar', read_rebar_config)
         self._url = url
         self.__parse_config(rebarconfig)
 
@@ -53,12 +58,10 @@ class RebarConfig(ConfigFile):
                 self.__parse_erl_opts(value)
 
     def __parse_deps(self, deps):
-        for dep in deps:
-            name = dep[0]
-            if len(dep) == 2:  # {Dep, {git, Url, Rev}}
-                body = dep[1]
-            else:
-                body = dep[2]  # {Dep, VsnRegex, {git, Url, Rev}}
+        # {Dep, {git, Url, Rev}} or {Dep, VsnRegex, {git, Url, Rev}}. Hex deps have version instead of git body.
+        bodies = [(dep[0], dep[1] if len(dep) == 2 else dep[2]) for dep in deps]
+        prefetch_hex([name for name, body in bodies if isinstance(body, str)])
+        for name, body in bodies:
             if isinstance(body, str):
                 self.deps[name] = get_dep_info_from_hex(name, body)
             else:
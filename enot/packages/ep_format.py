@@ -0,0 +1,196 @@
+"""
+Enot package (.ep) format. Package is a tar archive, compressed with gzip or zstd (if `zstandard` is installed).
+Compression is detected on read by magic bytes, so uncompressed packages of previous Enot versions are read too.
+Archive is reproducible: members are sorted, owner, mtime and modes are fixed. Format version, package header
+(name, version, deps, applications, file checksums) and configs are the first members, so they are read
+without decompressing the rest of the archive.
+"""
+import gzip
+import io
+import json
+import os
+import stat
+import tarfile
+from contextlib import contextmanager
+from os.path import join
+
+from enot.utils.file_utils import file_hash
+from enot.utils.logger import debug
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional
+    zstandard = None
+
+FORMAT_VERSION = 2
+VERSION_FILE = '.enot_format'
+HEADER_FILE = '.enot_package.json'
+METADATA_FILES = [VERSION_FILE, HEADER_FILE, 'enot_config.json', 'enot_locks.json']  # are written first
+GZIP = 'gzip'
+ZSTD = 'zstd'
+NONE = 'none'
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+_compression = GZIP
+
+
+# Set compression of generated packages. Is called when global config is configured.
+def set_compression(compression: str or None):
+    global _compression
+    compression = compression or GZIP
+    if compression not in (GZIP, ZSTD, NONE):
+        raise RuntimeError('Unknown package compression ' + compression)
+    if compression == ZSTD and zstandard is None:
+        raise RuntimeError('zstd package compression requires zstandard module')
+    _compression = compression
+
+
+def get_compression() -> str:
+    return _compression
+
+
+# Create package dst of files and dirs of path. Header is written with checksums of all files.
+def write_package(path: str, names: list, dst: str, header: dict or None = None, compression: str or None = None):
+    compression = compression or get_compression()
+    debug('write ' + dst + ' with ' + compression)
+    files = sorted(__list_files(path, names), key=__member_order)
+    with open(dst, 'wb') as raw:
+        with __compressor(raw, compression) as stream:
+            with tarfile.open(fileobj=stream, mode='w|', format=tarfile.GNU_FORMAT) as archive:
+                __add_content(archive, VERSION_FILE, str(FORMAT_VERSION).encode('utf-8'))
+                if header is not None:
+                    header = dict(header, files={name: file_hash(join(path, name)) for name in files
+                                                 if os.path.isfile(join(path, name))})
+                    __add_content(archive, HEADER_FILE, json.dumps(header, sort_keys=True).encode('utf-8'))
+                for name in files:
+                    info = __normalize(archive.gettarinfo(join(path, name), arcname=name))
+                    if info.isreg():
+                        with open(join(path, name), 'rb') as f:
+                            archive.addfile(info, f)
+                    else:
+                        archive.addfile(info)
+
+
+# Open package for sequential read of members
+@contextmanager
+def open_package(path: str):
+    with open(path, 'rb') as raw:
+        compression = __detect(raw.read(4))
+        raw.seek(0)
+        if compression == GZIP:
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif compression == ZSTD:
+            if zstandard is None:
+                raise RuntimeError(path + ' is compressed with zstd. Install zstandard to read it.')
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        else:
+            stream = raw
+        with tarfile.open(fileobj=stream, mode='r|') as archive:
+            yield archive
+
+
+# Return content of files with names from package. Stops reading after all of them are found.
+def read_files(path: str, names: list) -> dict:
+    found = {}
+    with open_package(path) as archive:
+        for member in archive:
+            if member.name in names and member.isreg():
+                found[member.name] = archive.extractfile(member).read()
+                if len(found) == len(names):
+                    break
+    return found
+
+
+# Return content of metadata files, which are at the beginning of package.
+# Only these files are read, so it doesn't depend on package size.
+def read_metadata(path: str) -> dict:
+    found = {}
+    with open_package(path) as archive:
+        for member in archive:
+            if member.name not in METADATA_FILES:
+                break
+            found[member.name] = archive.extractfile(member).read()
+    return found
+
+
+# Return package header. Packages of previous Enot versions have no header.
+def read_header(path: str) -> dict or None:
+    header = read_metadata(path).get(HEADER_FILE)
+    if header is None:
+        return None
+    return json.loads(header.decode('utf-8'))
+
+
+# Return format version of package. Packages of previous Enot versions have no version file.
+def read_version(path: str) -> int:
+    with open_package(path) as archive:
+        member = archive.next()
+        if member is not None and member.name == VERSION_FILE:
+            return int(archive.extractfile(member).read().decode('utf-8'))
+    return 1
+
+
+def extract(path: str, dst: str):
+    with open_package(path) as archive:
+        archive.extractall(dst)
+
+
+def __add_content(archive: tarfile.TarFile, name: str, content: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    archive.addfile(__normalize(info), io.BytesIO(content))
+
+
+def __detect(magic: bytes) -> str:
+    if magic.startswith(GZIP_MAGIC):
+        return GZIP
+    if magic.startswith(ZSTD_MAGIC):
+        return ZSTD
+    return NONE
+
+
+@contextmanager
+def __compressor(raw, compression: str):
+    if compression == GZIP:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=GZIP_LEVEL, mtime=0) as stream:
+            yield stream
+    elif compression == ZSTD:
+        with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw) as stream:
+            yield stream
+    else:
+        yield raw
+
+
+# List names of all files and dirs (recursively), relative to path
+def __list_files(path: str, names: list) -> list:
+    files = []
+    for name in names:
+        files.append(name)
+        if os.path.isdir(join(path, name)):
+            for root, dirs, filenames in os.walk(join(path, name)):
+                for entry in dirs + filenames:
+                    files.append(os.path.relpath(join(root, entry), path))
+    return files
+
+
+# Metadata files first, then all others by path
+def __member_order(name: str) -> tuple:
+    if name in METADATA_FILES:
+        return 0, METADATA_FILES.index(name), []
+    return 1, 0, name.split(os.sep)
+
+
+# Remove everything, what depends on build machine or time
+def __normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    info.mtime = int(os.environ.get('SOURCE_DATE_EPOCH', 0))
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    if info.isdir() or info.mode & stat.S_IXUSR:
+        info.mode = 0o755
+    else:
+        info.mode = 0o644
+    return info
+
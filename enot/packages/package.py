@@ -1,17 +1,15 @@
 import json
 import os
-import tarfile
 from os.path import join
 
-from git import Repo, InvalidGitRepositoryError
-
+from enot.packages import ep_format
 from enot.packages.application_config import AppConfig
 from enot.packages.config import config_factory
 from enot.packages.config.config import ConfigFile
 from enot.packages.config.enot import EnotConfig
 from enot.packages.config.dep_config import DepConfig
 from enot.packages.dep import Dep
-from enot.utils.file_utils import tar
+from enot.utils.git_utils import read_git_info
 from enot.utils.logger import info
 
 
@@ -209,7 +207,7 @@ class Package:
         add_if_exist(pack_dir, 'enot_locks.json', dirs_to_add)
         package_dst = join(pack_dir, self.name + '.ep')
         info('create package ' + package_dst)
-        tar(pack_dir, dirs_to_add, package_dst)
+        ep_format.write_package(pack_dir, dirs_to_add, package_dst, header=self.header('c_src' in dirs_to_add))
 
     def install(self, system_config, erlang_vsn: str) -> bool:
         for action in self.config.install:
@@ -235,22 +233,17 @@ class Package:
         if not self.config:
             return
         if (not self.url or not self.git_tag) and self.path:
-            try:
-                repo = Repo(self.path)
-                if not self.url:
-                    self.config.url = repo.remotes.origin.url  # TODO remove .git ending?
-                if not self.git_tag:
-                    tag_name = None
-                    for tag in repo.tags:
-                        if tag.commit == repo.head.commit:
-                            tag_name = tag.path
-                    if tag_name:
-                        paths = tag_name.split('/')
-                        [tag] = paths[-1:]
-                        self.config.git_tag = tag
-                    self.config.git_branch = repo.active_branch.name
-            except (InvalidGitRepositoryError, TypeError):
+            git_info = read_git_info(self.path, find_tag=not self.git_tag)
+            if git_info is None:  # not a git repository
                 return
+            if not self.url and git_info['url']:
+                self.config.url = git_info['url']  # TODO remove .git ending?
+            if not self.git_tag:
+                if git_info['tag']:
+                    self.config.git_tag = git_info['tag'].split('/')[-1]
+                if git_info['branch'] is None:  # detached HEAD
+                    return
+                self.config.git_branch = git_info['branch']
         if not self.fullname:
             self.config.fullname_from_git(self.url)
 
@@ -258,24 +251,54 @@ class Package:
         paths = path.split('/')
         package_name = paths[len(paths) - 1]
         project_path = '/'.join(paths[:-1])
-        with tarfile.open(path) as pack:
-            config = EnotConfig.from_package(pack, url, self.config)
-            names = pack.getnames()
-            conf_app_src = package_name + '.app.src'
-            conf_app = package_name + '.app'
-            if conf_app_src in names:
-                app_config = AppConfig.from_package(conf_app_src, pack)
-            elif conf_app in names:
-                app_config = AppConfig.from_package(conf_app, pack, compose=False)
-            else:
-                app_config = None
-            has_nifs = 'c_src' in names
+        metadata = ep_format.read_metadata(path)
+        if ep_format.HEADER_FILE in metadata and 'enot_config.json' in metadata:
+            header = json.loads(metadata[ep_format.HEADER_FILE].decode('utf-8'))
+            config = EnotConfig.from_package(metadata['enot_config.json'], url, self.config)
+            app_config = AppConfig.from_header(header)
+            has_nifs = header['has_nifs']
+        else:  # package of previous Enot version
+            config, app_config, has_nifs = self.__scan_package(path, package_name, url)
         self.path = project_path
         self.has_nifs = has_nifs
         self.config = config
         self.app_config = app_config
         self.__set_git_config()
 
+    # Read package without header. All members are read.
+    def __scan_package(self, path: str, package_name: str, url: str or None) -> (ConfigFile, AppConfig or None, bool):
+        conf_app_src = package_name + '.app.src'
+        conf_app = package_name + '.app'
+        names = []
+        contents = {}
+        with ep_format.open_package(path) as pack:  # members are read sequentially, without extracting
+            for member in pack:
+                names.append(member.name)
+                if member.name in ('enot_config.json', conf_app_src, conf_app) and member.isreg():
+                    contents[member.name] = pack.extractfile(member).read()
+        if 'enot_config.json' not in contents:
+            raise RuntimeError('No enot_config.json in ' + path)
+        config = EnotConfig.from_package(contents['enot_config.json'], url, self.config)
+        if conf_app_src in contents:
+            app_config = AppConfig.from_package(contents[conf_app_src])
+        elif conf_app in contents:
+            app_config = AppConfig.from_package(contents[conf_app], compose=False)
+        else:
+            app_config = None
+        return config, app_config, 'c_src' in names
+
+    # Package description, which is read instead of unpacking the package
+    def header(self, has_nifs: bool or None = None) -> dict:
+        if has_nifs is None:
+            has_nifs = self.has_nifs
+        header = {'name': self.name,
+                  'vsn': self.vsn if self.config.conf_vsn or self.app_config else None,
+                  'deps': {dep.name: dep.git_vsn for dep in self.deps},
+                  'has_nifs': has_nifs}
+        if self.app_config is not None:
+            header['app'] = self.app_config.export()
+        return header
+
 
 def add_if_exist(src_dir, dir_to_add, dirs):
     if os.path.exists(join(src_dir, dir_to_add)):
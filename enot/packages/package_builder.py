@@ -1,11 +1,14 @@
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from os import listdir
 from os.path import join
 
 from enot.compiler.compiler_factory import get_compiler
 from enot.compiler.relx import RelxCompiler
 from enot.global_properties import GlobalProperties
+from enot.packages.build_scheduler import BuildScheduler
 from enot.packages.package import Package
 from enot.utils.file_utils import remove_dir
 from enot.utils.logger import debug, info, warning
@@ -22,28 +25,31 @@ def try_get_semver(vsn: str) -> list:
 
 
 class Builder:
-    def __init__(self, path: str, package: Package or None):
+    def __init__(self, path: str, package: Package or None, system_config: GlobalProperties or None = None):
         super().__init__()
-        self._system_config = GlobalProperties()
+        self._system_config = system_config or GlobalProperties()
         self._path = path
         self._packages = {}
         self._project = package
         self._define = ''
         self._rescan_deps = False
+        self._lock = threading.Lock()
 
     @classmethod
     def init_from_path(cls, path) -> 'Builder':
+        system_config = GlobalProperties().configure()  # first, as project's config is parsed with it's caches
         package = Package.from_path(path)
-        return cls(path, package)
+        return cls(path, package, system_config)
 
     @classmethod
     def init_without_package(cls, path) -> 'Builder':
-        return cls(path, None)
+        return cls(path, None, GlobalProperties().configure())
 
     @classmethod
     def init_from_package(cls, path_to_package) -> 'Builder':
+        system_config = GlobalProperties().configure()
         package = Package.from_package(path_to_package)
-        return cls(path_to_package, package)
+        return cls(path_to_package, package, system_config)
 
     @property
     def compare_versions(self) -> bool:
@@ -92,11 +98,11 @@ class Builder:
         return compiler.common(log_dir)
 
     # Parse package config, download missing deps to /tmp
-    def populate(self, include_test_deps=False):
+    def populate(self, include_test_deps=False, jobs: int = 1):
         deps = self.project.deps
         if include_test_deps:
             deps += self.project.test_deps
-        self.__populate_deps(deps)
+        self.__populate_deps(deps, jobs)
         locks = self.system_config.cache.local_cache.locks
         if locks:
             self.dump_locs(locks)
@@ -116,14 +122,20 @@ class Builder:
         with open(join(self.project.path, 'enot_locks.json'), 'w') as file:
             json.dump(cache.locks, file, sort_keys=True, indent=4)
 
-    def build(self, define: str = ''):
+    def build(self, define: str = '', jobs: int = 1):
         self._define = define
+        self.__build_parallel(jobs)
         build_res = self.__build_tree(self.project, is_subpackage=False)
         if self.rescan_deps:
             self.__rescan_deps()
         return build_res
 
-    def deps(self):
+    # Recompile only project itself. Deps should be already built and linked.
+    def compile(self) -> bool:
+        return self.__build_package(self.project, is_subpackage=False)
+
+    def deps(self, jobs: int = 1):
+        self.__build_parallel(jobs)
         self.__build_deps(self.project, is_subpackage=False)
         if self.rescan_deps:
             self.__rescan_deps()
@@ -155,26 +167,76 @@ class Builder:
 
     # Build package and it's deps, then add built package to local cache
     def __build_tree(self, package: Package, is_subpackage=True):
-        self.__build_deps(package, is_subpackage)  # TODO add an ability to compile deps in parallel
+        self.__build_deps(package, is_subpackage)
+        return self.__build_package(package, is_subpackage)
+
+    def __build_package(self, package: Package, is_subpackage=True):
         compiler = get_compiler(self.system_config, self.define, package)  # TODO should defines go only for root?
-        compiler.ensure_tool(self.system_config.cache.local_cache)
+        with self._lock:  # tools are shared between packages via local cache
+            compiler.ensure_tool(self.system_config.cache.local_cache)
         res = compiler.compile(override_config=self.project.config)
         if is_subpackage and res:
             self.system_config.cache.add_package_local(package)
         return res
 
-    def __populate_deps(self, level):  # TODO add an ability to fetch deps in parallel
-        next_level = []
+    # Build all missing deps on a pool of workers, each package after all it's deps.
+    # Linking deps to the project is done later by __build_deps, when every package is already in cache.
+    def __build_parallel(self, jobs: int):
+        graph = {}
+        to_build = {}
+        self.__fill_build_graph(self.project, graph, to_build)
+        if graph:
+            info('build ' + str(len(graph)) + ' deps with ' + str(jobs) + ' jobs')
+            BuildScheduler(jobs).run(graph, lambda name: self.__build_scheduled(to_build[name]))
+
+    # Add all deps, which are not in local cache, to graph. Deps are unique by name after populate.
+    def __fill_build_graph(self, package: Package, graph: dict, visited: dict):
+        for dep in package.deps:
+            dep = self.packages.get(dep.name, dep)
+            if dep.name in visited:
+                continue
+            visited[dep.name] = dep
+            cached = self.system_config.cache.exists_local(dep)
+            if not cached:
+                graph[dep.name] = [sub.name for sub in dep.deps]
+            if not cached or self.project.config.link_all:
+                self.__fill_build_graph(dep, graph, visited)
+
+    # Link already built deps to package, build it and add to local cache
+    def __build_scheduled(self, package: Package) -> bool:
+        for dep in package.deps:
+            upd = self.system_config.cache.link_package(dep, package.path)
+            with self._lock:
+                self.rescan_deps = upd
+        return self.__build_package(package)
+
+    # Populate all new deps of the level at once, then select them in level order,
+    # so the result does not depend on the order fetches were finished.
+    def __populate_deps(self, level, jobs: int = 1):
+        new_deps = {}
         for dep in level:
-            if dep.name not in self.packages:
+            if dep.name not in self.packages and dep.name not in new_deps:
                 debug('new dep: ' + dep.name)
-                self.system_config.cache.populate(dep)  # populated dep becomes package
+                new_deps[dep.name] = dep
+        self.__populate_level(list(new_deps.values()), jobs)  # populated deps become packages
+        next_level = []
+        for dep in level:
+            if dep.name not in self.packages:  # first dep with this name is the one populated
                 self.packages[dep.name] = dep
                 next_level += dep.deps
             else:
                 next_level += self.__compare_and_select(dep)
         if next_level:
-            self.__populate_deps(next_level)
+            self.__populate_deps(next_level, jobs)
+
+    def __populate_level(self, deps: list, jobs: int):
+        self.system_config.cache.check_remote(deps)
+        if jobs > 1 and len(deps) > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                list(executor.map(self.system_config.cache.populate, deps))  # reraise fetch errors
+        else:
+            for dep in deps:
+                self.system_config.cache.populate(dep)
 
     def __compare_and_select(self, dep: Package) -> list:
         pkg_vsn = self.packages[dep.name].git_vsn
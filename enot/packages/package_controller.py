@@ -4,6 +4,8 @@ from enot.packages.package_builder import Builder
 from tinydb import TinyDB, where
 
 from enot.global_properties import GlobalProperties
+from enot.pac_cache import cache_gc
+from enot.pac_cache.cache_gc import GcPolicy
 from enot.pac_cache.local_cache import LocalCache
 from enot.packages.package import Package
 from enot.utils.logger import warning, info
@@ -15,7 +17,7 @@ DATABASE_FILE = 'enot_index.json'
 class Controller:
     def __init__(self) -> None:
         super().__init__()
-        self._system_config = GlobalProperties()
+        self._system_config = GlobalProperties().configure()
 
     @property
     def system_config(self) -> GlobalProperties:  # system configuration
@@ -72,6 +74,10 @@ class Controller:
     def installed(self) -> list:
         return self.__get_all_installed()
 
+    # Remove builds from local cache by global config's policy, overridden by policy. Return removed builds.
+    def gc(self, policy: GcPolicy, dry_run=False) -> list:
+        return cache_gc.collect(self.local_cache, self.system_config.cache_gc.override(policy), dry_run)
+
     # if version is none - search remote caches for versions
     def fetch_package_version(self, fullname: str, maybe_version: str or None) -> str:
         if maybe_version:
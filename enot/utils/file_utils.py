@@ -1,3 +1,4 @@
+import hashlib
 import os
 import shutil
 import stat
@@ -9,26 +10,30 @@ from subprocess import PIPE
 
 from enot.utils.logger import debug
 
+RESOURCES_DIR = join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
+
 
 def read_file(path: str) -> str:
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
 
 
-def copy_file(src: str, dst: str):
-    debug('copy ' + src + ' to ' + dst)
-    copyfile(src, dst)
+def file_hash(path: str) -> str:
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
 
 
-def copy_to(src: str, dst: str):
-    if os.path.exists(src):
-        shutil.copytree(src, join(dst, src))
+# Path of Enot's resource file (templates, makefiles, default config)
+def resource_path(name: str) -> str:
+    return join(RESOURCES_DIR, name)
 
 
-def tar(path: str, dirs: list, dst: str):
-    with tarfile.open(dst, 'w') as archive:
-        for d in dirs:
-            archive.add(join(path, d), arcname=d)
+def copy_file(src: str, dst: str):
+    debug('copy ' + src + ' to ' + dst)
+    copyfile(src, dst)
 
 
 def untar(path: str, dst: str):
@@ -96,7 +101,7 @@ def link_if_needed(include_src: str, include_dst: str) -> bool:
 
 def ensure_dir(path: str):
     if not os.path.exists(path):
-        os.makedirs(path)
+        os.makedirs(path, exist_ok=True)  # can be called from parallel builds
 
 
 # Get cmd and check if it is installed in system
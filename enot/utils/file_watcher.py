@@ -0,0 +1,190 @@
+"""
+Watching files for changes. Uses inotify on Linux and falls back to polling file states on other systems.
+Watched path can be a dir (watched recursively, symlinks are not followed) or a file. Missing paths
+are watched for creation.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import time
+from os.path import join, dirname, basename
+
+from enot.utils.logger import debug, warning
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+READ_SIZE = 64 * 1024
+
+DELAY = 0.1  # seconds to collect changes after the first one (editors write files in several steps)
+POLL_INTERVAL = 0.5
+
+
+# Return inotify watcher, or polling one if inotify is not available
+def create_watcher(paths: list, delay: float = DELAY):
+    try:
+        return InotifyWatcher(paths, delay)
+    except (OSError, AttributeError) as e:
+        debug('inotify is not available (' + str(e) + '), poll for changes')
+        return PollingWatcher(paths, delay)
+
+
+class InotifyWatcher:
+    def __init__(self, paths: list, delay: float = DELAY):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._delay = delay
+        self._paths = [os.path.abspath(path) for path in paths]
+        self._dirs = {}  # watch descriptor -> watched dir
+        self._filters = {}  # watched dir -> names of entries to report. None - report all
+        for path in self._paths:
+            if os.path.isdir(path) and not os.path.islink(path):
+                self.__add_tree(path)
+            else:
+                self.__add_entry(path)
+
+    # Wait for changes. Return changed paths, or empty set on timeout.
+    def wait(self, timeout: float or None = None) -> set:
+        changed = self.__read(timeout)
+        if changed:
+            deadline = time.time() + self._delay
+            while time.time() < deadline:
+                changed |= self.__read(deadline - time.time())
+        return changed
+
+    # Forget changes, which were made till now
+    def drain(self):
+        while self.__read(0):
+            pass
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __read(self, timeout: float or None) -> set:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self._fd, READ_SIZE)
+        changed = set()
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b'\0'))
+            offset += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                warning('Too many changes, some of them were lost')
+                changed.update(self._paths)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:  # dir was removed
+                del self._dirs[wd]
+                continue
+            allowed = self._filters.get(directory)
+            if not name or (allowed is not None and name not in allowed):
+                continue
+            path = join(directory, name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.__add_tree(path)
+            changed.add(path)
+        return changed
+
+    # Watch dir and all it's subdirs for all changes
+    def __add_tree(self, path: str):
+        for root, _, _ in os.walk(path):
+            if self.__add_watch(root):
+                self._filters[root] = None
+
+    # Watch file (or missing path) via it's parent dir
+    def __add_entry(self, path: str):
+        parent = dirname(path)
+        if not os.path.isdir(parent):
+            warning('Can\'t watch ' + path + ': ' + parent + ' does not exist')
+            return
+        if self.__add_watch(parent):
+            allowed = self._filters.setdefault(parent, set())
+            if allowed is not None:  # parent is not watched recursively
+                allowed.add(basename(path))
+
+    def __add_watch(self, path: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            debug('Can\'t watch ' + path + ': ' + os.strerror(ctypes.get_errno()))
+            return False
+        self._dirs[wd] = path
+        return True
+
+
+class PollingWatcher:
+    def __init__(self, paths: list, delay: float = DELAY, interval: float = POLL_INTERVAL):
+        self._paths = [os.path.abspath(path) for path in paths]
+        self._delay = delay
+        self._interval = interval
+        self._state = self.__snapshot()
+
+    # Wait for changes. Return changed paths, or empty set on timeout.
+    def wait(self, timeout: float or None = None) -> set:
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            changed = self.__changes()
+            if changed:
+                time.sleep(self._delay)
+                return changed | self.__changes()
+            if deadline is not None and time.time() >= deadline:
+                return set()
+            time.sleep(self._interval if deadline is None else max(0, min(self._interval, deadline - time.time())))
+
+    # Forget changes, which were made till now
+    def drain(self):
+        self._state = self.__snapshot()
+
+    def close(self):
+        pass
+
+    def __changes(self) -> set:
+        state = self.__snapshot()
+        changed = {path for path in set(state) | set(self._state) if state.get(path) != self._state.get(path)}
+        self._state = state
+        return changed
+
+    # State of all watched files: path -> (mtime, size). Dirs are recorded only by their presence.
+    def __snapshot(self) -> dict:
+        state = {}
+        for path in self._paths:
+            if os.path.isdir(path) and not os.path.islink(path):
+                for root, dirs, files in os.walk(path):
+                    state[root] = 'dir'
+                    for name in dirs + files:
+                        PollingWatcher.__add_state(join(root, name), state)
+            else:
+                PollingWatcher.__add_state(path, state)
+        return state
+
+    @staticmethod
+    def __add_state(path: str, state: dict):
+        try:
+            st = os.lstat(path)
+        except OSError:  # missing or just removed
+            return
+        if stat.S_ISDIR(st.st_mode):
+            state.setdefault(path, 'dir')
+        else:
+            state[path] = (st.st_mtime, st.st_size)
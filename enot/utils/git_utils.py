@@ -0,0 +1,187 @@
+"""
+Git metadata of a working copy: origin url, current branch and tag, pointing to HEAD.
+Config and refs are read from .git directly and tags, pointing to HEAD, are found with one git call,
+remembered per repository HEAD. Listing all tags with GitPython is slow for repositories with many tags,
+so it is used only if repository can't be read directly.
+"""
+import os
+import re
+import subprocess
+import threading
+from os.path import join, isdir, isfile
+from subprocess import PIPE, DEVNULL
+
+from enot.utils.logger import debug
+
+SECTION = re.compile(r'^\[\s*([^\s\]"]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+MAX_SYMREF_DEPTH = 5
+
+_tags = {}  # (git dir, HEAD commit, tags state) -> tags, pointing to HEAD
+_tags_lock = threading.Lock()
+
+
+# Return {url, branch, tag} of repository at path, or None if path is not a repository root.
+# Branch is None for detached HEAD. Tag is looked for only if find_tag is set.
+def read_git_info(path: str, find_tag=True) -> dict or None:
+    try:
+        return __read_info(path, find_tag)
+    except ValueError as e:
+        debug('Can\'t read git info of ' + path + ' directly: ' + str(e))
+        return __read_info_with_gitpython(path, find_tag)
+
+
+def __read_info(path: str, find_tag: bool) -> dict or None:
+    git_dir = find_git_dir(path)
+    if git_dir is None:
+        return None
+    common = common_dir(git_dir)
+    head = __read_file(join(git_dir, 'HEAD'))
+    if head is None:
+        raise ValueError('no HEAD')
+    if head.startswith('ref:'):
+        head_ref = head[4:].strip()
+        branch = head_ref[len('refs/heads/'):] if head_ref.startswith('refs/heads/') else None
+        commit = resolve_ref(common, head_ref)
+    else:
+        branch = None
+        commit = head
+    tags = tags_at(path, common, commit) if find_tag and commit else []
+    return {'url': origin_url(common), 'branch': branch, 'tag': tags[-1] if tags else None}
+
+
+# Repository is read by GitPython the same way: last (by name) tag, pointing to HEAD is taken
+def __read_info_with_gitpython(path: str, find_tag: bool) -> dict or None:
+    from git import Repo, InvalidGitRepositoryError  # git is slow to import and is not always needed
+    try:
+        repo = Repo(path)
+    except InvalidGitRepositoryError:
+        return None
+    tags = []
+    if find_tag:
+        tags = sorted(tag.path[len('refs/tags/'):] for tag in repo.tags if tag.commit == repo.head.commit)
+    try:
+        branch = repo.active_branch.name
+    except TypeError:  # detached HEAD
+        branch = None
+    url = repo.remotes.origin.url if 'origin' in [remote.name for remote in repo.remotes] else None
+    return {'url': url, 'branch': branch, 'tag': tags[-1] if tags else None}
+
+
+# Return git dir of working copy at path, or None if path is not a repository root.
+# Worktrees and submodules have .git file, pointing to their git dir.
+def find_git_dir(path: str) -> str or None:
+    dot_git = join(path, '.git')
+    if isdir(dot_git):
+        return dot_git
+    if isfile(dot_git):
+        content = __read_file(dot_git)
+        if content is None or not content.startswith('gitdir:'):
+            raise ValueError('unknown .git file format')
+        return os.path.normpath(join(path, content[len('gitdir:'):].strip()))
+    return None
+
+
+# Worktrees share refs and config with main repository
+def common_dir(git_dir: str) -> str:
+    common = __read_file(join(git_dir, 'commondir'))
+    if common is None:
+        return git_dir
+    return os.path.normpath(join(git_dir, common))
+
+
+# Return commit, ref points to, or None if there is no such ref (branch without commits)
+def resolve_ref(git_dir: str, ref: str) -> str or None:
+    for _ in range(MAX_SYMREF_DEPTH):
+        value = __read_file(join(git_dir, ref))
+        if value is None:
+            return packed_refs(git_dir).get(ref)
+        if not value.startswith('ref:'):
+            return value
+        ref = value[4:].strip()
+    raise ValueError('too deep symbolic ref ' + ref)
+
+
+# Refs from packed-refs file: ref -> sha
+def packed_refs(git_dir: str) -> dict:
+    refs = {}
+    try:
+        with open(join(git_dir, 'packed-refs'), 'r') as f:
+            for line in f:
+                if line.startswith('#') or line.startswith('^'):  # header or peeled tag
+                    continue
+                parts = line.split()
+                if len(parts) == 2:
+                    refs[parts[1]] = parts[0]
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        raise ValueError(str(e))
+    return refs
+
+
+# Url of origin remote from repository's config, or None if there is no origin
+def origin_url(git_dir: str) -> str or None:
+    content = __read_file(join(git_dir, 'config'))
+    if content is None:
+        raise ValueError('no config')
+    section = None
+    has_includes = False
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        match = SECTION.match(line)
+        if match:
+            name = match.group(1).lower()
+            if match.group(2) is None and '.' in name:  # old [remote.origin] syntax
+                name, subsection = name.split('.', 1)
+            else:
+                subsection = match.group(2)
+            section = (name, subsection)
+            has_includes = has_includes or name in ['include', 'includeif']
+            continue
+        if section == ('remote', 'origin') and '=' in line:
+            [key, value] = line.split('=', 1)
+            if key.strip().lower() == 'url':
+                value = value.strip()
+                return value[1:-1] if len(value) > 1 and value[0] == value[-1] == '"' else value
+    if has_includes:  # origin can be in included config
+        raise ValueError('config has includes')
+    return None
+
+
+# Tags, pointing to commit (annotated tags are peeled), sorted by name.
+# Remembered till HEAD or tags are changed.
+def tags_at(path: str, git_dir: str, commit: str) -> list:
+    key = (git_dir, commit, __state(join(git_dir, 'packed-refs')), __state(join(git_dir, 'refs', 'tags')))
+    with _tags_lock:
+        if key in _tags:
+            return _tags[key]
+    try:
+        output = subprocess.check_output(['git', 'for-each-ref', '--points-at=' + commit, '--format=%(refname)',
+                                          'refs/tags'], cwd=path, stdin=DEVNULL, stderr=PIPE)
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise ValueError('git for-each-ref failed: ' + str(e))
+    tags = sorted(line[len('refs/tags/'):] for line in output.decode('utf-8').splitlines()
+                  if line.startswith('refs/tags/'))
+    with _tags_lock:
+        _tags[key] = tags
+    return tags
+
+
+def __state(path: str) -> tuple or None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def __read_file(path: str) -> str or None:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        raise ValueError(str(e))
@@ -1,31 +1,197 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+from enot.pac_cache.remote_cache_exception import RemoteCacheException, BuildNotFound
+from enot.utils.logger import debug, warning
+
+CHUNK_SIZE = 1024 * 1024  # download chunk, written to disk
+TIMEOUT = (10, 60)  # seconds to connect and to wait for data
+RETRIES = 3
+BACKOFF = 0.5  # seconds, doubled with every retry
+RETRY_STATUSES = [500, 502, 503, 504]
+REDIRECT_STATUSES = [301, 307, 308]
+DOWNLOAD_ATTEMPTS = 5
+PARTIAL_SUFFIX = '.part'  # not finished download
+META_SUFFIX = '.meta'  # partial download's validator and checksum
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# Session with connection pool and retries. All remote caches share it, so connections are kept alive.
+def new_session(retries: int = RETRIES, backoff: float = BACKOFF) -> requests.Session:
+    session = requests.Session()
+    methods = frozenset(['GET', 'POST'])  # remote caches only query data with POST
+    try:
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=methods, raise_on_status=False)
+    except TypeError:  # old urllib3
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      method_whitelist=methods, raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+# Replace shared session. None - new one is created on the next request.
+def set_session(session: requests.Session or None):
+    global _session
+    with _session_lock:
+        _session = session
+
 
-from enot.pac_cache.remote_cache_exception import RemoteCacheException
+# Download file to write_path. request_fun gets additional request headers and returns streamed response.
+# Data is written to partial file, which is resumed with Range request if download was interrupted
+# (also in previous run). Partial file is named with partial_key, so partial of other request to the same write_path
+# is not resumed. Partial is resumed only if its validator or checksum is known, so mixed content is not accepted. Checksum (sha256 hex) is checked while streaming. If it is not passed - it is taken
+# from server's Digest or X-Checksum-Sha256 header. File is moved to write_path only when it is complete and valid.
+# Raises BuildNotFound if response starts with first_bytes_check and RemoteCacheException if checksum doesn't match
+# or download can't be completed.
+def download_file(request_fun, write_path: str, first_bytes_check: bytes, error_str: str, checksum=None,
+                  partial_key: str or None = None) -> str:
+    partial = write_path + ('.' + partial_key if partial_key else '') + PARTIAL_SUFFIX
+    meta = __read_meta(partial)
+    for _ in range(DOWNLOAD_ATTEMPTS):
+        resumable = meta.get('validator') or checksum or meta.get('checksum')
+        offset = os.path.getsize(partial) if os.path.isfile(partial) and resumable else 0
+        headers = {}
+        if offset:
+            debug('resume ' + write_path + ' from ' + str(offset))
+            headers['Range'] = 'bytes=' + str(offset) + '-'
+            if meta.get('validator'):
+                headers['If-Range'] = meta['validator']  # resource was changed - full content will be sent
+        request = request_fun(headers)
+        try:
+            sha = __receive(request, partial, offset, meta, first_bytes_check, error_str)
+        except (requests.RequestException, OSError) as e:
+            warning('Download of ' + write_path + ' interrupted: ' + str(e))
+            continue
+        finally:
+            request.close()
+        if sha is None:
+            continue  # connection closed before all content was received
+        expected = checksum or meta.get('checksum')
+        if expected is not None and expected.lower() != sha:
+            __remove_partial(partial)
+            if offset:  # resumed part may be stale, try from the beginning
+                meta = {}
+                continue
+            raise RemoteCacheException('Checksum mismatch for ' + write_path)
+        os.replace(partial, write_path)
+        __remove_partial(partial, keep_data=True)
+        return write_path
+    raise RemoteCacheException('Can\'t download ' + write_path)
 
 
-def download_file(request: Response, write_path: str, first_bytes_check: bytes, error_str: str):
-    if request.status_code != 200:
+def file_sha256(path: str):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha
+
+
+# Write response to partial file. Return sha256 of whole file or None if response was not complete.
+def __receive(request: Response, partial: str, offset: int, meta: dict, first_bytes_check: bytes, error_str: str):
+    if request.status_code == 206 and offset:
+        sha = file_sha256(partial)
+        mode = 'ab'
+        total = __to_int(request.headers.get('Content-Range', '*/0').split('/')[-1])  # * - unknown total
+        meta['checksum'] = meta.get('checksum') or __server_checksum(request)  # digest of full content
+    elif request.status_code == 200:
+        sha = hashlib.sha256()
+        mode = 'wb'
+        offset = 0
+        total = __to_int(request.headers.get('Content-Length', '0'))
+        meta.clear()
+        meta['validator'] = request.headers.get('ETag') or request.headers.get('Last-Modified')
+        meta['checksum'] = __server_checksum(request)
+        with open(partial + META_SUFFIX, 'w') as f:
+            json.dump(meta, f)
+    elif request.status_code == 416:  # partial file is bigger than remote one
+        __remove_partial(partial)
+        return None
+    else:
         raise RuntimeError('Error accessing remote: ' + request.text)
-    first_bytes_checked = False
-    with open(write_path, 'wb') as fd:
-        for chunk in request.iter_content(chunk_size=128):
-            if not first_bytes_checked:
-                if chunk == first_bytes_check:
-                    raise RemoteCacheException(error_str)
-                first_bytes_checked = True
+    received = offset
+    with open(partial, mode) as fd:
+        for chunk in request.iter_content(chunk_size=CHUNK_SIZE):
+            if received == 0 and chunk.startswith(first_bytes_check):
+                fd.close()
+                __remove_partial(partial)
+                raise BuildNotFound(error_str)
             fd.write(chunk)
+            sha.update(chunk)
+            received += len(chunk)
+    if total and received < total:
+        return None
+    return sha.hexdigest()
+
+
+def __server_checksum(request: Response) -> str or None:
+    if 'X-Checksum-Sha256' in request.headers:
+        return request.headers['X-Checksum-Sha256'].lower()
+    for digest in request.headers.get('Digest', '').split(','):  # RFC 3230
+        [algorithm, _, value] = digest.strip().partition('=')
+        if algorithm.lower() == 'sha-256' and value:
+            try:
+                return binascii.hexlify(base64.b64decode(value, validate=True)).decode('ascii')
+            except (binascii.Error, ValueError):
+                warning('Malformed Digest header: ' + digest)
+    return None
+
+
+# Header's integer value. Unknown or malformed - 0.
+def __to_int(value: str) -> int:
+    value = value.strip()
+    return int(value) if value.isdigit() else 0
+
+
+def __read_meta(partial: str) -> dict:
+    try:
+        with open(partial + META_SUFFIX, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def __remove_partial(partial: str, keep_data=False):
+    for path in ([] if keep_data else [partial]) + [partial + META_SUFFIX]:
+        if os.path.isfile(path):
+            os.remove(path)
 
 
-def post_redirect(url: str, body: dict, headers):
-    r = requests.post(url, json=body, headers=headers)
-    if r.status_code == 308 or r.status_code == 301 or r.status_code == 307:
-        return post_redirect(r.text, body, headers)
+def post_redirect(url: str, body: dict, headers, stream=False):
+    r = get_session().post(url, json=body, headers=headers, stream=stream, timeout=TIMEOUT)
+    if r.status_code in REDIRECT_STATUSES:
+        location = r.text
+        r.close()
+        return post_redirect(location, body, headers, stream)
     return r
 
 
-def get_redirect(url: str):
-    r = requests.get(url)
-    if r.status_code == 308 or r.status_code == 301 or r.status_code == 307:
-        return get_redirect(r.text)
+def get_redirect(url: str, stream=False, headers=None):
+    r = get_session().get(url, stream=stream, headers=headers, timeout=TIMEOUT)
+    if r.status_code in REDIRECT_STATUSES:
+        location = r.text
+        r.close()
+        return get_redirect(location, stream, headers)
     return r
@@ -0,0 +1,64 @@
+"""
+Global budget of parallel build jobs. Packages, built at the same time, take jobs from it,
+so all their `make -j` processes together don't use more jobs, than the budget has.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from enot.utils.logger import debug
+
+
+class JobBudget:
+    def __init__(self, total: int):
+        self._total = max(1, total)
+        self._free = self._total
+        self._users = 0  # callers, holding or waiting for jobs
+        self._condition = threading.Condition()
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def free(self) -> int:
+        return self._free
+
+    # Take up to wanted jobs. Blocks till at least one job is free.
+    # Every caller gets not more than fair share of the budget, so others are not starved.
+    def acquire(self, wanted: int) -> int:
+        with self._condition:
+            self._users += 1
+            while self._free == 0:
+                self._condition.wait()
+            granted = max(1, min(wanted, self._free, self._total // self._users))
+            self._free -= granted
+            return granted
+
+    def release(self, jobs: int):
+        with self._condition:
+            self._free += jobs
+            self._users -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def jobs(self, wanted: int):
+        granted = self.acquire(wanted)
+        debug('take ' + str(granted) + ' of ' + str(self.total) + ' jobs')
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+
+_budget = JobBudget(os.cpu_count() or 1)
+
+
+def get_budget() -> JobBudget:
+    return _budget
+
+
+# Set budget size. Is called when global config is configured.
+def set_budget(total: int or None):
+    global _budget
+    _budget = JobBudget(total or os.cpu_count() or 1)
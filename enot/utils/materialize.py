@@ -0,0 +1,105 @@
+"""
+Placing files to cache and projects without copying their content when filesystem allows it.
+Every file is placed with the first method, which works: reflink (copy-on-write clone, Linux btrfs/xfs),
+hardlink (shares inode with source) or plain copy.
+"""
+import errno
+import os
+import shutil
+from os.path import join
+
+from enot.utils.file_utils import file_hash, ensure_dir
+from enot.utils.logger import debug
+
+try:
+    import fcntl
+except ImportError:  # not a unix
+    fcntl = None
+
+REFLINK = 'reflink'
+HARDLINK = 'hardlink'
+COPY = 'copy'
+ALL_METHODS = (REFLINK, HARDLINK, COPY)
+FICLONE = 0x40049409  # linux/fs.h _IOW(0x94, 9, int)
+UNSUPPORTED = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EBADF, errno.EPERM)
+
+_verify = False
+_no_reflink = set()  # (src device, dst device), where reflink is not supported
+
+
+# Check every placed file against it's source. Is called when global config is configured.
+def set_verify(verify: bool):
+    global _verify
+    _verify = bool(verify)
+
+
+# Clone src to dst with FICLONE ioctl. Return False if filesystem doesn't support it.
+def reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+    devices = (os.stat(src).st_dev, os.stat(os.path.dirname(dst) or '.').st_dev)
+    if devices in _no_reflink:
+        return False
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError as e:
+            if e.errno not in UNSUPPORTED:
+                raise
+            _no_reflink.add(devices)
+            unsupported = True
+        else:
+            unsupported = False
+    if unsupported:
+        os.remove(dst)
+        return False
+    shutil.copymode(src, dst)
+    return True
+
+
+def hardlink(src: str, dst: str) -> bool:
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:  # other filesystem or hardlinks are not supported
+        return False
+
+
+def copy(src: str, dst: str) -> bool:
+    shutil.copyfile(src, dst)
+    shutil.copymode(src, dst)
+    return True
+
+
+# Place src file to dst (replacing it) with first working method. Return method used.
+def materialize_file(src: str, dst: str, methods: tuple = ALL_METHODS) -> str:
+    ensure_dir(os.path.dirname(dst))
+    if os.path.lexists(dst):
+        os.remove(dst)
+    for method in methods:
+        if __METHODS[method](src, dst):
+            if _verify:
+                verify(src, dst)
+            return method
+    raise RuntimeError('Can\'t place ' + src + ' to ' + dst + ' with ' + ', '.join(methods))
+
+
+# Recreate all files of src dir in dst dir. Return number of files placed with each method.
+def materialize_tree(src: str, dst: str, methods: tuple = ALL_METHODS) -> dict:
+    debug('materialize ' + src + ' to ' + dst)
+    used = {}
+    for root, _, filenames in os.walk(src, followlinks=True):
+        ensure_dir(join(dst, os.path.relpath(root, src)))
+        for filename in filenames:
+            path = join(root, filename)
+            method = materialize_file(path, join(dst, os.path.relpath(path, src)), methods)
+            used[method] = used.get(method, 0) + 1
+    return used
+
+
+def verify(src: str, dst: str):
+    if file_hash(src) != file_hash(dst):
+        raise RuntimeError(dst + ' differs from ' + src)
+
+
+__METHODS = {REFLINK: reflink, HARDLINK: hardlink, COPY: copy}
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import unittest
+
+from mock import patch, MagicMock
+
+from enot.pac_cache.cache_man import CacheMan
+from enot.pac_cache.enot_cache import EnotCache
+from enot.pac_cache.local_cache import LocalCache
+from enot.pac_cache.remote_metadata import RemoteMetadata
+from enot.utils import http_utils
+from test.abs_test_class import TestClass
+from test.stub_server import StubServer, enot_cache_routes
+
+
+def mock_dep(name: str, vsn: str):
+    dep = MagicMock(fullname='comtihon/' + name, git_vsn=vsn, url='https://github.com/comtihon/' + name, deps=[])
+    dep.name = name
+    return dep
+
+
+class BatchQueriesTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('batch_queries_tests', method_name)
+
+    def setUp(self):
+        super().setUp()
+        http_utils.set_session(http_utils.new_session(backoff=0))
+
+    def tearDown(self):
+        http_utils.set_session(None)
+        super().tearDown()
+
+    def cache_man(self, url: str) -> CacheMan:
+        return CacheMan({'temp_dir': self.tmp_dir,
+                         'cache': [{'name': 'local_cache', 'type': 'local', 'url': 'file://' + self.cache_dir},
+                                   {'name': 'remote', 'type': 'enot', 'url': url}]})
+
+    # All deps are checked with one request. Missing ones are not requested again.
+    def test_check_remote(self):
+        with StubServer({}) as server:
+            cache_man = self.cache_man(server.url)
+            remote = cache_man.remote_caches['remote']
+            server.routes.update(enot_cache_routes({('comtihon/dep1', '1.0.0', remote.erlang_version)}))
+            deps = [mock_dep('dep1', '1.0.0'), mock_dep('dep2', '1.0.0'), mock_dep('dep3', '1.0.0')]
+            cache_man.check_remote(deps)
+            self.assertEqual(['/builds'], [path for _, path, _ in server.requests])
+            self.assertEqual(True, remote.exists(deps[0]))
+            self.assertEqual(False, remote.exists(deps[1]))
+            self.assertEqual(False, cache_man.exists_remote(remote, deps[2]))
+            cache_man.check_remote(deps)  # only dep1 is asked again
+        self.assertEqual(2, len(server.requests))
+        self.assertEqual(['comtihon/dep1'], [b['full_name'] for b in json.loads(server.bodies[1].decode())['builds']])
+
+    # Missing deps of one batch are saved to remote metadata at once
+    def test_missing_saved_once(self):
+        with StubServer({}) as server:
+            cache_man = self.cache_man(server.url)
+            remote = cache_man.remote_caches['remote']
+            server.routes.update(enot_cache_routes(set()))
+            deps = [mock_dep('dep' + str(i), '1.0.0') for i in range(10)]
+            with patch.object(RemoteMetadata, '_RemoteMetadata__save') as mock_save:
+                cache_man.check_remote(deps)
+            self.assertEqual(1, mock_save.call_count)
+            self.assertEqual(True, all(remote.metadata.is_missing(dep.fullname, '1.0.0', remote.erlang_version)
+                                       for dep in deps))
+
+    # Remote without batch queries support is asked one by one
+    def test_batch_not_supported(self):
+        with StubServer({}) as server:
+            cache = EnotCache(self.tmp_dir, '20', {'name': 'remote', 'type': 'enot', 'url': server.url})
+            self.assertEqual(None, cache.check_builds([mock_dep('dep1', '1.0.0')]))
+            self.assertEqual(True, cache.exists(mock_dep('dep1', '1.0.0')))
+
+    # Deps of remote package are downloaded in parallel
+    @patch.object(CacheMan, 'add_fetched')
+    @patch.object(LocalCache, 'exists', return_value=False)
+    def test_parallel_download(self, _, mock_add):
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def download(dep):
+            with lock:
+                running.append(dep.name)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(dep.name)
+
+        with StubServer({}) as server:
+            cache_man = self.cache_man(server.url)
+            remote = cache_man.remote_caches['remote']
+            deps = [mock_dep('dep' + str(i), '1.0.0') for i in range(4)]
+            server.routes.update(enot_cache_routes({(d.fullname, '1.0.0', remote.erlang_version) for d in deps}))
+            package = mock_dep('package', '1.0.0')
+            package.deps = deps
+            with patch.object(EnotCache, 'fetch_package', side_effect=download):
+                cache_man._CacheMan__fetch_all_deps(remote, package)
+        self.assertEqual(4, mock_add.call_count)
+        self.assertGreater(max(max_running), 1)
+        self.assertEqual(['/builds'], [path for _, path, _ in server.requests])
+
+
+if __name__ == '__main__':
+    unittest.main()
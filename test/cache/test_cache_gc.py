@@ -0,0 +1,143 @@
+import json
+import os
+import time
+import unittest
+from os.path import join
+
+from mock import patch
+
+from enot.pac_cache import cache_gc, object_store
+from enot.pac_cache.cache_gc import GcPolicy, DAY
+from enot.pac_cache.local_cache import LocalCache
+from enot.utils.file_utils import ensure_dir, write_file
+from test.abs_test_class import TestClass
+
+
+class CacheGcTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('cache_gc_tests', method_name)
+
+    def setUp(self):
+        super().setUp()
+        self.cache = LocalCache(self.tmp_dir, '20', {'name': 'local', 'type': 'local',
+                                                     'url': 'file://' + self.cache_dir})
+
+    def add_build(self, fullname: str, vsn: str, size: int, days_ago: int, erlang='20'):
+        path = join(self.cache_dir, fullname, vsn, erlang)
+        ensure_dir(join(path, 'ebin'))
+        write_file(join(path, 'ebin', 'app.beam'), fullname + vsn)
+        manifest = {'ebin/app.beam': self.cache.objects.add_file(join(path, 'ebin', 'app.beam'),
+                                                                 join(path, 'ebin', 'app.beam'))}
+        object_store.write_manifest(path, manifest)
+        self.cache.index.add(fullname, vsn, erlang, size=size)
+        with patch('enot.pac_cache.cache_index.time.time', return_value=time.time() - days_ago * DAY):
+            self.cache.index.touch(fullname, vsn, erlang)
+
+    def builds(self) -> list:
+        return sorted((e['fullname'], e['vsn']) for e in self.cache.index.packages())
+
+    # Builds not used for max age are removed with their dirs, except used by known projects
+    def test_max_age(self):
+        self.add_build('comtihon/old', '1.0.0', 10, 40)
+        self.add_build('comtihon/linked', '1.0.0', 10, 40)
+        self.add_build('comtihon/linked_dep', '1.0.0', 10, 40)
+        self.add_build('comtihon/new', '1.0.0', 10, 1)
+        project = join(self.test_dir, 'project')
+        ensure_dir(join(project, 'deps', 'linked'))
+        os.symlink(join(self.cache_dir, 'comtihon', 'linked', '1.0.0', '20', 'ebin'),
+                   join(project, 'deps', 'linked', 'ebin'))
+        ensure_dir(join(self.cache_dir, 'comtihon', 'linked', '1.0.0', '20', 'deps', 'linked_dep'))
+        os.symlink(join(self.cache_dir, 'comtihon', 'linked_dep', '1.0.0', '20', 'ebin'),
+                   join(self.cache_dir, 'comtihon', 'linked', '1.0.0', '20', 'deps', 'linked_dep', 'ebin'))
+        self.cache.index.add_project(project)
+        self.cache.index.add_project(join(self.test_dir, 'removed_project'))
+        removed = cache_gc.collect(self.cache, GcPolicy(max_age=30 * DAY))
+        self.assertEqual(['comtihon/old'], [e['fullname'] for e in removed])
+        self.assertEqual(False, os.path.exists(join(self.cache_dir, 'comtihon', 'old')))
+        self.assertEqual([('comtihon/linked', '1.0.0'), ('comtihon/linked_dep', '1.0.0'), ('comtihon/new', '1.0.0')],
+                         self.builds())
+        self.assertEqual([project], self.cache.index.projects())
+
+    # Only last used versions are kept. Locked versions are never removed.
+    def test_keep_versions(self):
+        self.add_build('comtihon/dep', '1.0.0', 10, 3)
+        self.add_build('comtihon/dep', '1.0.1', 10, 2)
+        self.add_build('comtihon/dep', '1.0.2', 10, 1)
+        self.add_build('comtihon/dep', 'master-abc', 10, 10)
+        project = join(self.test_dir, 'project')
+        ensure_dir(project)
+        write_file(join(project, 'enot_locks.json'), json.dumps({'comtihon/dep': 'master-abc'}))
+        self.cache.index.add_project(project)
+        cache_gc.collect(self.cache, GcPolicy(keep_versions=2))
+        self.assertEqual([('comtihon/dep', '1.0.1'), ('comtihon/dep', '1.0.2'), ('comtihon/dep', 'master-abc')],
+                         self.builds())
+
+    # Least recently used builds are removed till cache fits max size. Their objects are removed too.
+    def test_max_size(self):
+        self.add_build('comtihon/a', '1.0.0', 100, 3)
+        self.add_build('comtihon/b', '1.0.0', 100, 1)
+        self.add_build('comtihon/c', '1.0.0', 100, 2)
+        objects = [join(root, f) for root, _, files in os.walk(self.cache.objects.path) for f in files]
+        for path in objects:
+            os.utime(path, (time.time() - DAY, time.time() - DAY))
+        self.assertEqual(150 * 1024, cache_gc.parse_size('150K'))
+        removed = cache_gc.collect(self.cache, GcPolicy(max_size=200), dry_run=True)
+        self.assertEqual(['comtihon/a'], [e['fullname'] for e in removed])
+        self.assertEqual(3, len(self.builds()))  # dry run
+        removed = cache_gc.collect(self.cache, GcPolicy(max_size=150))
+        self.assertEqual(['comtihon/a', 'comtihon/c'], [e['fullname'] for e in removed])
+        self.assertEqual([('comtihon/b', '1.0.0')], self.builds())
+        self.assertEqual(1, len([path for path in objects if os.path.exists(path)]))
+
+    # Git mirrors not fetched for max age are removed. Mirrors are counted to max size.
+    def test_mirrors(self):
+        def add_mirror(name: str, days_ago: int, fetched: bool):
+            path = join(self.cache.mirrors_dir, name + '.git')
+            ensure_dir(path)
+            write_file(join(path, 'config'), '[remote "origin"]\n\turl = https://github.com/comtihon/' + name + '\n')
+            write_file(join(path, 'objects.pack'), 'x' * 100)
+            stamp = join(path, 'FETCH_HEAD') if fetched else path
+            if fetched:
+                write_file(stamp, '')
+                os.utime(path, (time.time() - 100 * DAY, time.time() - 100 * DAY))
+            os.utime(stamp, (time.time() - days_ago * DAY, time.time() - days_ago * DAY))
+
+        add_mirror('old', 40, False)
+        add_mirror('fetched', 1, True)
+        add_mirror('not_fetched', 40, True)
+        self.add_build('comtihon/dep', '1.0.0', 100, 2)
+        removed = cache_gc.collect(self.cache, GcPolicy(max_age=30 * DAY), dry_run=True)
+        self.assertEqual(['https://github.com/comtihon/not_fetched', 'https://github.com/comtihon/old'],
+                         sorted(e['url'] for e in removed))
+        self.assertEqual(3, len(os.listdir(self.cache.mirrors_dir)))  # dry run
+        cache_gc.collect(self.cache, GcPolicy(max_age=30 * DAY))
+        self.assertEqual(['fetched.git'], os.listdir(self.cache.mirrors_dir))
+        removed = cache_gc.collect(self.cache, GcPolicy(max_size=200))  # mirror is fetched after dep was used
+        self.assertEqual(['comtihon/dep'], [e['fullname'] for e in removed])
+        removed = cache_gc.collect(self.cache, GcPolicy(max_size=50))
+        self.assertEqual(['https://github.com/comtihon/fetched'], [e['url'] for e in removed])
+        self.assertEqual([], os.listdir(self.cache.mirrors_dir))
+
+    # Outdated remote caches' metadata is removed. Hex metadata is kept for offline mode.
+    def test_remote_metadata(self):
+        ensure_dir(join(self.cache_dir, '.remote'))
+        for name in ['remote.json', 'hex.json']:
+            write_file(join(self.cache_dir, '.remote', name), '{}')
+            os.utime(join(self.cache_dir, '.remote', name), (time.time() - 40 * DAY, time.time() - 40 * DAY))
+        cache_gc.collect(self.cache, GcPolicy(max_age=30 * DAY))
+        self.assertEqual(['hex.json'], os.listdir(join(self.cache_dir, '.remote')))
+
+    # Automatic gc is run only if enabled and not more often than once a day
+    @patch('enot.pac_cache.cache_gc.collect', return_value=[])
+    def test_auto(self, mock_collect):
+        cache_gc.auto_collect(self.cache, GcPolicy(max_age=DAY))
+        self.assertEqual(0, mock_collect.call_count)
+        cache_gc.auto_collect(self.cache, GcPolicy(max_age=DAY, auto=True))
+        self.assertEqual(1, mock_collect.call_count)
+        write_file(join(self.cache_dir, cache_gc.STAMP_NAME), '')
+        cache_gc.auto_collect(self.cache, GcPolicy(max_age=DAY, auto=True))
+        self.assertEqual(1, mock_collect.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
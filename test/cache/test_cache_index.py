@@ -0,0 +1,77 @@
+import threading
+import unittest
+from os.path import join
+
+from enot.pac_cache.cache_index import CacheIndex
+from enot.pac_cache.local_cache import LocalCache
+from enot.utils.file_utils import ensure_dir, write_file, remove_dir
+from test.abs_test_class import TestClass
+
+
+class CacheIndexTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('cache_index_tests', method_name)
+
+    # Builds are found by name, version and erlang version
+    def test_lookup(self):
+        index = CacheIndex(self.cache_dir)
+        index.add('comtihon/dep', '1.0.0', '19', size=10, metadata={'name': 'dep'})
+        index.add('comtihon/dep', '1.0.0', '20')
+        index.add('comtihon/dep', 'master-abcdef', '20', lock='master-abcdef')
+        self.assertEqual(True, index.exists('comtihon/dep', '1.0.0'))
+        self.assertEqual(True, index.exists('comtihon/dep', '1.0.0', '19'))
+        self.assertEqual(False, index.exists('comtihon/dep', '1.0.0', '18'))
+        self.assertEqual(False, index.exists('comtihon/other', '1.0.0'))
+        self.assertEqual(['1.0.0', 'master-abcdef'], index.get_versions('comtihon/dep'))
+        self.assertEqual(['19', '20'], index.get_erl_versions('comtihon/dep', '1.0.0'))
+        entry = CacheIndex(self.cache_dir).get('comtihon/dep', '1.0.0', '19')  # persisted
+        self.assertEqual(10, entry['size'])
+        self.assertEqual({'name': 'dep'}, entry['metadata'])
+        index.touch('comtihon/dep', '1.0.0', '19')
+        self.assertEqual(('comtihon/dep', '1.0.0', '19'),
+                         tuple(index.packages()[-1][k] for k in ['fullname', 'vsn', 'erlang']))
+        index.remove('comtihon/dep', '1.0.0', '19')
+        self.assertEqual(['20'], index.get_erl_versions('comtihon/dep', '1.0.0'))
+
+    # Missing index is created from cache dirs
+    def test_rebuild(self):
+        ensure_dir(join(self.cache_dir, 'comtihon', 'dep', '1.0.0', '20', 'ebin'))
+        write_file(join(self.cache_dir, 'comtihon', 'dep', '1.0.0', '20', 'ebin', 'dep.beam'), 'beam')
+        ensure_dir(join(self.cache_dir, 'comtihon', 'dep', '1.0.1', '19'))
+        ensure_dir(join(self.cache_dir, 'tool', 'relx', 'x', 'y'))
+        ensure_dir(join(self.cache_dir, '.objects', 'ab', 'x', 'y'))
+        cache = LocalCache(self.tmp_dir, '20', {'name': 'local', 'type': 'local', 'url': 'file://' + self.cache_dir})
+        self.assertEqual(['1.0.0', '1.0.1'], cache.get_versions('comtihon/dep'))
+        self.assertEqual(['20'], cache.get_erl_versions('comtihon/dep', '1.0.0'))
+        self.assertEqual(True, cache.check_exists(join('comtihon', 'dep', '1.0.1')))
+        self.assertEqual(4, cache.index.get('comtihon/dep', '1.0.0', '20')['size'])
+        self.assertEqual(2, len(cache.index.packages()))
+
+    # Build, which dir was removed, is not found and is dropped from index
+    def test_removed_dir(self):
+        ensure_dir(join(self.cache_dir, 'comtihon', 'dep', '1.0.0', '20'))
+        ensure_dir(join(self.cache_dir, 'comtihon', 'dep', '1.0.1', '20'))
+        cache = LocalCache(self.tmp_dir, '20', {'name': 'local', 'type': 'local', 'url': 'file://' + self.cache_dir})
+        remove_dir(join(self.cache_dir, 'comtihon', 'dep', '1.0.0'))
+        remove_dir(join(self.cache_dir, 'comtihon', 'dep', '1.0.1', '20'))
+        self.assertEqual(False, cache.check_exists(join('comtihon', 'dep', '1.0.0', '20')))
+        self.assertEqual(False, cache.check_exists(join('comtihon', 'dep', '1.0.1')))
+        self.assertEqual([], cache.index.packages())
+
+    # Builds can be added from parallel threads
+    def test_parallel_add(self):
+        index = CacheIndex(self.cache_dir)
+
+        def add(i: int):
+            index.add('comtihon/dep' + str(i), '1.0.0', '20')
+
+        threads = [threading.Thread(target=add, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(8, len(index.packages()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+from os.path import join
+
+from mock import patch
+
+from enot.pac_cache import Static, ERLANG_VERSION_ENV
+from enot.utils.file_utils import write_file
+from test.abs_test_class import TestClass
+
+
+class ErlangVersionTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('erlang_version_tests', method_name)
+
+    def setUp(self):
+        super().setUp()
+        self.erl = write_file(join(self.test_dir, 'erl'), '#!/bin/sh\necho "19"\n')
+        Static._erlang_versions = {}
+
+    def tearDown(self):
+        Static._erlang_versions = {}
+        Static.pin_erlang_version(None)
+        super().tearDown()
+
+    # Erlang version is detected only once for the same erl binary, even by another enot run
+    @patch('enot.pac_cache.subprocess.check_output', return_value=b'"19"\n')
+    def test_detected_once(self, mock_erl):
+        with patch('enot.pac_cache.shutil.which', return_value=self.erl), \
+             patch.object(Static, 'versions_file', return_value=join(self.test_dir, 'versions.json')), \
+             patch.dict(os.environ, {}) as env:
+            env.pop(ERLANG_VERSION_ENV, None)
+            self.assertEqual('19', Static.get_erlang_version())
+            self.assertEqual('19', Static.get_erlang_version())
+            self.assertEqual(1, mock_erl.call_count)
+            Static._erlang_versions = {}  # new run
+            self.assertEqual('19', Static.get_erlang_version())
+            self.assertEqual(1, mock_erl.call_count)
+            os.utime(self.erl, (0, 0))  # erlang changed
+            self.assertEqual('19', Static.get_erlang_version())
+            self.assertEqual(2, mock_erl.call_count)
+
+    # Erlang version can be set in global config or env, env has priority
+    @patch('enot.pac_cache.subprocess.check_output', return_value=b'"19"\n')
+    def test_pinned(self, mock_erl):
+        with patch.dict(os.environ, {}) as env:
+            env.pop(ERLANG_VERSION_ENV, None)
+            Static.pin_erlang_version('21')
+            self.assertEqual('21', Static.get_erlang_version())
+            env[ERLANG_VERSION_ENV] = '22'
+            self.assertEqual('22', Static.get_erlang_version())
+        self.assertEqual(False, mock_erl.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
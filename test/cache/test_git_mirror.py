@@ -0,0 +1,61 @@
+import os
+import unittest
+from os.path import join
+
+from git import Repo, GitCommandError
+from mock import patch
+
+from enot.pac_cache.local_cache import LocalCache
+from enot.utils.file_utils import ensure_dir, write_file
+from test.abs_test_class import TestClass, set_git_tag
+
+
+class GitMirrorTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('git_mirror_tests', method_name)
+
+    @property
+    def origin(self):
+        return join(self.test_dir, 'origin')
+
+    def setUp(self):
+        super().setUp()
+        ensure_dir(self.origin)
+        write_file(join(self.origin, 'README'), 'version 1')
+        repo = Repo.init(self.origin)
+        repo.index.add(['README'])
+        repo.index.commit('First commit')
+        set_git_tag(self.origin, '1.0.0')
+
+    # Repo is fetched via mirror. Fetched tags are checked out from mirror, new are fetched from origin.
+    def test_fetch_via_mirror(self):
+        cache = LocalCache(self.tmp_dir, '20', {'name': 'local', 'url': 'file://' + self.cache_dir})
+        hash1 = cache.fetch_mirrored(self.origin, '1.0.0', join(self.tmp_dir, 'first'))
+        self.assertEqual(Repo(self.origin).tags['1.0.0'].commit.hexsha, hash1)
+        self.assertEqual(self.origin, Repo(join(self.tmp_dir, 'first')).remotes.origin.url)
+        self.assertEqual(1, len(os.listdir(cache.mirrors_dir)))
+        write_file(join(self.origin, 'README'), 'version 2')
+        repo = Repo(self.origin)
+        repo.index.add(['README'])
+        repo.index.commit('Second commit')
+        set_git_tag(self.origin, '1.0.1')
+        with patch.object(Repo, 'clone_from', wraps=Repo.clone_from) as mock_clone:
+            cache.fetch_mirrored(self.origin, '1.0.1', join(self.tmp_dir, 'second'))  # mirror is updated
+            cache.fetch_mirrored(self.origin, '1.0.0', join(self.tmp_dir, 'third'))  # tag is already in mirror
+            for call in mock_clone.call_args_list:
+                self.assertNotEqual(self.origin, call[0][0])  # only mirror was cloned
+        with open(join(self.tmp_dir, 'second', 'README'), 'r') as f:
+            self.assertEqual('version 2', f.read())
+        with open(join(self.tmp_dir, 'third', 'README'), 'r') as f:
+            self.assertEqual('version 1', f.read())
+
+    # Repo is cloned directly if mirror can't be created
+    def test_fallback_clone(self):
+        cache = LocalCache(self.tmp_dir, '20', {'name': 'local', 'url': 'file://' + self.cache_dir})
+        with patch.object(LocalCache, '_LocalCache__update_mirror', side_effect=GitCommandError('clone', 128)):
+            hash_str = cache.fetch_mirrored(self.origin, '1.0.0', join(self.tmp_dir, 'direct'))
+        self.assertEqual(Repo(self.origin).tags['1.0.0'].commit.hexsha, hash_str)
+
+
+if __name__ == '__main__':
+    unittest.main()
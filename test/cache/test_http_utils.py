@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import json
+import os
+import unittest
+from os.path import join
+
+from enot.pac_cache.remote_cache_exception import RemoteCacheException
+from enot.utils import http_utils
+from enot.utils.file_utils import ensure_dir
+from enot.utils.http_utils import download_file, get_redirect, post_redirect
+from test.abs_test_class import TestClass
+from test.stub_server import StubServer
+
+BIG_FILE = os.urandom(3 * 1024 * 1024 + 17)
+
+
+class HttpUtilsTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('http_utils_tests', method_name)
+
+    def setUp(self):
+        super().setUp()
+        ensure_dir(self.tmp_dir)
+        http_utils.set_session(http_utils.new_session(backoff=0))
+
+    def tearDown(self):
+        http_utils.set_session(None)
+        super().tearDown()
+
+    # Big file is streamed to disk. Connection is reused for all requests.
+    def test_download_keep_alive(self):
+        routes = {('GET', '/file'): lambda h: (200, {}, BIG_FILE),
+                  ('POST', '/versions'): lambda h: (200, {'Content-type': 'application/json'}, b'{"result":true}')}
+        with StubServer(routes) as server:
+            self.assertEqual({'result': True}, post_redirect(server.url + '/versions', {}, {}).json())
+            download_file(lambda h: get_redirect(server.url + '/file', True, h), join(self.tmp_dir, 'file'), b'No', 'e')
+            download_file(lambda h: get_redirect(server.url + '/file', True, h), join(self.tmp_dir, 'file'), b'No', 'e')
+        with open(join(self.tmp_dir, 'file'), 'rb') as f:
+            self.assertEqual(BIG_FILE, f.read())
+        self.assertEqual(3, len(server.requests))
+        self.assertEqual(1, len({port for _, _, port in server.requests}))
+
+    # Temporary server errors are retried
+    def test_retry(self):
+        responses = [(503, {}, b'busy'), (502, {}, b'busy'), (200, {}, b'content')]
+        with StubServer({('GET', '/file'): lambda h: responses.pop(0)}) as server:
+            r = get_redirect(server.url + '/file')
+        self.assertEqual(200, r.status_code)
+        self.assertEqual('content', r.text)
+        self.assertEqual(3, len(server.requests))
+
+    # Redirect location is taken from response body. Missing build is reported.
+    def test_redirect_not_found(self):
+        with StubServer({}) as server:
+            server.routes[('POST', '/get')] = lambda h: (308, {}, (server.url + '/get2').encode('utf-8'))
+            server.routes[('POST', '/get2')] = lambda h: (200, {}, b'No such build')
+            with self.assertRaises(RemoteCacheException):
+                download_file(lambda h: post_redirect(server.url + '/get', {'full_name': 'test'}, h, stream=True),
+                              join(self.tmp_dir, 'file'), b'No such build', 'not found')
+        self.assertEqual(['/get', '/get2'], [path for _, path, _ in server.requests])
+        self.assertEqual([], os.listdir(self.tmp_dir))
+
+    # Interrupted download is resumed from the received part. Checksum is verified.
+    def test_resume_download(self):
+        checksum = hashlib.sha256(BIG_FILE).hexdigest()
+        with StubServer({('GET', '/file'): serve_interrupted}) as server:
+            download_file(lambda h: get_redirect(server.url + '/file', True, h), join(self.tmp_dir, 'file'),
+                          b'No such erlang', 'not found', checksum)
+        with open(join(self.tmp_dir, 'file'), 'rb') as f:
+            self.assertEqual(BIG_FILE, f.read())
+        self.assertEqual(['file'], os.listdir(self.tmp_dir))
+        self.assertEqual(2, len(server.requests))
+        self.assertNotEqual('bytes=0-', server.headers[1]['Range'])  # received chunks are not requested again
+
+    # Partial download from previous run is resumed. Server's checksum is used.
+    def test_resume_previous_run(self):
+        digest = base64.b64encode(hashlib.sha256(BIG_FILE).digest()).decode('ascii')
+        routes = {('GET', '/file'): lambda h: serve_range(h, {'Digest': 'SHA-256=' + digest, 'ETag': '"v1"'})}
+        with StubServer(routes) as server:
+            write_path = join(self.tmp_dir, 'file')
+            with open(write_path + http_utils.PARTIAL_SUFFIX, 'wb') as f:
+                f.write(BIG_FILE[:1000])
+            with open(write_path + http_utils.PARTIAL_SUFFIX + http_utils.META_SUFFIX, 'w') as f:
+                json.dump({'validator': '"v1"', 'checksum': None}, f)
+            download_file(lambda h: get_redirect(server.url + '/file', True, h), write_path, b'No', 'not found')
+        self.assertEqual('bytes=1000-', server.headers[0]['Range'])
+        with open(write_path, 'rb') as f:
+            self.assertEqual(BIG_FILE, f.read())
+
+    # Unknown total size and malformed digest don't break download
+    def test_bad_headers(self):
+        def serve(handler):
+            status, headers, body = serve_range(handler, {'Digest': 'SHA-256=not base64!', 'ETag': '"v1"'})
+            if status == 206:
+                headers['Content-Range'] = headers['Content-Range'].split('/')[0] + '/*'
+            return status, headers, body
+
+        with StubServer({('GET', '/file'): serve}) as server:
+            write_path = join(self.tmp_dir, 'file')
+            with open(write_path + http_utils.PARTIAL_SUFFIX, 'wb') as f:
+                f.write(BIG_FILE[:1000])
+            with open(write_path + http_utils.PARTIAL_SUFFIX + http_utils.META_SUFFIX, 'w') as f:
+                json.dump({'validator': '"v1"', 'checksum': None}, f)
+            download_file(lambda h: get_redirect(server.url + '/file', True, h), write_path, b'No', 'not found')
+            os.remove(write_path)
+            download_file(lambda h: get_redirect(server.url + '/file', True, h), write_path, b'No', 'not found')
+        self.assertEqual(['bytes=1000-', None], [headers.get('Range') for headers in server.headers])
+        with open(write_path, 'rb') as f:
+            self.assertEqual(BIG_FILE, f.read())
+
+    # Partial download without validator and checksum, or of other request, is not resumed
+    def test_not_resumed(self):
+        routes = {('POST', '/get'): lambda h: serve_range(h, {})}
+        with StubServer(routes) as server:
+            write_path = join(self.tmp_dir, 'dep.ep')
+            for key in ['other_build', 'build']:
+                with open(write_path + '.' + key + http_utils.PARTIAL_SUFFIX, 'wb') as f:
+                    f.write(b'other content')
+                with open(write_path + '.' + key + http_utils.PARTIAL_SUFFIX + http_utils.META_SUFFIX, 'w') as f:
+                    json.dump({'validator': '"v1"' if key == 'other_build' else None, 'checksum': None}, f)
+            download_file(lambda h: post_redirect(server.url + '/get', {}, h, stream=True), write_path, b'No',
+                          'not found', partial_key='build')
+        self.assertEqual(None, server.headers[0].get('Range'))
+        with open(write_path, 'rb') as f:
+            self.assertEqual(BIG_FILE, f.read())
+        self.assertEqual(True, os.path.isfile(write_path + '.other_build' + http_utils.PARTIAL_SUFFIX))
+
+    # Corrupted file is not saved
+    def test_checksum_mismatch(self):
+        routes = {('GET', '/file'): lambda h: (200, {'X-Checksum-Sha256': '00'}, BIG_FILE)}
+        with StubServer(routes) as server:
+            with self.assertRaises(RemoteCacheException):
+                download_file(lambda h: get_redirect(server.url + '/file', True, h), join(self.tmp_dir, 'file'),
+                              b'No', 'not found')
+        self.assertEqual([], os.listdir(self.tmp_dir))
+
+
+# Serve range of BIG_FILE, requested by client
+def serve_range(handler, headers: dict):
+    range_header = handler.headers.get('Range')
+    if range_header is None:
+        return 200, headers, BIG_FILE
+    start = int(range_header[len('bytes='):-1])
+    headers = dict(headers, **{'Content-Range': 'bytes ' + str(start) + '-' + str(len(BIG_FILE) - 1) + '/' +
+                                                str(len(BIG_FILE))})
+    return 206, headers, BIG_FILE[start:]
+
+
+# Send only a half of BIG_FILE on the first request and close connection
+def serve_interrupted(handler):
+    if handler.headers.get('Range') is not None:
+        return serve_range(handler, {})
+    handler.send_response(200)
+    handler.send_header('Content-Length', str(len(BIG_FILE)))
+    handler.end_headers()
+    handler.wfile.write(BIG_FILE[:len(BIG_FILE) // 2])
+    handler.wfile.flush()
+    handler.close_connection = True
+    return None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import stat
+import unittest
+from os.path import join
+
+from enot.pac_cache import object_store
+from enot.pac_cache.object_store import ObjectStore
+from enot.utils.file_utils import ensure_dir, write_file
+from test.abs_test_class import TestClass
+
+
+class ObjectStoreTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('object_store_tests', method_name)
+
+    @property
+    def objects_dir(self):
+        return join(self.cache_dir, '.objects')
+
+    # Same files of different dirs are stored once and linked to all of them
+    def test_deduplication(self):
+        store = ObjectStore(self.objects_dir)
+        for vsn in ['1.0.0', '1.0.1']:
+            ensure_dir(join(self.tmp_dir, vsn, 'ebin'))
+            write_file(join(self.tmp_dir, vsn, 'ebin', 'same.beam'), 'same content')
+            write_file(join(self.tmp_dir, vsn, 'ebin', 'changed.beam'), 'content of ' + vsn)
+        first = store.add_dir(join(self.tmp_dir, '1.0.0', 'ebin'), join(self.cache_dir, '1.0.0', 'ebin'))
+        second = store.add_dir(join(self.tmp_dir, '1.0.1', 'ebin'), join(self.cache_dir, '1.0.1', 'ebin'))
+        self.assertEqual(first['same.beam'], second['same.beam'])
+        self.assertNotEqual(first['changed.beam'], second['changed.beam'])
+        same_first = os.stat(join(self.cache_dir, '1.0.0', 'ebin', 'same.beam'))
+        same_second = os.stat(join(self.cache_dir, '1.0.1', 'ebin', 'same.beam'))
+        self.assertEqual(same_first.st_ino, same_second.st_ino)
+        blobs = [f for _, _, files in os.walk(self.objects_dir) for f in files]
+        self.assertEqual(3, len(blobs))
+        with open(join(self.cache_dir, '1.0.1', 'ebin', 'changed.beam'), 'r') as f:
+            self.assertEqual('content of 1.0.1', f.read())
+
+    # Executable files are stored separately from not executable ones with the same content
+    def test_executable(self):
+        store = ObjectStore(self.objects_dir)
+        ensure_dir(join(self.tmp_dir, 'priv'))
+        write_file(join(self.tmp_dir, 'priv', 'script'), 'echo test')
+        write_file(join(self.tmp_dir, 'priv', 'text'), 'echo test')
+        st = os.stat(join(self.tmp_dir, 'priv', 'script'))
+        os.chmod(join(self.tmp_dir, 'priv', 'script'), st.st_mode | stat.S_IEXEC)
+        files = store.add_dir(join(self.tmp_dir, 'priv'), join(self.cache_dir, 'priv'))
+        self.assertNotEqual(files['script'], files['text'])
+        self.assertEqual(True, os.access(join(self.cache_dir, 'priv', 'script'), os.X_OK))
+        self.assertEqual(False, os.access(join(self.cache_dir, 'priv', 'text'), os.X_OK))
+
+    # Objects manifest is written and read back. Missing manifest is empty.
+    def test_manifest(self):
+        ensure_dir(self.cache_dir)
+        self.assertEqual({}, object_store.read_manifest(self.cache_dir))
+        object_store.write_manifest(self.cache_dir, {'ebin/test.beam': 'abc'})
+        self.assertEqual({'ebin/test.beam': 'abc'}, object_store.read_manifest(self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
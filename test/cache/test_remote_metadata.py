@@ -0,0 +1,104 @@
+import json
+import time
+import unittest
+from os.path import join
+
+from mock import patch, MagicMock
+
+from enot.pac_cache.cache_man import CacheMan
+from enot.pac_cache.enot_cache import EnotCache
+from enot.pac_cache.remote_cache_exception import RemoteCacheException
+from enot.pac_cache.remote_metadata import RemoteMetadata
+from enot.utils import http_utils
+from test.abs_test_class import TestClass
+from test.stub_server import StubServer
+
+VERSIONS = b'{"result":true,"response":[{"ref":"1.0.0","erl_version":"20"},{"ref":"1.0.1","erl_version":"20"}]}'
+
+
+class RemoteMetadataTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('remote_metadata_tests', method_name)
+
+    @property
+    def metadata_path(self):
+        return join(self.cache_dir, '.remote', 'remote.json')
+
+    def setUp(self):
+        super().setUp()
+        http_utils.set_session(http_utils.new_session(backoff=0))
+
+    def tearDown(self):
+        http_utils.set_session(None)
+        super().tearDown()
+
+    # Builds and missing builds are persisted. Outdated entries are ignored.
+    def test_ttl(self):
+        metadata = RemoteMetadata(self.metadata_path, 60)
+        metadata.set_builds('comtihon/test', [{'ref': '1.0.0', 'erl_version': '20'}])
+        metadata.set_missing('comtihon/other', '1.0.0', '20')
+        loaded = RemoteMetadata(self.metadata_path, 60)
+        self.assertEqual([{'ref': '1.0.0', 'erl_version': '20'}], loaded.get_builds('comtihon/test'))
+        self.assertEqual(True, loaded.is_missing('comtihon/other', '1.0.0', '20'))
+        self.assertEqual(True, loaded.is_missing('comtihon/test', '1.0.0', '19'))  # not in known builds
+        self.assertEqual(False, loaded.is_missing('comtihon/test', '1.0.0', '20'))
+        self.assertEqual(False, loaded.is_missing('comtihon/unknown', '1.0.0', '20'))
+        with patch('enot.pac_cache.remote_metadata.time.time', return_value=time.time() + 61):
+            self.assertEqual(None, loaded.get_builds('comtihon/test'))
+            self.assertEqual(False, loaded.is_missing('comtihon/other', '1.0.0', '20'))
+
+    # Versions are requested from remote only once
+    def test_versions_served_locally(self):
+        with StubServer({('POST', '/versions'): lambda h: (200, {}, VERSIONS)}) as server:
+            for _ in range(2):
+                cache = EnotCache(self.tmp_dir, '20', {'name': 'remote', 'type': 'enot', 'url': server.url})
+                cache.metadata = RemoteMetadata(self.metadata_path, 60)
+                self.assertEqual(['1.0.0', '1.0.1'], cache.get_versions('comtihon/test'))
+                self.assertEqual(['20'], cache.get_erl_versions('comtihon/test', '1.0.1'))
+        self.assertEqual(1, len(server.requests))
+        with open(self.metadata_path, 'r') as f:
+            self.assertIn('comtihon/test', json.load(f)['versions'])
+
+    # Error response is not remembered, so package's builds are not treated as missing
+    def test_versions_error_not_remembered(self):
+        error = b'{"result":false,"response":"internal error"}'
+        with StubServer({('POST', '/versions'): lambda h: (200, {}, error)}) as server:
+            cache = EnotCache(self.tmp_dir, '20', {'name': 'remote', 'type': 'enot', 'url': server.url})
+            cache.metadata = RemoteMetadata(self.metadata_path, 60)
+            self.assertEqual([], cache.get_versions('comtihon/test'))
+            self.assertEqual([], cache.get_versions('comtihon/test'))
+        self.assertEqual(2, len(server.requests))
+        self.assertEqual(None, cache.metadata.get_builds('comtihon/test'))
+        self.assertEqual(False, cache.metadata.is_missing('comtihon/test', '1.0.0', '20'))
+
+    # Build, which was not found in remote cache, is not requested again
+    def test_missing_not_requested(self):
+        with StubServer({('POST', '/get'): lambda h: (200, {}, b'No such build')}) as server:
+            conf = {'temp_dir': self.tmp_dir,
+                    'cache': [{'name': 'local_cache', 'type': 'local', 'url': 'file://' + self.cache_dir},
+                              {'name': 'remote', 'type': 'enot', 'url': server.url}]}
+            dep = MagicMock(fullname='comtihon/dep', git_vsn='1.0.0')
+            dep.name = 'dep'
+            for _ in range(2):
+                cache_man = CacheMan(conf)
+                self.assertEqual(False, cache_man.exists_remote(cache_man.remote_caches['remote'], dep))
+        self.assertEqual(1, len(server.requests))
+
+    # Failed download is not remembered as missing build
+    @patch('enot.pac_cache.enot_cache.download_file', side_effect=RemoteCacheException('Can\'t download dep.ep'))
+    def test_failed_not_missing(self, mock_download):
+        conf = {'temp_dir': self.tmp_dir,
+                'cache': [{'name': 'local_cache', 'type': 'local', 'url': 'file://' + self.cache_dir},
+                          {'name': 'remote', 'type': 'enot', 'url': 'http://127.0.0.1:1'}]}
+        dep = MagicMock(fullname='comtihon/dep', git_vsn='1.0.0')
+        dep.name = 'dep'
+        cache_man = CacheMan(conf)
+        cache = cache_man.remote_caches['remote']
+        self.assertEqual(False, cache_man.exists_remote(cache, dep))
+        self.assertEqual(False, cache.metadata.is_missing('comtihon/dep', '1.0.0', cache.erlang_version))
+        self.assertEqual(False, cache_man.exists_remote(cache, dep))
+        self.assertEqual(2, mock_download.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
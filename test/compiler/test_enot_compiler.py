@@ -8,7 +8,10 @@ from mock import patch
 
 import test
 from enot.__main__ import create
-from enot.compiler.enot import EnotCompiler
+from enot.compiler import compile_server
+from enot.compiler.compile_server import erlc_to_request
+from enot.compiler.compile_server_exception import CompileServerException
+from enot.compiler.enot import EnotCompiler, split_to_shards
 from enot.pac_cache.local_cache import LocalCache
 from enot.packages.config.enot import EnotConfig
 from enot.packages.package import Package
@@ -72,6 +75,122 @@ class CompileTests(TestClass):
         self.assertEqual(False, compiler.compile())
         self.assertEqual(False, os.path.exists(join(self.ebin_dir, 'improper.beam')))
 
+    # Only changed modules are recompiled, beams of removed modules are deleted
+    @patch.object(EnotCompiler, '_EnotCompiler__write_app_file')
+    def test_incremental_compilation(self, mock_compiler):
+        mock_compiler.return_value = True
+        ensure_dir(self.src_dir)
+        for module in ['first', 'second', 'third']:
+            with open(join(self.src_dir, module + '.erl'), 'w') as w:
+                w.write('-module(' + module + ').\n-export([test/0]).\ntest() -> 1.\n')
+        config = EnotConfig({'name': 'test'})
+        package = Package(self.test_dir, config, None)
+        self.assertEqual(True, EnotCompiler(package).compile())
+        beams = {m: os.stat(join(self.ebin_dir, m + '.beam')).st_mtime_ns for m in ['first', 'second', 'third']}
+        with open(join(self.src_dir, 'second.erl'), 'w') as w:
+            w.write('-module(second).\n-export([test/0]).\ntest() -> 2.\n')
+        os.remove(join(self.src_dir, 'third.erl'))
+        self.assertEqual(True, EnotCompiler(package).compile())
+        self.assertEqual(beams['first'], os.stat(join(self.ebin_dir, 'first.beam')).st_mtime_ns)
+        self.assertNotEqual(beams['second'], os.stat(join(self.ebin_dir, 'second.beam')).st_mtime_ns)
+        self.assertEqual(False, os.path.exists(join(self.ebin_dir, 'third.beam')))
+        # options changed - everything is recompiled
+        self.assertEqual(True, EnotCompiler(package, 'TEST_DEFINE=test').compile())
+        self.assertNotEqual(beams['first'], os.stat(join(self.ebin_dir, 'first.beam')).st_mtime_ns)
+
+    # Only modules, which include changed header (directly or via other header) are recompiled
+    @patch.object(EnotCompiler, '_EnotCompiler__write_app_file')
+    def test_incremental_header_change(self, mock_compiler):
+        mock_compiler.return_value = True
+        ensure_dir(self.src_dir)
+        include_dir = join(self.test_dir, 'include')
+        ensure_dir(include_dir)
+        with open(join(include_dir, 'common.hrl'), 'w') as w:
+            w.write('-include("nested.hrl").\n')
+        with open(join(include_dir, 'nested.hrl'), 'w') as w:
+            w.write('-define(VALUE, 1).\n')
+        with open(join(self.src_dir, 'with_header.erl'), 'w') as w:
+            w.write('-module(with_header).\n-include("common.hrl").\n-export([test/0]).\ntest() -> ?VALUE.\n')
+        with open(join(self.src_dir, 'no_header.erl'), 'w') as w:
+            w.write('-module(no_header).\n-export([test/0]).\ntest() -> 1.\n')
+        config = EnotConfig({'name': 'test'})
+        package = Package(self.test_dir, config, None)
+        self.assertEqual(True, EnotCompiler(package).compile())
+        beams = {m: os.stat(join(self.ebin_dir, m + '.beam')).st_mtime_ns for m in ['with_header', 'no_header']}
+        with open(join(include_dir, 'nested.hrl'), 'w') as w:
+            w.write('-define(VALUE, 2).\n')
+        self.assertEqual(True, EnotCompiler(package).compile())
+        self.assertNotEqual(beams['with_header'], os.stat(join(self.ebin_dir, 'with_header.beam')).st_mtime_ns)
+        self.assertEqual(beams['no_header'], os.stat(join(self.ebin_dir, 'no_header.beam')).st_mtime_ns)
+
+    # Modules are split to shards of similar size, shards are not bigger than max files
+    def test_split_to_shards(self):
+        ensure_dir(self.src_dir)
+        files = {}
+        for i in range(10):
+            with open(join(self.src_dir, 'module' + str(i) + '.erl'), 'w') as w:
+                w.write('-module(module' + str(i) + ').\n' + '%' * (i * 100))
+            files['module' + str(i)] = self.src_dir
+        shards = split_to_shards(files, 3)
+        self.assertEqual(3, len(shards))
+        self.assertEqual(sorted(files.keys()), sorted(name for shard in shards for name in shard))
+        self.assertEqual(1, len(split_to_shards(files, 1)))
+        self.assertEqual(5, len(split_to_shards(files, 1, max_files=2)))
+
+    # Modules are compiled by several erlc processes, all of them are put to ebin
+    @patch.object(EnotCompiler, '_EnotCompiler__write_app_file')
+    def test_sharded_compilation(self, mock_compiler):
+        mock_compiler.return_value = True
+        ensure_dir(self.src_dir)
+        modules = ['module' + str(i) for i in range(8)]
+        for module in modules:
+            with open(join(self.src_dir, module + '.erl'), 'w') as w:
+                w.write('-module(' + module + ').\n-export([test/0]).\ntest() -> 1.\n')
+        config = EnotConfig({'name': 'test', 'compile_jobs': 3})
+        package = Package(self.test_dir, config, None)
+        compiler = EnotCompiler(package)
+        self.assertEqual(3, compiler.compile_jobs)
+        self.assertEqual(True, compiler.compile())
+        for module in modules:
+            self.assertEqual(True, os.path.exists(join(self.ebin_dir, module + '.beam')))
+
+    # modules are compiled on compile server, compilation errors are reported
+    @patch.object(EnotCompiler, '_EnotCompiler__write_app_file')
+    def test_compile_server_compilation(self, mock_compiler):
+        mock_compiler.return_value = True
+        ensure_dir(self.src_dir)
+        with open(join(self.src_dir, 'proper.erl'), 'w') as w:
+            w.write('-module(proper).\n-export([test/0]).\ntest() -> ?TEST_VALUE.\n')
+        package = Package(self.test_dir, EnotConfig({'name': 'test'}), None)
+        compiler = EnotCompiler(package, 'TEST_VALUE=1', compile_server=True)
+        self.assertEqual(True, compiler.compile())
+        self.assertEqual(True, os.path.exists(join(self.ebin_dir, 'proper.beam')))
+        with open(join(self.src_dir, 'proper.erl'), 'w') as w:
+            w.write('-module(proper).\n-export([test/0]).\ntest() -> syntax error here.\n')
+        self.assertEqual(False, compiler.compile())
+
+    # erlc is used, if compile server can't be started
+    @patch.object(compile_server, 'acquire', side_effect=CompileServerException('no erl'))
+    @patch.object(EnotCompiler, '_EnotCompiler__write_app_file')
+    def test_compile_server_fallback(self, mock_compiler, mock_acquire):
+        mock_compiler.return_value = True
+        ensure_dir(self.src_dir)
+        with open(join(self.src_dir, 'proper.erl'), 'w') as w:
+            w.write('-module(proper).\n-export([test/0]).\ntest() -> 1.\n')
+        package = Package(self.test_dir, EnotConfig({'name': 'test'}), None)
+        compiler = EnotCompiler(package, compile_server=True)
+        self.assertEqual(True, compiler.compile())
+        self.assertEqual(True, mock_acquire.called)
+        self.assertEqual(True, os.path.exists(join(self.ebin_dir, 'proper.beam')))
+
+    # erlc arguments are converted to compile:file options
+    def test_erlc_to_request(self):
+        request = erlc_to_request(['-I', '/p/include', '-pa', '/p/ebin', '-o', '/p/ebin',
+                                   '-D', 'TEST=1', '-DDEBUG', '/p/src/m.erl'], '/p', {})
+        self.assertEqual('{compile, "/p", ["/p/ebin"], ["/p/src/m.erl"], '
+                         '[report_errors, report_warnings, {i, "/p/include"}, {outdir, "/p/ebin"}, '
+                         '{d, \'TEST\', {raw, "1"}}, {d, \'DEBUG\'}]}.', request)
+
     # application file is created from app.src file. Templates are filled.
     def test_write_app_file_from_src(self):
         ensure_dir(self.src_dir)
@@ -0,0 +1,75 @@
+import unittest
+from os.path import join
+
+from enot.compiler.source_scanner import SourceScanner, scan_content, compilation_layers, with_dependants
+from enot.utils.file_utils import ensure_dir, write_file
+from test.abs_test_class import TestClass
+
+
+class SourceScannerTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('source_scanner_tests', method_name)
+
+    # All compile time attributes are found, commented ones are skipped
+    def test_scan_content(self):
+        attrs = scan_content('''
+        -module(a_module).
+        -include("a.hrl").
+        -include_lib("dep/include/b.hrl").
+        % -include("commented.hrl").
+        -behaviour(gen_server).
+        -behavior(my_behaviour).
+        -compile([export_all, {parse_transform, p_trans}]).
+        -compile({parse_transform, 'other_trans'}).
+        -import(lists, [map/2]).
+        ''')
+        self.assertEqual(['a.hrl'], attrs['include'])
+        self.assertEqual(['dep/include/b.hrl'], attrs['include_lib'])
+        self.assertEqual(['gen_server', 'my_behaviour'], attrs['behaviour'])
+        self.assertEqual(['p_trans', 'other_trans'], attrs['parse_transform'])
+        self.assertEqual(['lists'], attrs['import'])
+
+    # Headers are resolved in src, include and deps include dirs, transitively
+    def test_scan_headers(self):
+        src = join(self.test_dir, 'src')
+        include = join(self.test_dir, 'include')
+        dep_include = join(self.test_dir, 'deps', 'dep', 'include')
+        for path in [src, include, dep_include]:
+            ensure_dir(path)
+        write_file(join(src, 'a_module.erl'), '''
+        -module(a_module).
+        -include("local.hrl").
+        -include("common.hrl").
+        -include_lib("dep/include/dep.hrl").
+        -include_lib("kernel/include/file.hrl").
+        -behaviour(gen_server).
+        ''')
+        write_file(join(src, 'local.hrl'), '-define(LOCAL, 1).')
+        write_file(join(include, 'common.hrl'), '-include("nested.hrl").')
+        write_file(join(include, 'nested.hrl'), '-define(NESTED, 1).')
+        write_file(join(dep_include, 'dep.hrl'), '-define(DEP, 1).')
+        scanner = SourceScanner(self.test_dir, [include], join(self.test_dir, 'deps'))
+        scanned = scanner.scan(join(src, 'a_module.erl'))
+        self.assertEqual([join(src, 'local.hrl'),
+                          join(include, 'common.hrl'),
+                          join(include, 'nested.hrl'),
+                          join(dep_include, 'dep.hrl')], scanned['headers'])
+        self.assertEqual(['gen_server'], scanned['compile_deps'])
+
+    # Parse transforms and behaviours are compiled before modules using them
+    def test_compilation_layers(self):
+        layers = compilation_layers({'a': ['p_trans', 'behaviour'],
+                                     'behaviour': ['p_trans'],
+                                     'p_trans': [],
+                                     'b': ['gen_server']})
+        self.assertEqual([['b', 'p_trans'], ['behaviour'], ['a']], layers)
+
+    # Changed module leads to recompilation of all modules depending on it
+    def test_with_dependants(self):
+        modules = {'a': ['behaviour'], 'behaviour': ['p_trans'], 'p_trans': [], 'b': []}
+        self.assertEqual({'p_trans', 'behaviour', 'a'}, with_dependants(modules, {'p_trans'}))
+        self.assertEqual({'b'}, with_dependants(modules, {'b'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
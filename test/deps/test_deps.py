@@ -1,4 +1,5 @@
 import os
+import threading
 import unittest
 from os.path import join
 
@@ -174,6 +175,47 @@ class DepsTests(TestClass):
         self.assertEqual('1.0.0', builder.packages['dep2'].git_vsn)
         self.assertEqual('1.0.1', builder.packages['dep3'].git_vsn)
 
+    # Test if deps of one level are fetched in parallel, and the same versions are selected as in serial fetch
+    @patch.object(LocalCache, 'fetch_package')
+    @patch('enot.global_properties.ensure_conf_file')
+    def test_deps_fetch_parallel(self, mock_conf, mock_fetch):
+        mock_conf.return_value = self.conf_file
+        in_flight = threading.Barrier(3, timeout=10)  # broken if deps of the first level are not fetched together
+
+        def fetch_together(dep: Package):
+            in_flight.wait()
+            mock_fetch_package(dep)
+
+        mock_fetch.side_effect = fetch_together
+        pack_path = join(self.test_dir, 'test_app')
+        set_deps(pack_path,
+                 [
+                     {'name': 'dep1',
+                      'url': 'https://github.com/comtihon/dep1',
+                      'tag': '1.0.0'},
+                     {'name': 'dep2',
+                      'url': 'https://github.com/comtihon/dep2',
+                      'tag': '1.0.0'},
+                     {'name': 'dep3',
+                      'url': 'https://github.com/comtihon/dep3',
+                      'tag': '1.0.1'}
+                 ])
+        create(self.tmp_dir, {'<name>': 'dep1'})
+        create(self.tmp_dir, {'<name>': 'dep2'})
+        set_deps(join(self.tmp_dir, 'dep2'),
+                 [
+                     {'name': 'dep3',
+                      'url': 'https://github.com/comtihon/dep3',
+                      'tag': '1.0.0'}
+                 ])
+        create(self.tmp_dir, {'<name>': 'dep3'})
+        builder = Builder.init_from_path(pack_path)
+        builder.populate(jobs=4)
+        self.assertEqual(['dep1', 'dep2', 'dep3'], sorted(builder.packages.keys()))
+        self.assertEqual(mock_fetch.call_count, 3)
+        self.assertEqual('1.0.0', builder.packages['dep2'].git_vsn)
+        self.assertEqual('1.0.1', builder.packages['dep3'].git_vsn)
+
     # Test if some deps have conflicting versions
     @patch.object(LocalCache, 'fetch_package')
     @patch('enot.global_properties.ensure_conf_file')
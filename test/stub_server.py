@@ -0,0 +1,105 @@
+"""
+Local stand-in of remote cache HTTP server for tests.
+Routes are a dict: (method, path) -> function(handler) returning (status, headers dict, body bytes),
+or None if it has written the response itself.
+Every served request is remembered as (method, path, client port) in requests list, it's headers and body -
+in headers and bodies lists.
+"""
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubServer:
+    def __init__(self, routes: dict):
+        self._routes = routes
+        self._requests = []
+        self._headers = []
+        self._bodies = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def do_GET(self):
+                self.__serve('GET')
+
+            def do_POST(self):
+                self.__serve('POST')
+
+            def log_message(self, *args):
+                pass
+
+            def __serve(self, method):
+                length = int(self.headers.get('Content-Length', 0))
+                self.body = self.rfile.read(length) if length else b''
+                server.requests.append((method, self.path, self.client_address[1]))
+                server.headers.append(dict(self.headers))
+                server.bodies.append(self.body)
+                route = server.routes.get((method, self.path))
+                if route is None:
+                    status, headers, body = 404, {}, b'not found'
+                else:
+                    response = route(self)
+                    if response is None:
+                        return
+                    status, headers, body = response
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return 'http://127.0.0.1:' + str(self._httpd.server_address[1])
+
+    @property
+    def routes(self) -> dict:
+        return self._routes
+
+    @property
+    def requests(self) -> list:
+        return self._requests
+
+    @property
+    def headers(self) -> list:
+        return self._headers
+
+    @property
+    def bodies(self) -> list:
+        return self._bodies
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# Routes of enot remote cache stand-in. Builds is a set of available (full_name, ref, erl_version)
+def enot_cache_routes(builds: set) -> dict:
+    def reply(response) -> tuple:
+        return 200, {'Content-type': 'application/json'}, json.dumps({'result': True, 'response': response}).encode()
+
+    def versions(handler):
+        name = json.loads(handler.body.decode())['full_name']
+        return reply([{'ref': ref, 'erl_version': erl} for (full_name, ref, erl) in sorted(builds) if full_name == name])
+
+    def batch(handler):
+        requested = json.loads(handler.body.decode())['builds']
+        return reply([dict(build, exists=(build['full_name'], build['ref'], build['erl_version']) in builds)
+                      for build in requested])
+
+    return {('POST', '/versions'): versions, ('POST', '/builds'): batch}
@@ -6,6 +6,7 @@ from mock import patch
 
 import test
 from enot.__main__ import create
+from enot.compiler.compiler_factory import get_compiler
 from enot.pac_cache import Static
 from enot.pac_cache.local_cache import LocalCache
 from enot.packages.package import Package
@@ -88,6 +89,56 @@ class BuildTests(TestClass):
             real_dep = join(self.cache_dir, 'comtihon', dep, '1.0.0', erl, 'ebin')
             self.assertEqual(real_dep, os.readlink(dep_link_ebin))
 
+    # Deps are built in parallel, dep's dep is built before the dep and everything is linked to the project
+    @patch.object(LocalCache, 'fetch_package', side_effect=mock_fetch_package)
+    @patch('enot.global_properties.ensure_conf_file')
+    def test_build_deps_parallel(self, mock_conf, _):
+        mock_conf.return_value = self.conf_file
+        pack_path = join(self.test_dir, 'test_app')
+        set_deps(pack_path,
+                 [
+                     {'name': 'a_with_dep_a2',
+                      'url': 'https://github.com/comtihon/a_with_dep_a2',
+                      'tag': '1.0.0'},
+                     {'name': 'b_with_no_deps',
+                      'url': 'https://github.com/comtihon/b_with_no_deps',
+                      'tag': '1.0.0'}
+                 ])
+        create(self.tmp_dir, {'<name>': 'a_with_dep_a2'})
+        dep_a1_path = join(self.tmp_dir, 'a_with_dep_a2')
+        set_deps(dep_a1_path, [{'name': 'a2_with_no_deps',
+                                'url': 'https://github.com/comtihon/a2_with_no_deps',
+                                'tag': '1.0.0'}])
+        create(self.tmp_dir, {'<name>': 'b_with_no_deps'})
+        create(self.tmp_dir, {'<name>': 'a2_with_no_deps'})
+        builder = Builder.init_from_path(pack_path)
+        builder.populate()
+        linked_on_compile = {}
+
+        def get_checking_compiler(system_config, define, package):  # remember if package's deps are linked
+            compiler = get_compiler(system_config, define, package)
+            compile_package = compiler.compile
+
+            def compile_and_check(*args, **kwargs):
+                linked_on_compile.setdefault(package.name, [dep.name for dep in package.deps
+                                                            if os.path.islink(join(package.path, 'deps', dep.name,
+                                                                                   'ebin'))])
+                return compile_package(*args, **kwargs)
+
+            compiler.compile = compile_and_check
+            return compiler
+
+        with patch('enot.packages.package_builder.get_compiler', side_effect=get_checking_compiler):
+            self.assertEqual(True, builder.build(jobs=4))
+        erl = Static.get_erlang_version()
+        for dep in ['a_with_dep_a2', 'b_with_no_deps', 'a2_with_no_deps']:
+            dep_link_ebin = join(pack_path, 'deps', dep, 'ebin')
+            self.assertEqual(True, os.path.islink(dep_link_ebin))
+            real_dep = join(self.cache_dir, 'comtihon', dep, '1.0.0', erl, 'ebin')
+            self.assertEqual(real_dep, os.readlink(dep_link_ebin))
+        # a2 was linked to a before a was compiled
+        self.assertEqual(['a2_with_no_deps'], linked_on_compile['a_with_dep_a2'])
+
     # Dep's dep should not be linked to the project, as it is prohibited by config
     @patch.object(LocalCache, 'fetch_package', side_effect=mock_fetch_package)
     @patch('enot.global_properties.ensure_conf_file')
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+from enot.packages.build_scheduler import BuildScheduler, topological_order
+from test.abs_test_class import TestClass
+
+
+class BuildSchedulerTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('build_scheduler_tests', method_name)
+
+    # Deps are always ordered before packages, which depend on them
+    def test_topological_order(self):
+        graph = {'a': ['a2', 'b'], 'b': ['c'], 'a2': ['c'], 'c': []}
+        order = topological_order(graph)
+        self.assertEqual(4, len(order))
+        for name, deps in graph.items():
+            for dep in deps:
+                self.assertLess(order.index(dep), order.index(name))
+
+    # Cycle in deps is reported instead of endless building
+    def test_cycle(self):
+        with self.assertRaises(RuntimeError):
+            topological_order({'a': ['b'], 'b': ['c'], 'c': ['a']})
+
+    # Package is built only after all it's deps. Independent packages are built at the same time.
+    def test_parallel_build(self):
+        graph = {'a': ['a2', 'b'], 'b': [], 'a2': [], 'c': [], 'd': ['cached']}
+        built = []
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def build(name):
+            with lock:
+                for dep in graph[name]:
+                    if dep != 'cached':
+                        self.assertIn(dep, built)
+                running.append(name)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(name)
+                built.append(name)
+            return True
+
+        self.assertEqual(True, BuildScheduler(3).run(graph, build))
+        self.assertEqual(sorted(graph.keys()), sorted(built))
+        self.assertGreater(built.index('a'), built.index('a2'))
+        self.assertGreater(built.index('a'), built.index('b'))
+        self.assertLessEqual(max(max_running), 3)
+        self.assertGreater(max(max_running), 1)
+
+    # Failed package stops the build. It's dependants are not built.
+    def test_failed_build(self):
+        graph = {'a': ['b'], 'b': []}
+        built = []
+
+        def build(name):
+            built.append(name)
+            return name != 'b'
+
+        with self.assertRaises(RuntimeError):
+            BuildScheduler(2).run(graph, build)
+        self.assertEqual(['b'], built)
+
+
+if __name__ == '__main__':
+    unittest.main()
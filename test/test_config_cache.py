@@ -0,0 +1,85 @@
+import os
+import time
+import unittest
+from os.path import join
+
+from mock import MagicMock
+
+from enot.packages.config import config_cache
+from enot.packages.config.config_cache import ConfigCache
+from enot.packages.config.enot import EnotConfig
+from enot.packages.config.erlang_mk import ErlangMkConfig
+from enot.utils.file_utils import ensure_dir, write_file
+from test.abs_test_class import TestClass
+
+
+class ConfigCacheTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('config_cache_tests', method_name)
+
+    @property
+    def project_dir(self):
+        return join(self.test_dir, 'project')
+
+    def setUp(self):
+        super().setUp()
+        ensure_dir(self.project_dir)
+        self.cache = ConfigCache(join(self.cache_dir, '.configs'))
+
+    def tearDown(self):
+        config_cache.set_config_cache(None)
+        super().tearDown()
+
+    # Make file look like it was modified long ago, so its state is trusted
+    @staticmethod
+    def make_old(path: str, seconds=10):
+        os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+    # Config is parsed once while it is not changed. Touched config is rehashed, not parsed.
+    def test_cached(self):
+        config = join(self.project_dir, 'rebar.config')
+        write_file(config, '{deps, []}.')
+        self.make_old(config)
+        parser = MagicMock(return_value=[('deps', [])])
+        self.assertEqual([('deps', [])], self.cache.read(config, 'rebar', parser))
+        self.assertEqual([('deps', [])], self.cache.read(config, 'rebar', parser))
+        self.assertEqual([('deps', [])], ConfigCache(self.cache.path).read(config, 'rebar', parser))  # persisted
+        self.make_old(config, 5)  # touched
+        self.assertEqual([('deps', [])], self.cache.read(config, 'rebar', parser))
+        self.assertEqual(1, parser.call_count)
+        self.cache.read(config, 'other', parser)  # other parser of the same file
+        self.assertEqual(2, parser.call_count)
+
+    # Changed config is parsed again, even if it was changed right after parse with the same size
+    def test_changed(self):
+        config = join(self.project_dir, 'rebar.config')
+        write_file(config, '{deps, [a]}.')
+        self.cache.read(config, 'rebar', lambda path: 'a')
+        write_file(config, '{deps, [b]}.')
+        self.assertEqual('b', self.cache.read(config, 'rebar', lambda path: 'b'))
+        write_file(config, '{deps, [c, d]}.')
+        self.make_old(config)
+        self.assertEqual('c', self.cache.read(config, 'rebar', lambda path: 'c'))
+
+    # Enot and erlang.mk configs are read via cache. Results of removed configs are cleaned.
+    def test_project_configs(self):
+        config_cache.set_config_cache(self.cache)
+        write_file(join(self.project_dir, 'enot_config.json'), '{"name": "project", "app_vsn": "1.0.0"}')
+        self.assertEqual('1.0.0', EnotConfig.from_path(self.project_dir).conf_vsn)
+        write_file(join(self.project_dir, 'Makefile'), 'PROJECT = project\n'
+                                                       'DEPS = cowboy\n'
+                                                       'dep_cowboy = git https://github.com/ninenines/cowboy 1.0.0\n'
+                                                       'ERLC_OPTS += -DTEST\n')
+        config = ErlangMkConfig(self.project_dir)
+        self.assertEqual(['TEST'], config.build_vars)
+        self.assertEqual(['cowboy'], list(config.deps.keys()))
+        self.assertEqual(2, len(os.listdir(self.cache.path)))
+        cached = ErlangMkConfig(self.project_dir)
+        self.assertEqual(config.build_vars, cached.build_vars)
+        os.remove(join(self.project_dir, 'Makefile'))
+        self.assertEqual(1, self.cache.clean())
+        self.assertEqual(1, len(os.listdir(self.cache.path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tarfile
+import unittest
+from os.path import join
+
+from enot.packages import ep_format
+from enot.packages.config.enot import EnotConfig
+from enot.packages.package import Package
+from enot.utils.file_utils import ensure_dir, write_file, read_file
+from test.abs_test_class import TestClass
+
+
+class EpFormatTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('ep_format_tests', method_name)
+
+    @property
+    def pack_dir(self):
+        return join(self.test_dir, 'test_app')
+
+    def setUp(self):
+        super().setUp()
+        ensure_dir(join(self.pack_dir, 'ebin'))
+        ensure_dir(join(self.pack_dir, 'priv'))
+        write_file(join(self.pack_dir, 'ebin', 'test_app.beam'), 'beam' * 1000)
+        write_file(join(self.pack_dir, 'priv', 'run.sh'), '#!/bin/sh')
+        os.chmod(join(self.pack_dir, 'priv', 'run.sh'), 0o755)
+        write_file(join(self.pack_dir, 'enot_config.json'), '{"name": "test_app"}')
+
+    # Package is compressed and the same files give the same package
+    def test_reproducible(self):
+        dirs = ['ebin', 'priv', 'enot_config.json']
+        ep_format.write_package(self.pack_dir, dirs, join(self.test_dir, 'first.ep'))
+        os.utime(join(self.pack_dir, 'ebin', 'test_app.beam'), (1, 1))
+        ep_format.write_package(self.pack_dir, dirs, join(self.test_dir, 'second.ep'))
+        with open(join(self.test_dir, 'first.ep'), 'rb') as f:
+            first = f.read()
+        with open(join(self.test_dir, 'second.ep'), 'rb') as f:
+            self.assertEqual(first, f.read())
+        self.assertEqual(ep_format.GZIP_MAGIC, first[:2])
+        self.assertLess(len(first), 4000)
+        with ep_format.open_package(join(self.test_dir, 'first.ep')) as archive:
+            names = [member.name for member in archive]
+        self.assertEqual([ep_format.VERSION_FILE, 'enot_config.json', 'ebin', 'ebin/test_app.beam',
+                          'priv', 'priv/run.sh'], names)
+
+    # Metadata is read without reading the rest of package
+    def test_read_metadata(self):
+        write_file(join(self.pack_dir, 'ebin', 'test_app.beam'), os.urandom(100000), binary=True)
+        path = join(self.test_dir, 'test.ep')
+        ep_format.write_package(self.pack_dir, ['ebin', 'enot_config.json'], path)
+        self.assertEqual(ep_format.FORMAT_VERSION, ep_format.read_version(path))
+        with open(path, 'r+b') as f:  # break everything after metadata
+            f.truncate(os.path.getsize(path) // 2)
+        files = ep_format.read_files(path, ['enot_config.json'])
+        self.assertEqual({'enot_config.json': b'{"name": "test_app"}'}, files)
+
+    # Uncompressed packages of previous versions are read and extracted
+    def test_old_format(self):
+        with tarfile.open(join(self.test_dir, 'old.ep'), 'w') as archive:
+            for name in ['ebin', 'priv', 'enot_config.json']:
+                archive.add(join(self.pack_dir, name), arcname=name)
+        self.assertEqual(1, ep_format.read_version(join(self.test_dir, 'old.ep')))
+        ep_format.extract(join(self.test_dir, 'old.ep'), join(self.test_dir, 'extracted'))
+        self.assertEqual('beam' * 1000, read_file(join(self.test_dir, 'extracted', 'ebin', 'test_app.beam')))
+        self.assertEqual(True, os.access(join(self.test_dir, 'extracted', 'priv', 'run.sh'), os.X_OK))
+
+    # Package is created from generated package file
+    def test_package_from_package(self):
+        package = Package(self.pack_dir, EnotConfig({'name': 'test_app', 'app_vsn': '1.0.0'}), None)
+        package.generate_package()
+        loaded = Package.from_package(join(self.pack_dir, 'test_app.ep'))
+        self.assertEqual('test_app', loaded.name)
+        self.assertEqual('1.0.0', loaded.vsn)
+        self.assertEqual(False, loaded.has_nifs)
+
+    # Package is inspected by header, without reading its files
+    def test_package_header(self):
+        write_file(join(self.pack_dir, 'ebin', 'test_app.beam'), os.urandom(100000), binary=True)
+        write_file(join(self.pack_dir, 'ebin', 'test_app.app'),
+                   '{application, test_app, [{vsn, "1.0.0"}, {applications, [kernel, stdlib]}]}.')
+        package = Package.from_path(self.pack_dir)
+        package.generate_package()
+        path = join(self.pack_dir, 'test_app.ep')
+        header = ep_format.read_header(path)
+        self.assertEqual('test_app', header['name'])
+        self.assertEqual(False, header['has_nifs'])
+        self.assertIn('ebin/test_app.beam', header['files'])
+        with open(path, 'r+b') as f:  # break everything after metadata
+            f.truncate(os.path.getsize(path) // 2)
+        loaded = Package.from_package(path)
+        self.assertEqual('test_app', loaded.name)
+        self.assertEqual(False, loaded.has_nifs)
+        self.assertEqual(package.app_config.applications, loaded.app_config.applications)
+
+    # Package without header is read fully
+    def test_package_without_header(self):
+        write_file(join(self.pack_dir, 'enot_config.json'), '{"name": "test_app", "app_vsn": "1.0.0"}')
+        ensure_dir(join(self.pack_dir, 'c_src'))
+        ep_format.write_package(self.pack_dir, ['c_src', 'ebin', 'enot_config.json'], join(self.test_dir, 'test.ep'))
+        self.assertEqual(None, ep_format.read_header(join(self.test_dir, 'test.ep')))
+        loaded = Package.from_package(join(self.test_dir, 'test.ep'))
+        self.assertEqual('test_app', loaded.name)
+        self.assertEqual(True, loaded.has_nifs)
+
+
+if __name__ == '__main__':
+    unittest.main()
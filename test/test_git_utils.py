@@ -0,0 +1,89 @@
+import subprocess
+import unittest
+from os.path import join
+
+from mock import patch
+
+from enot.__main__ import create
+from enot.packages.package import Package
+from enot.utils import git_utils
+from test.abs_test_class import TestClass
+
+
+def git(path: str, *args) -> str:
+    cmd = ['git', '-c', 'user.name=test', '-c', 'user.email=test@test.com', '-c', 'commit.gpgsign=false'] + list(args)
+    return subprocess.check_output(cmd, cwd=path, stderr=subprocess.STDOUT).decode('utf-8').strip()
+
+
+class GitUtilsTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('git_utils_tests', method_name)
+
+    @property
+    def repo_dir(self):
+        return join(self.test_dir, 'test_app')
+
+    def setUp(self):
+        super().setUp()
+        create(self.test_dir, {'<name>': 'test_app'})
+        git(self.repo_dir, 'init', '-q', '-b', 'master')
+        git(self.repo_dir, 'remote', 'add', 'origin', 'https://github.com/comtihon/test_app')
+        git(self.repo_dir, 'add', '.')
+        git(self.repo_dir, 'commit', '-q', '-m', 'first')
+        git(self.repo_dir, 'tag', '0.9.0')
+        git(self.repo_dir, 'commit', '-q', '--allow-empty', '-m', 'second')
+
+    # Branch, origin and the last of tags, pointing to HEAD, are read the same way GitPython does
+    @patch('enot.utils.git_utils.__read_info_with_gitpython', side_effect=AssertionError('should not be used'))
+    def test_read_info(self, _):
+        self.assertEqual({'url': 'https://github.com/comtihon/test_app', 'branch': 'master', 'tag': None},
+                         git_utils.read_git_info(self.repo_dir))
+        git(self.repo_dir, 'tag', '1.0.0')
+        git(self.repo_dir, 'tag', '-a', '1.0.1', '-m', 'annotated')
+        self.assertEqual('1.0.1', git_utils.read_git_info(self.repo_dir)['tag'])
+        git(self.repo_dir, 'pack-refs', '--all')
+        git(self.repo_dir, 'checkout', '-q', '0.9.0')
+        self.assertEqual({'url': 'https://github.com/comtihon/test_app', 'branch': None, 'tag': '0.9.0'},
+                         git_utils.read_git_info(self.repo_dir))
+        self.assertEqual(None, git_utils.read_git_info(join(self.repo_dir, 'src')))
+
+    # Result is the same as GitPython's one
+    def test_same_as_gitpython(self):
+        git(self.repo_dir, 'tag', '-a', 'release/1.0.0', '-m', 'annotated')
+        git(self.repo_dir, 'tag', '1.0.0')
+        git(self.repo_dir, 'pack-refs', '--all')
+        git(self.repo_dir, 'tag', '0.0.1')
+        fast = git_utils.read_git_info(self.repo_dir)
+        with patch('enot.utils.git_utils.__read_info', side_effect=ValueError('skip')):
+            self.assertEqual(fast, git_utils.read_git_info(self.repo_dir))
+        package = Package.from_path(self.repo_dir)
+        self.assertEqual('1.0.0', package.git_tag)
+        self.assertEqual('master', package.git_branch)
+        self.assertEqual('comtihon/test_app', package.fullname)
+
+    # Repository with thousands of tags is read with one git call, which result is remembered till HEAD changes
+    def test_many_tags(self):
+        head = git(self.repo_dir, 'rev-parse', 'HEAD')
+        updates = ''.join('create refs/tags/0.0.' + str(i) + ' ' + head + '\n' for i in range(3000))
+        subprocess.run(['git', 'update-ref', '--stdin'], input=updates.encode('utf-8'), cwd=self.repo_dir, check=True)
+        git(self.repo_dir, 'pack-refs', '--all')
+        with patch('enot.utils.git_utils.subprocess.check_output', wraps=subprocess.check_output) as mock_git:
+            self.assertEqual('0.0.999', git_utils.read_git_info(self.repo_dir)['tag'])
+            self.assertEqual('0.0.999', git_utils.read_git_info(self.repo_dir)['tag'])
+            self.assertEqual(None, git_utils.read_git_info(self.repo_dir, find_tag=False)['tag'])
+            self.assertEqual(1, mock_git.call_count)
+        git(self.repo_dir, 'commit', '-q', '--allow-empty', '-m', 'third')
+        with patch('enot.utils.git_utils.subprocess.check_output', wraps=subprocess.check_output) as mock_git:
+            self.assertEqual(None, git_utils.read_git_info(self.repo_dir)['tag'])
+            self.assertEqual(1, mock_git.call_count)
+
+    # Worktree's refs and config are read from main repository
+    def test_worktree(self):
+        worktree = join(self.test_dir, 'worktree')
+        git(self.repo_dir, 'worktree', 'add', '-q', '-b', 'feature', worktree, '0.9.0')
+        self.assertEqual({'url': 'https://github.com/comtihon/test_app', 'branch': 'feature', 'tag': '0.9.0'},
+                         git_utils.read_git_info(worktree))
+
+
+if __name__ == '__main__':
+    unittest.main()
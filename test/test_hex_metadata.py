@@ -0,0 +1,79 @@
+import json
+import time
+import unittest
+from os.path import join
+
+from mock import patch, MagicMock
+
+from enot.packages.config import hex_metadata
+from enot.packages.config.enot import EnotConfig
+from enot.packages.config.hex_metadata import HexMetadata
+from enot.packages.dep import Dep
+from test.abs_test_class import TestClass
+
+
+def hex_info(name: str) -> dict:
+    return {'name': name,
+            'releases': [{'version': '1.0.1'}, {'version': '1.0.0'}],
+            'meta': {'links': {'GitHub': 'https://github.com/comtihon/' + name}}}
+
+
+class HexMetadataTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('hex_metadata_tests', method_name)
+
+    @property
+    def metadata_path(self):
+        return join(self.cache_dir, '.remote', 'hex.json')
+
+    def tearDown(self):
+        hex_metadata.set_hex_metadata(HexMetadata())
+        super().tearDown()
+
+    # Package is requested once and is remembered in local cache
+    def test_remembered(self):
+        request = MagicMock(side_effect=hex_info)
+        metadata = HexMetadata(self.metadata_path)
+        self.assertEqual('https://github.com/comtihon/dep', metadata.get('dep', request)['url'])
+        self.assertEqual(['1.0.1', '1.0.0'], metadata.get('dep', request)['releases'])
+        self.assertEqual('https://github.com/comtihon/dep', HexMetadata(self.metadata_path).get('dep', request)['url'])
+        self.assertEqual(1, request.call_count)
+
+    # Outdated package is requested again. If Hex is not available or offline mode is on - remembered one is used.
+    def test_outdated(self):
+        HexMetadata(self.metadata_path).get('dep', hex_info)
+        with open(self.metadata_path, 'r') as f:
+            data = json.load(f)
+        data['dep']['checked_at'] = time.time() - 100
+        with open(self.metadata_path, 'w') as f:
+            json.dump(data, f)
+        failing = MagicMock(side_effect=OSError('Network is unreachable'))
+        self.assertEqual('https://github.com/comtihon/dep',
+                         HexMetadata(self.metadata_path, ttl=10).get('dep', failing)['url'])
+        self.assertEqual(1, failing.call_count)
+        offline = HexMetadata(self.metadata_path, ttl=10, offline=True)
+        self.assertEqual('https://github.com/comtihon/dep', offline.get('dep', failing)['url'])
+        self.assertEqual(1, failing.call_count)
+        with self.assertRaises(RuntimeError):
+            offline.get('other_dep', failing)
+        with self.assertRaises(RuntimeError):
+            HexMetadata(self.metadata_path).get('other_dep', failing)
+
+    # All hex deps of config are requested before they are resolved
+    @patch('enot.packages.config.config.request_hex_info', side_effect=hex_info)
+    def test_config_deps(self, mock_hex):
+        metadata = HexMetadata(self.metadata_path)
+        metadata.prefetch = MagicMock(wraps=metadata.prefetch)
+        hex_metadata.set_hex_metadata(metadata)
+        config = EnotConfig({'name': 'test_app',
+                             'deps': [{'name': 'hex_dep1', 'tag': '1.0.0'},
+                                      {'name': 'hex_dep2', 'tag': '1.0.1'},
+                                      {'name': 'git_dep', 'url': 'https://github.com/comtihon/git_dep',
+                                       'tag': '1.0.0'}]})
+        self.assertEqual(['hex_dep1', 'hex_dep2'], sorted(metadata.prefetch.call_args[0][0]))
+        self.assertEqual(2, mock_hex.call_count)
+        self.assertEqual(Dep('https://github.com/comtihon/hex_dep2', None, tag='1.0.1'), config.deps['hex_dep2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+import unittest
+from os.path import join
+
+from mock import patch
+
+from enot.compiler.c_compiler import CCompiler
+from enot.global_properties import GlobalProperties
+from enot.packages.config.enot import EnotConfig
+from enot.packages.package import Package
+from enot.utils import job_budget
+from enot.utils.file_utils import ensure_dir
+from enot.utils.job_budget import JobBudget
+from test.abs_test_class import TestClass
+
+
+class JobBudgetTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('job_budget_tests', method_name)
+
+    def tearDown(self):
+        job_budget.set_budget(None)
+        super().tearDown()
+
+    # Caller gets not more jobs, than free. Jobs are returned after use.
+    def test_acquire_release(self):
+        budget = JobBudget(4)
+        with budget.jobs(8) as jobs:
+            self.assertEqual(4, jobs)
+            self.assertEqual(0, budget.free)
+        self.assertEqual(4, budget.free)
+        with budget.jobs(2) as jobs:
+            self.assertEqual(2, jobs)
+
+    # Parallel callers don't use more jobs than the budget has in total
+    def test_parallel_callers(self):
+        budget = JobBudget(4)
+        used = []
+        max_used = []
+        lock = threading.Lock()
+
+        def build():
+            with budget.jobs(4) as jobs:
+                with lock:
+                    used.append(jobs)
+                    max_used.append(sum(used))
+                time.sleep(0.02)
+                with lock:
+                    used.remove(jobs)
+
+        threads = [threading.Thread(target=build) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(max_used), 4)
+        self.assertEqual(4, budget.free)
+
+    # make is called with jobs from budget, limited by package's config
+    @patch('enot.compiler.c_compiler.run_cmd', return_value=True)
+    def test_make_jobs(self, mock_run):
+        ensure_dir(join(self.test_dir, 'c_src'))
+        job_budget.set_budget(3)
+        package = Package(self.test_dir, EnotConfig({'name': 'test'}), None)
+        self.assertEqual(True, CCompiler(package).compile())
+        self.assertEqual(['make', '-j3', '-C', 'c_src'], mock_run.call_args[0][0])
+        package = Package(self.test_dir, EnotConfig({'name': 'test', 'c_build_jobs': 1}), None)
+        self.assertEqual(True, CCompiler(package).compile())
+        self.assertEqual(['make', '-j1', '-C', 'c_src'], mock_run.call_args[0][0])
+
+    # Budget is set only when global config is configured. The same config doesn't replace it.
+    @patch('enot.global_properties._configured', None)
+    @patch('enot.global_properties.ensure_conf_file')
+    def test_configured_once(self, mock_conf):
+        mock_conf.return_value = self.conf_file
+        budget = job_budget.get_budget()
+        GlobalProperties()
+        self.assertIs(budget, job_budget.get_budget())
+        system_config = GlobalProperties().configure()
+        budget = job_budget.get_budget()
+        self.assertEqual(system_config.max_jobs, budget.total)
+        with budget.jobs(1):
+            GlobalProperties().configure()
+            self.assertIs(budget, job_budget.get_budget())
+        with open(self.conf_file, 'w') as f:
+            json.dump(dict(self.global_config, max_jobs=3), f)
+        self.assertEqual(3, GlobalProperties().configure().max_jobs)
+        self.assertEqual(3, job_budget.get_budget().total)
+
+
+if __name__ == '__main__':
+    unittest.main()
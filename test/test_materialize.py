@@ -0,0 +1,67 @@
+import errno
+import os
+import unittest
+from os.path import join
+
+from mock import patch
+
+from enot.utils import materialize
+from enot.utils.file_utils import ensure_dir, read_file, write_file
+from enot.utils.materialize import materialize_file, materialize_tree, REFLINK, HARDLINK, COPY
+from test.abs_test_class import TestClass
+
+
+class MaterializeTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('materialize_tests', method_name)
+
+    def setUp(self):
+        super().setUp()
+        materialize._no_reflink.clear()
+
+    def tearDown(self):
+        materialize.set_verify(False)
+        super().tearDown()
+
+    @property
+    def src(self):
+        return join(self.test_dir, 'src')
+
+    # Methods are tried in order. Reflink is not tried again on filesystem, which doesn't support it.
+    @patch('enot.utils.materialize.fcntl')
+    def test_fallback(self, mock_fcntl):
+        mock_fcntl.ioctl.side_effect = OSError(errno.EOPNOTSUPP, 'Operation not supported')
+        write_file(self.src, 'content')
+        self.assertEqual(HARDLINK, materialize_file(self.src, join(self.tmp_dir, 'a')))
+        self.assertEqual(True, os.path.samefile(self.src, join(self.tmp_dir, 'a')))
+        self.assertEqual(COPY, materialize_file(self.src, join(self.tmp_dir, 'b'), (REFLINK, COPY)))
+        self.assertEqual(False, os.path.samefile(self.src, join(self.tmp_dir, 'b')))
+        self.assertEqual('content', read_file(join(self.tmp_dir, 'b')))
+        self.assertEqual(1, mock_fcntl.ioctl.call_count)
+        with patch('os.link', side_effect=OSError(errno.EXDEV, 'Invalid cross-device link')):
+            self.assertEqual(COPY, materialize_file(self.src, join(self.tmp_dir, 'a')))
+        self.assertEqual(False, os.path.samefile(self.src, join(self.tmp_dir, 'a')))
+
+    # Dir is recreated with all subdirs. Executable flag is kept.
+    def test_tree(self):
+        ensure_dir(join(self.src, 'sub'))
+        write_file(join(self.src, 'file'), 'file')
+        write_file(join(self.src, 'sub', 'script'), 'script')
+        os.chmod(join(self.src, 'sub', 'script'), 0o755)
+        used = materialize_tree(self.src, join(self.tmp_dir, 'dst'), (REFLINK, COPY))
+        self.assertEqual(2, sum(used.values()))
+        self.assertEqual('file', read_file(join(self.tmp_dir, 'dst', 'file')))
+        self.assertEqual(True, os.access(join(self.tmp_dir, 'dst', 'sub', 'script'), os.X_OK))
+
+    # In verification mode placed file is compared with source
+    @patch('enot.utils.materialize.file_hash', side_effect=['src_hash', 'dst_hash'])
+    def test_verify(self, _):
+        write_file(self.src, 'content')
+        materialize_file(self.src, join(self.tmp_dir, 'a'), (COPY,))
+        materialize.set_verify(True)
+        with self.assertRaises(RuntimeError):
+            materialize_file(self.src, join(self.tmp_dir, 'a'), (COPY,))
+
+
+if __name__ == '__main__':
+    unittest.main()
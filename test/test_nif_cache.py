@@ -0,0 +1,91 @@
+import os
+import unittest
+from os.path import join
+
+from mock import patch
+
+from enot.compiler import nif_cache
+from enot.compiler.c_compiler import CCompiler
+from enot.compiler.nif_cache import NifCache, build_key
+from enot.pac_cache.object_store import ObjectStore
+from enot.packages.config.enot import EnotConfig
+from enot.packages.package import Package
+from enot.utils.file_utils import ensure_dir
+from test.abs_test_class import TestClass
+
+
+class NifCacheTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('nif_cache_tests', method_name)
+
+    def setUp(self):
+        super().setUp()
+        ensure_dir(join(self.test_dir, 'c_src'))
+        with open(join(self.test_dir, 'c_src', 'nif.c'), 'w') as f:
+            f.write('int nif() { return 1; }')
+        nif_cache.set_nif_cache(NifCache(join(self.cache_dir, '.nif'), ObjectStore(join(self.cache_dir, '.objects'))))
+
+    def tearDown(self):
+        nif_cache.set_nif_cache(None)
+        super().tearDown()
+
+    def build(self, c_build_vars: list, mock_run):
+        def make(*_):
+            with open(join(self.test_dir, 'priv', 'nif.so'), 'w') as f:
+                f.write('built')
+            return True
+
+        mock_run.side_effect = make
+        package = Package(self.test_dir, EnotConfig({'name': 'test', 'c_build_vars': c_build_vars}), None)
+        return CCompiler(package).compile()
+
+    # Built nif is restored from cache, when the same sources are built again
+    @patch('enot.compiler.c_compiler.run_cmd')
+    def test_restore(self, mock_run):
+        self.assertEqual(True, self.build([], mock_run))
+        self.assertEqual(1, mock_run.call_count)
+        os.remove(join(self.test_dir, 'priv', 'nif.so'))
+        self.assertEqual(True, self.build([], mock_run))
+        self.assertEqual(1, mock_run.call_count)
+        with open(join(self.test_dir, 'priv', 'nif.so'), 'r') as f:
+            self.assertEqual('built', f.read())
+
+    # Sources or build vars change leads to rebuild. Object files in c_src don't.
+    @patch('enot.compiler.c_compiler.run_cmd')
+    def test_key_changes(self, mock_run):
+        key = build_key(join(self.test_dir, 'c_src'), [], {})
+        with open(join(self.test_dir, 'c_src', 'nif.o'), 'w') as f:
+            f.write('object')
+        self.assertEqual(key, build_key(join(self.test_dir, 'c_src'), [], {}))
+        self.assertNotEqual(key, build_key(join(self.test_dir, 'c_src'), [{'CFLAGS': '-O3'}], {}))
+        self.assertNotEqual(key, build_key(join(self.test_dir, 'c_src'), [], {'CC': 'clang'}))
+        self.build([], mock_run)
+        self.build([{'CFLAGS': '-O3'}], mock_run)
+        self.assertEqual(2, mock_run.call_count)
+        with open(join(self.test_dir, 'c_src', 'nif.c'), 'w') as f:
+            f.write('int nif() { return 2; }')
+        self.build([], mock_run)
+        self.assertEqual(3, mock_run.call_count)
+
+    # The same sources in other package dir are built again, as default makefile names nif after package dir
+    @patch('enot.compiler.c_compiler.run_cmd')
+    def test_other_dir(self, mock_run):
+        def make(_cmd, _name, path, _env):
+            with open(join(path, 'priv', os.path.basename(path) + '.so'), 'w') as f:
+                f.write('built')
+            return True
+
+        mock_run.side_effect = make
+        for name in ['test_app', 'test_app_fork', 'test_app']:
+            path = join(self.test_dir, name)
+            ensure_dir(join(path, 'c_src'))
+            with open(join(path, 'c_src', 'nif.c'), 'w') as f:
+                f.write('int nif() { return 1; }')
+            package = Package(path, EnotConfig({'name': 'test_app'}), None)
+            self.assertEqual(True, CCompiler(package).compile())
+            self.assertEqual([name + '.so'], os.listdir(join(path, 'priv')))
+        self.assertEqual(2, mock_run.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from test.abs_test_class import TestClass
+
+HEAVY_MODULES = ['git', 'requests', 'jinja2', 'tinydb', 'erl_terms', 'pkg_resources', 'appdirs', 'distutils']
+MAX_IMPORT_TIME = 0.3  # seconds. Was ~0.5 with eager imports, ~0.03 with lazy ones
+
+
+class StartupTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('startup_tests', method_name)
+
+    # Run python snippet in a clean interpreter, return its output
+    @staticmethod
+    def run_python(code: str) -> str:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+        return subprocess.check_output([sys.executable, '-c', code], env=env, cwd=root).decode('utf-8').strip()
+
+    # Cli module doesn't import heavy dependencies, they are imported by commands, which need them
+    def test_no_heavy_imports(self):
+        loaded = self.run_python('import sys\n'
+                                 'import enot.__main__\n'
+                                 'print(",".join(m for m in ' + repr(HEAVY_MODULES) + ' if m in sys.modules))')
+        self.assertEqual('', loaded)
+
+    # Cli module is imported fast
+    def test_import_time(self):
+        best = None
+        for _ in range(5):  # best of several runs, to be stable on a loaded machine
+            spent = float(self.run_python('import time\n'
+                                          'start = time.perf_counter()\n'
+                                          'import enot.__main__\n'
+                                          'print(time.perf_counter() - start)'))
+            best = spent if best is None else min(best, spent)
+        self.assertLess(best, MAX_IMPORT_TIME)
+
+    # Resources are found without pkg_resources
+    def test_resources(self):
+        from enot.utils.file_utils import resource_path
+        self.assertEqual(True, os.path.isfile(resource_path('global_config.json')))
+        self.assertEqual(True, os.path.isfile(resource_path('template_app.erl')))
+
+
+if __name__ == '__main__':
+    unittest.main()
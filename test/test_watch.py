@@ -0,0 +1,85 @@
+import os
+import unittest
+from os.path import join
+
+from mock import patch, MagicMock
+
+from enot.__main__ import create
+from enot.compiler.hot_loader import HotLoader
+from enot.packages.build_watcher import BuildWatcher
+from enot.packages.package_builder import Builder
+from enot.utils.file_utils import ensure_dir, write_file
+from enot.utils.file_watcher import InotifyWatcher, PollingWatcher
+from test.abs_test_class import TestClass
+
+
+class WatchTests(TestClass):
+    def __init__(self, method_name):
+        super().__init__('watch_tests', method_name)
+
+    @property
+    def pack_path(self):
+        return join(self.test_dir, 'test_app')
+
+    def setUp(self):
+        super().setUp()
+        create(self.test_dir, {'<name>': 'test_app'})
+
+    def check_watcher(self, watcher):
+        try:
+            write_file(join(self.pack_path, 'src', 'test_app_sup.erl'), '-module(test_app_sup).')
+            self.assertEqual({join(self.pack_path, 'src', 'test_app_sup.erl')}, watcher.wait(5))
+            write_file(join(self.pack_path, 'ebin.beam'), 'not watched')
+            self.assertEqual(set(), watcher.wait(0.2))
+            ensure_dir(join(self.pack_path, 'include'))
+            self.assertIn(join(self.pack_path, 'include'), watcher.wait(5))
+            write_file(join(self.pack_path, 'include', 'test_app.hrl'), '-define(A, 1).')
+            self.assertIn(join(self.pack_path, 'include', 'test_app.hrl'), watcher.wait(5))
+            write_file(join(self.pack_path, 'enot_config.json'), '{"name": "test_app"}')
+            self.assertEqual({join(self.pack_path, 'enot_config.json')}, watcher.wait(5))
+        finally:
+            watcher.close()
+
+    # Changes of watched sources and files are found with inotify, new dirs are watched too
+    def test_inotify(self):
+        try:
+            watcher = InotifyWatcher([join(self.pack_path, 'src'), join(self.pack_path, 'include'),
+                                      join(self.pack_path, 'enot_config.json')])
+        except (OSError, AttributeError):
+            self.skipTest('inotify is not available')
+        self.check_watcher(watcher)
+
+    # Changes of watched sources and files are found by polling
+    def test_polling(self):
+        self.check_watcher(PollingWatcher([join(self.pack_path, 'src'), join(self.pack_path, 'include'),
+                                           join(self.pack_path, 'enot_config.json')], interval=0.05))
+
+    # Only changed module is recompiled and loaded to the node. Config changes reload the project.
+    @patch('enot.global_properties.ensure_conf_file')
+    def test_rebuild(self, mock_conf):
+        mock_conf.return_value = self.conf_file
+        loader = HotLoader('test@localhost')
+        loader.load = MagicMock(return_value=True)
+        watcher = BuildWatcher(Builder.init_from_path(self.pack_path), loader=loader)
+        self.assertEqual(True, watcher.start())
+        try:
+            sup_beam = join(self.pack_path, 'ebin', 'test_app_sup.beam')
+            app_beam = join(self.pack_path, 'ebin', 'test_app_app.beam')
+            app_state = os.stat(app_beam).st_mtime
+            with open(join(self.pack_path, 'src', 'test_app_sup.erl'), 'a') as f:
+                f.write('\n%% changed\n')
+            builder = watcher.builder
+            self.assertEqual(True, watcher.rebuild({join(self.pack_path, 'src', 'test_app_sup.erl')}))
+            self.assertIs(builder, watcher.builder)
+            loader.load.assert_called_once_with([sup_beam])
+            self.assertEqual(app_state, os.stat(app_beam).st_mtime)
+            self.assertEqual(True, watcher.needs_reload({join(self.pack_path, 'deps', 'dep', 'ebin')}))
+            self.assertEqual(True, watcher.rebuild({join(self.pack_path, 'enot_config.json')}))
+            self.assertIsNot(builder, watcher.builder)
+            self.assertIs(builder.system_config, watcher.builder.system_config)
+        finally:
+            watcher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()